@@ -1,3 +1,20 @@
-from .data_loader import DataLoader
-from .data_processor import DataProcessor
-from .data_visualizer import DataVisualizer
\ No newline at end of file
+# Submodules are imported on first attribute access (PEP 562) so that
+# `import src.data_ops` does not pull in the plotting stack.
+import importlib
+
+_LAZY_ATTRS = {
+    "DataLoader": ".data_loader",
+    "DataProcessor": ".data_processor",
+    "DataVisualizer": ".data_visualizer",
+}
+
+__all__ = list(_LAZY_ATTRS)
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRS:
+        module = importlib.import_module(_LAZY_ATTRS[name], __name__)
+        value = getattr(module, name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -6,13 +6,12 @@ import csv
 import pandas as pd
 from pathlib import Path
 
-from pathlib import Path
 from dataclasses import dataclass
 from logging import Logger
-import pandas as pd
-import xarray as xr
 import numpy as np
-import yaml
+
+# xarray and yaml are optional and heavy to import, so they are not imported here;
+# methods that come to need them should import them locally.
 
 
 class DataLoader:
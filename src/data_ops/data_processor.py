@@ -3,5 +3,5 @@ import csv
 import pandas as pd
 from pathlib import Path
 
-class DataLoader():
+class DataProcessor():
     """Placeholder for DataProcessor class."""
\ No newline at end of file
@@ -2,9 +2,9 @@ import json
 import csv
 import pandas as pd
 from pathlib import Path
-import matplotlib.pyplot as plt
-import seaborn as sns
-import plotly
 
-class DataVidualizer:
+# matplotlib, seaborn and plotly are imported inside the plotting methods
+# (e.g. `import matplotlib.pyplot as plt`) so importing this module stays cheap.
+
+class DataVisualizer:
     """Placeholder for DataVisualizer."""
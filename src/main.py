@@ -7,4 +7,230 @@ Suggested structure:
 - Define a main function to encapsulate the workflow (e.g. Create an instance of your the Runner class, Run a single simulation or multiple simulations, Save results and generate plots if necessary.)
 - Prepare input data for a single simulation or multiple simulations.
 - Execute main function when the script is run directly.
-"""
\ No newline at end of file
+"""
+import argparse
+from pathlib import Path
+from types import SimpleNamespace
+
+from src.runner import Runner
+from src.runner.pipeline import Pipeline
+from src.runner.runner import QUESTIONS
+
+# notebook stages: load_inputs -> prepare_base_inputs -> make_scenarios -> build_input_data_*
+# -> LP_OptimizationProblem.run -> results_to_dataframe / duals -> KPIs and plots.
+# Stage functions only take plain data, so every output can be cached and sent to workers.
+
+
+def load_stage(folder):
+    import utils.data as data
+    return data.load_inputs(Path(folder))
+
+
+def base_stage(inputs, task):
+    import utils.data as data
+    appliance_params, bus_params, _, der_prod, usage_pref = inputs
+    return data.prepare_base_inputs(appliance_params, bus_params, der_prod, usage_pref, task=task)
+
+
+def scenario_stage(base, name, override=None):
+    """One scenario of make_scenarios, optionally with some arrays replaced (e.g. a tariff)."""
+    import numpy as np
+    import utils.data as data
+    scenario = dict(data.make_scenarios(base)[name])
+    for key, value in (override or {}).items():
+        scenario[key] = np.broadcast_to(np.asarray(value, dtype=float), (base["T"],)).copy()
+    return scenario
+
+
+def model_stage(inputs, base, scenario, question, builder_kwargs):
+    import utils.builders as builders
+    kwargs = dict(builder_kwargs)
+    if question == "2b":
+        storage = inputs[0]["storage"][0]
+        kwargs.setdefault("r_ch", storage["max_charging_power_ratio"])
+        kwargs.setdefault("r_dis", storage["max_discharging_power_ratio"])
+    return getattr(builders, QUESTIONS[question][2])(base, scenario, **kwargs)
+
+
+def solve_stage(input_data, solver_options):
+    import utils.classes as classes
+    problem = classes.LP_OptimizationProblem(input_data, params=solver_options)
+    problem.run()
+    results = problem.results
+    return SimpleNamespace(objective_value=getattr(results, "objective_value", None),
+                           variables=getattr(results, "variables", {}),
+                           duals=getattr(results, "duals", {}))
+
+
+def frame_stage(results, base, question):
+    import utils.helpers as helpers
+    if results.objective_value is None:
+        return None
+    convert = helpers.results_to_dataframe_2b if question == "2b" else helpers.results_to_dataframe
+    return convert(results, base["T"])
+
+
+def _lambdas(results, T, question):
+    # 1a has the daily minimum-load row first, the other builders start with the load balance
+    offset = 1 if question == "1a" else 0
+    return [results.duals.get(f"constr[{i}]") for i in range(offset, T + offset)]
+
+
+def _discomfort_weights(question, builder_kwargs):
+    # gamma_up/gamma_down as the builder resolves them (1b: both default to kappa)
+    import inspect
+    import utils.builders as builders
+    defaults = {k: p.default for k, p in
+                inspect.signature(getattr(builders, QUESTIONS[question][2])).parameters.items()}
+    kwargs = {**defaults, **builder_kwargs}
+    if "gamma_up" not in kwargs:
+        return 0.0, 0.0
+    kappa = kwargs.get("kappa")
+    return tuple(kappa if kwargs[k] is None else kwargs[k] for k in ("gamma_up", "gamma_down"))
+
+
+def kpi_stage(base, *per_scenario, names, question, gamma_up=1.0, gamma_down=1.0):
+    """KPIs of all scenarios: per_scenario = (scenario, results, frame) for each name."""
+    import numpy as np
+    import pandas as pd
+    import utils.kpis as kpis
+    rows = [(n, sc, res, df) for n, (sc, res, df) in zip(names, zip(*[iter(per_scenario)] * 3))
+            if df is not None]
+    if not rows:
+        return pd.DataFrame()
+    X = kpis.dataframes_to_tensor([df for *_, df in rows])
+    stack = lambda key: np.array([sc[key] for _, sc, _, _ in rows])
+    lambdas = np.array([_lambdas(res, base["T"], question) for _, _, res, _ in rows], dtype=float)[:, None, :]
+    capacity = base["battery_params"]["capacity_kWh"] if "battery_params" in base else None
+    return kpis.compute_kpis(X, stack("price"), stack("imp"), stack("exp"), lambdas=lambdas,
+                             gamma_up=gamma_up, gamma_down=gamma_down, capacity=capacity, scenario_names=[n for n, *_ in rows])
+
+
+def plot_stage(base, scenario, results, frame, name, question, path):
+    """Save the notebook flow plot of one scenario; returns the file path."""
+    import matplotlib.pyplot as plt
+    import utils.plots as plots
+    if frame is None:
+        return None
+    kwargs = dict(duals=_lambdas(results, base["T"], question), price=scenario["price"],
+                  alpha=scenario["price"] + scenario["imp"], beta=scenario["price"] - scenario["exp"],
+                  show=False, save_path=path)
+    # render off-screen, then give the caller (e.g. a notebook running the DAG inline) its backend back
+    backend = plt.get_backend()
+    plt.switch_backend("Agg")
+    try:
+        if question == "1a":
+            fig = plots.plot_hourly_flows_with_prices(frame, name, **kwargs)
+        elif question == "1b":
+            fig = plots.plot_hourly_flows_with_prices_1b(frame, name, L_ref=base["L_ref"], **kwargs)
+        else:
+            fig = plots.plot_hourly_flows_with_prices_1c(frame, name, L_ref=base["L_ref"], **kwargs)
+        plt.close(fig)
+    finally:
+        plt.switch_backend(backend)
+    return str(path)
+
+
+def build_pipeline(question, scenarios=None, data_dir="data", cache_dir="results/cache", plot_dir=None,
+                   builder_kwargs=None, solver_options=None, overrides=None, n_jobs=1):
+    """
+    The notebook workflow of one question as a cached stage DAG (src.runner.pipeline).
+    Every scenario is its own branch (scenario -> model -> solve -> frame -> plot), so
+    branches solve concurrently and changing one scenario's tariff (overrides =
+    {scenario: {"imp": ...}}) or one plot re-runs only that branch and the KPIs.
+    """
+    from src.runner.experiments import SCENARIO_NAMES
+
+    # every module a stage's code runs (including lazy imports of LP_OptimizationProblem);
+    # src.main covers the helpers of kpi_stage and plot_stage (_lambdas, _discomfort_weights)
+    solver_modules = ["utils.classes", "utils.scaling", "utils.tuning", "utils.strategy"]
+    folder, task, _ = QUESTIONS[question]
+    scenarios = scenarios or SCENARIO_NAMES
+    solver_options = {"OutputFlag": 0} if solver_options is None else solver_options
+    pipe = Pipeline(cache_dir, n_jobs=n_jobs)
+    data_path = Path(data_dir) / folder
+    pipe.add("inputs", load_stage, params={"folder": str(data_path)}, files=[data_path],
+             modules=["utils.data"], inline=True)
+    pipe.add("base", base_stage, deps=["inputs"], params={"task": task}, modules=["utils.data"], inline=True)
+    kpi_deps = []
+    for name in scenarios:
+        pipe.add(f"scenario:{name}", scenario_stage, deps=["base"],
+                 params={"name": name, "override": (overrides or {}).get(name)},
+                 modules=["utils.data"], inline=True)
+        pipe.add(f"model:{name}", model_stage, deps=["inputs", "base", f"scenario:{name}"],
+                 params={"question": question, "builder_kwargs": builder_kwargs or {}},
+                 modules=["utils.builders", "utils.assembly", "utils.classes"])
+        pipe.add(f"solve:{name}", solve_stage, deps=[f"model:{name}"],
+                 params={"solver_options": solver_options}, modules=solver_modules)
+        pipe.add(f"frame:{name}", frame_stage, deps=[f"solve:{name}", "base"],
+                 params={"question": question}, modules=["utils.helpers"], inline=True)
+        kpi_deps += [f"scenario:{name}", f"solve:{name}", f"frame:{name}"]
+        if plot_dir is not None:
+            Path(plot_dir).mkdir(parents=True, exist_ok=True)
+            path = Path(plot_dir) / f"{question}_{name.replace(' ', '_')}.png"
+            pipe.add(f"plot:{name}", plot_stage,
+                     deps=["base", f"scenario:{name}", f"solve:{name}", f"frame:{name}"],
+                     params={"name": name, "question": question, "path": str(path)},
+                     modules=["utils.plots", "utils.aggregation", "utils.lazy", "utils.helpers", "src.main"])
+    gamma_up, gamma_down = _discomfort_weights(question, builder_kwargs or {})
+    pipe.add("kpis", kpi_stage, deps=["base"] + kpi_deps,
+             params={"names": list(scenarios), "question": question,
+                     "gamma_up": gamma_up, "gamma_down": gamma_down},
+             modules=["utils.kpis", "src.main"], inline=True)
+    return pipe
+
+
+def main(argv=None):
+    """
+    Run (a shard of) a YAML experiment, e.g. on node 3 of 8:
+        python -m src.main configs/battery_cost_sweep.yaml --shard 3 --num-shards 8
+    Completed cases are checkpointed, so rerunning the same command resumes.
+
+    Or run the cached notebook pipeline of one question:
+        python -m src.main --pipeline 1c --jobs 5 --plots results/plots
+        python -m src.main --pipeline 2b --C-batt 1500
+    """
+    parser = argparse.ArgumentParser(description="Run a config-driven experiment")
+    parser.add_argument("config", nargs="?", help="YAML experiment definition")
+    parser.add_argument("--shard", type=int, default=0, help="index of this shard")
+    parser.add_argument("--num-shards", type=int, default=1, help="total number of shards")
+    parser.add_argument("--list", action="store_true", help="only list this shard's cases")
+    parser.add_argument("--pipeline", choices=sorted(QUESTIONS), help="run the cached stage DAG of a question")
+    parser.add_argument("--scenarios", nargs="+", help="scenario names (default: all)")
+    parser.add_argument("--data-dir", default="data")
+    parser.add_argument("--cache", default="results/cache", help="stage cache directory")
+    parser.add_argument("--plots", help="directory for the per-scenario plots")
+    parser.add_argument("--C-batt", type=float, help="specific battery cost (DKK/kWh), required by --pipeline 2b")
+    parser.add_argument("--jobs", type=int, default=1, help="worker processes for independent stages")
+    parser.add_argument("--force", nargs="+", default=(), help="stages to recompute regardless of the cache")
+    args = parser.parse_args(argv)
+
+    if args.pipeline:
+        builder_kwargs = {}
+        if args.pipeline == "2b":
+            if args.C_batt is None:
+                parser.error("--pipeline 2b requires --C-batt")
+            builder_kwargs["C_batt"] = args.C_batt
+        elif args.C_batt is not None:
+            parser.error("--C-batt only applies to --pipeline 2b")
+        pipe = build_pipeline(args.pipeline, args.scenarios, args.data_dir, args.cache, args.plots,
+                              builder_kwargs=builder_kwargs, n_jobs=args.jobs)
+        outputs = pipe.run(force=args.force)
+        for name, status in pipe.status.items():
+            print(f"{status:9s} {name}" + (f" ({pipe.timings[name]:.2f}s)" if name in pipe.timings else ""))
+        print(outputs["kpis"].to_string())
+        return
+    if args.config is None:
+        parser.error("a config file or --pipeline is required")
+    runner = Runner(args.config, shard_index=args.shard, shard_count=args.num_shards)
+    if args.list:
+        for case in runner.cases:
+            done = "done" if runner.checkpoint.is_done(case["case_id"]) else "todo"
+            print(case["case_id"], done, case["question"], case["scenario"], case["params"])
+        return
+    runner.prepare_data_all_simulations()
+    runner.run_all_simulations()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,6 @@ from pathlib import Path
 import numpy as np
 import pandas as pd
 import gurobipy as gp
-import xarray as xr
 
 from src.data_ops import data_loader
 
@@ -0,0 +1,133 @@
+"""
+Experiment definitions: a YAML file lists questions, scenarios, parameter grids and
+solver options, and expands into a deterministic list of cases.
+
+    name: battery_cost_sweep
+    output_dir: results/battery_cost_sweep
+    questions: ["2b"]
+    scenarios: ["Base", "Spike", "mc"]    # names from utils.data.make_scenarios, or "all",
+                                          # or names of scenario_generators
+    scenario_generators:                  # sampled with utils.scenarios.ScenarioGenerator
+      mc: {seed: 7, count: 20, params: {price_sigma: 0.3, spike_prob: 0.1}}
+    grid:                                 # builder keyword arguments, full product
+      C_batt: {start: 100, stop: 5001, step: 100}
+      gamma_up: [0.8, 1.2]
+    solver: {OutputFlag: 0}
+
+A generator named "mc" expands into scenarios "mc#0" .. "mc#<count - 1>"; sample i
+is the same on every machine (seeded), and its case ids change with the generator
+spec.
+
+Cases are ordered question -> scenario -> grid (keys sorted, last key fastest) and
+carry a stable case_id, so every process expands the same list and shard i of n
+takes cases i, i + n, i + 2n, ...
+"""
+
+import hashlib
+import itertools
+import json
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+SCENARIO_NAMES = ["Base", "Const price", "Net metering", "No export", "Spike"]
+
+
+def load_experiment(path) -> Dict:
+    """Read a YAML experiment definition (yaml is only needed here)."""
+    import yaml
+
+    with open(path) as f:
+        config = yaml.safe_load(f) or {}
+    if not config.get("questions"):
+        raise ValueError(f"{path}: experiment defines no questions")
+    config.setdefault("name", Path(path).stem)
+    return config
+
+
+def expand_values(spec) -> List:
+    """A grid axis: a scalar, a list, or {start, stop, step} (numpy.arange semantics)."""
+    if isinstance(spec, dict):
+        values = np.arange(spec["start"], spec["stop"], spec["step"])
+        # rounding keeps float steps (0.1, ...) identical on every machine
+        return [round(float(v), 10) for v in values]
+    if isinstance(spec, (list, tuple)):
+        return list(spec)
+    return [spec]
+
+
+def case_id(case) -> str:
+    key = json.dumps({k: case[k] for k in ("question", "scenario", "params", "generator") if k in case},
+                     sort_keys=True)
+    return hashlib.sha1(key.encode()).hexdigest()[:16]
+
+
+def expand_cases(config) -> List[Dict]:
+    """Deterministic case list of an experiment definition."""
+    scenarios = config.get("scenarios", "all")
+    if scenarios == "all":
+        scenarios = SCENARIO_NAMES
+    generators = config.get("scenario_generators") or {}
+    grid = config.get("grid") or {}
+    keys = sorted(grid)
+    axes = [expand_values(grid[k]) for k in keys]
+
+    cases = []
+    for question in config["questions"]:
+        for scenario in scenarios:
+            spec = generators.get(scenario)
+            names = [scenario] if spec is None else [f"{scenario}#{i}" for i in range(int(spec["count"]))]
+            for name in names:
+                for values in itertools.product(*axes):
+                    case = {"question": str(question), "scenario": name,
+                            "params": dict(zip(keys, values))}
+                    if spec is not None:
+                        case["generator"] = spec
+                    case["case_id"] = case_id(case)
+                    cases.append(case)
+    return cases
+
+
+def generated_scenarios(base, name, spec):
+    """
+    {"<name>#<i>": (base_i, scenario_i)} of a scenario_generators entry: `count`
+    samples of ScenarioGenerator(base, seed, **params), with the sampled PV and load.
+    """
+    from utils.scenarios import ScenarioGenerator, iter_scenarios
+
+    generator = ScenarioGenerator(base, seed=spec.get("seed", 0), **(spec.get("params") or {}))
+    samples = generator.sample(int(spec["count"]))
+    return {f"{name}#{i}": pair for i, pair in enumerate(iter_scenarios(base, samples))}
+
+
+def shard(cases, index=0, count=1) -> List[Dict]:
+    """Cases of shard `index` out of `count` (round robin, so shards stay balanced)."""
+    if not 0 <= index < count:
+        raise ValueError(f"shard index {index} outside 0..{count - 1}")
+    return cases[index::count]
+
+
+class Checkpoint:
+    """
+    One marker file per completed case in `directory`, written atomically, so
+    independent processes (sharing a file system) can resume and skip finished cases.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, cid):
+        return self.directory / f"{cid}.json"
+
+    def is_done(self, cid) -> bool:
+        return self._path(cid).exists()
+
+    def mark_done(self, case, summary=None) -> None:
+        tmp = self._path(case["case_id"]).with_suffix(".tmp")
+        tmp.write_text(json.dumps({**case, "summary": summary or {}}, default=float))
+        tmp.replace(self._path(case["case_id"]))
+
+    def completed(self) -> List[str]:
+        return sorted(p.stem for p in self.directory.glob("*.json"))
@@ -0,0 +1,226 @@
+"""
+Cached stage DAG. Each stage is a function of its upstream outputs and keyword
+parameters; its fingerprint hashes
+
+    the stage function's source + the source files of the modules it relies on
+    + its parameters + the contents of its input files + the upstream *output* digests
+
+and its output is pickled under <cache_dir>/<stage>/<fingerprint>.pkl. A stage only
+recomputes when its fingerprint has no cached output, and a recomputed stage whose
+output is unchanged does not invalidate anything downstream. Independent stages
+run concurrently in worker processes.
+
+    pipe = Pipeline("results/cache", n_jobs=4)
+    pipe.add("inputs", load, params={"path": "data/question_1c"}, files=["data/question_1c"])
+    pipe.add("base", prepare, deps=["inputs"], modules=["utils.data"])
+    outputs = pipe.run()
+"""
+
+import hashlib
+import importlib.util
+import inspect
+import json
+import multiprocessing as mp
+import pickle
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+
+def _digest_value(value, h):
+    """Feed a parameter value (scalars, arrays, lists, dicts) into a hash, order-independent for dicts."""
+    if isinstance(value, dict):
+        for k in sorted(value, key=str):
+            h.update(repr(k).encode())
+            _digest_value(value[k], h)
+    elif isinstance(value, (list, tuple)):
+        h.update(b"[")
+        for v in value:
+            _digest_value(v, h)
+        h.update(b"]")
+    elif isinstance(value, np.ndarray):
+        h.update(str(value.dtype).encode() + str(value.shape).encode())
+        h.update(np.ascontiguousarray(value).tobytes())
+    else:
+        h.update(repr(value).encode())
+
+
+def _file_digest(path, h):
+    path = Path(path)
+    files = sorted(p for p in path.rglob("*") if p.is_file()) if path.is_dir() else [path]
+    for p in files:
+        h.update(str(p.relative_to(path) if path.is_dir() else p.name).encode())
+        h.update(p.read_bytes())
+
+
+def _module_digest(name, h):
+    spec = importlib.util.find_spec(name)
+    if spec is None or spec.origin is None:
+        raise ValueError(f"module {name!r} not found")
+    h.update(name.encode())
+    h.update(Path(spec.origin).read_bytes())
+
+
+class Stage:
+    """One node of the DAG (see Pipeline.add)."""
+
+    def __init__(self, name, func, deps=(), params=None, modules=(), files=(), inline=False):
+        self.name = name
+        self.func = func
+        self.deps = list(deps)
+        self.params = dict(params or {})
+        self.modules = list(modules)
+        self.files = list(files)
+        self.inline = inline
+
+    def code_digest(self):
+        h = hashlib.sha1()
+        # qualname, not module: the same function is "__main__" or "src.main" depending on entry point
+        h.update(self.func.__qualname__.encode())
+        h.update(inspect.getsource(self.func).encode())
+        for name in sorted(self.modules):
+            _module_digest(name, h)
+        return h.hexdigest()
+
+    def fingerprint(self, upstream_digests):
+        h = hashlib.sha1(self.code_digest().encode())
+        _digest_value(self.params, h)
+        for path in self.files:
+            _file_digest(path, h)
+        for dep in self.deps:
+            h.update(upstream_digests[dep].encode())
+        return h.hexdigest()[:20]
+
+
+def _call(func, args, params):
+    # worker side: run the stage and hand back the pickled output (it is cached anyway)
+    start = time.perf_counter()
+    output = func(*args, **params)
+    return pickle.dumps(output, protocol=pickle.HIGHEST_PROTOCOL), time.perf_counter() - start
+
+
+class Pipeline:
+    """
+    Stage DAG with a fingerprinted on-disk cache. run() returns {stage: output} and
+    records per stage whether it was "cached" or "computed" in self.status.
+    """
+
+    def __init__(self, cache_dir, n_jobs=1):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.n_jobs = n_jobs
+        self.stages: Dict[str, Stage] = {}
+        self.status: Dict[str, str] = {}
+        self.timings: Dict[str, float] = {}
+
+    def add(self, name, func, deps=(), params=None, modules=(), files=(), inline=False):
+        """
+        Register a stage: func(*outputs of deps, **params) -> picklable output.
+        modules: names of modules whose source is part of the stage's code (e.g.
+        "utils.builders"); files: input files or directories whose contents count as
+        input. inline stages (cheap selections) run in the calling process.
+        """
+        if name in self.stages:
+            raise ValueError(f"stage {name!r} already defined")
+        missing = [d for d in deps if d not in self.stages]
+        if missing:
+            raise ValueError(f"stage {name!r} depends on undefined stages {missing}")
+        self.stages[name] = Stage(name, func, deps, params, modules, files, inline)
+        return name
+
+    def upstream(self, targets) -> List[str]:
+        """The targets and everything they depend on, in definition (= topological) order."""
+        needed = set()
+        stack = list(targets)
+        while stack:
+            name = stack.pop()
+            if name not in needed:
+                needed.add(name)
+                stack.extend(self.stages[name].deps)
+        return [name for name in self.stages if name in needed]
+
+    def _paths(self, name, fingerprint):
+        folder = self.cache_dir / name.replace("/", "_").replace(":", "_")
+        return folder / f"{fingerprint}.pkl", folder / f"{fingerprint}.json"
+
+    def _store(self, name, fingerprint, payload, seconds):
+        pkl, meta = self._paths(name, fingerprint)
+        pkl.parent.mkdir(parents=True, exist_ok=True)
+        tmp = pkl.with_suffix(".tmp")
+        tmp.write_bytes(payload)
+        tmp.replace(pkl)
+        digest = hashlib.sha1(payload).hexdigest()
+        meta.write_text(json.dumps({"stage": name, "output": digest, "seconds": seconds}))
+        return digest
+
+    def run(self, targets=None, force=()) -> Dict:
+        """
+        Bring `targets` (default: all stages) up to date. force: stage names to
+        recompute regardless of the cache.
+        """
+        order = self.upstream(targets or list(self.stages))
+        digests, outputs = {}, {}
+        pending = list(order)
+        running = {}
+        pool = None
+        if self.n_jobs > 1:
+            pool = ProcessPoolExecutor(max_workers=self.n_jobs, mp_context=mp.get_context("spawn"))
+        try:
+            while pending or running:
+                for name in [n for n in pending if all(d in digests for d in self.stages[n].deps)]:
+                    pending.remove(name)
+                    stage = self.stages[name]
+                    fingerprint = stage.fingerprint(digests)
+                    pkl, meta = self._paths(name, fingerprint)
+                    if name not in force and pkl.exists() and meta.exists():
+                        digests[name] = json.loads(meta.read_text())["output"]
+                        outputs[name] = pickle.loads(pkl.read_bytes())
+                        self.status[name] = "cached"
+                        continue
+                    args = [outputs[d] for d in stage.deps]
+                    if pool is None or stage.inline:
+                        payload, seconds = _call(stage.func, args, stage.params)
+                        self._finish(name, fingerprint, payload, seconds, digests, outputs)
+                    else:
+                        running[pool.submit(_call, stage.func, args, stage.params)] = (name, fingerprint)
+                if not running:
+                    if pending and not any(all(d in digests for d in self.stages[n].deps) for n in pending):
+                        raise RuntimeError(f"stages {pending} cannot be scheduled")
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, fingerprint = running.pop(future)
+                    payload, seconds = future.result()
+                    self._finish(name, fingerprint, payload, seconds, digests, outputs)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+        return outputs
+
+    def _finish(self, name, fingerprint, payload, seconds, digests, outputs):
+        digests[name] = self._store(name, fingerprint, payload, seconds)
+        outputs[name] = pickle.loads(payload)
+        self.status[name] = "computed"
+        self.timings[name] = seconds
+
+    def clear(self, keep_latest=True):
+        """Delete cached outputs; with keep_latest, only those no current stage points at."""
+        current = set()
+        if keep_latest:
+            # fingerprints of the current definitions, resolved through the cache
+            digests = {}
+            for name in self.stages:
+                stage = self.stages[name]
+                if not all(d in digests for d in stage.deps):
+                    continue
+                fingerprint = stage.fingerprint(digests)
+                pkl, meta = self._paths(name, fingerprint)
+                if meta.exists():
+                    digests[name] = json.loads(meta.read_text())["output"]
+                    current.update((pkl, meta))
+        for path in self.cache_dir.glob("*/*"):
+            if path not in current:
+                path.unlink()
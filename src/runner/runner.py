@@ -1,43 +1,155 @@
 from pathlib import Path
 from typing import Dict, List
 
+from src.runner.experiments import Checkpoint, expand_cases, generated_scenarios, load_experiment, shard
+
+# question -> (data folder, prepare_base_inputs task, builder in utils.builders)
+QUESTIONS = {
+    "1a": ("question_1a", "a", "build_input_data_1a"),
+    "1b": ("question_1b", "b", "build_input_data_1b"),
+    "1c": ("question_1c", "c", "build_input_data_1c"),
+    "2b": ("question_1c", "c", "build_input_data_2b"),
+}
+
 
 class Runner:
     """
     Handles configuration setting, data loading and preparation, model(s) execution, results saving and ploting
     """
 
-    def __init__(self) -> None:
-        """Initialize the Runner."""
+    def __init__(self, config_path=None, shard_index: int = 0, shard_count: int = 1) -> None:
+        """
+        Initialize the Runner for a YAML experiment definition (see src.runner.experiments).
+        shard_index/shard_count select this process's share of the case list.
+        """
+        self.config_path = config_path
+        self.shard_index = shard_index
+        self.shard_count = shard_count
+        self.data: Dict[str, Dict] = {}
+        if config_path is not None:
+            self._load_config()
+            self._create_directories()
 
     def _load_config(self) -> None:
-        """Load configuration (placeholder method)"""
-    # Extract simulation configuration and hyperparameter values (e.g. question, scenarios for sensitivity analysis, duration of simulation, solver name, etc.) and store them as class attributes (e.g. self.scenario_list, self.solver_name, etc.)
-    
+        """Load the experiment definition and expand this shard's cases."""
+        self.config = load_experiment(self.config_path)
+        self.experiment_name = self.config["name"]
+        self.question_list: List[str] = [str(q) for q in self.config["questions"]]
+        unknown = set(self.question_list) - set(QUESTIONS)
+        if unknown:
+            raise ValueError(f"unknown questions {sorted(unknown)}, expected some of {sorted(QUESTIONS)}")
+        self.solver_options = self.config.get("solver") or {}
+        self.data_dir = Path(self.config.get("data_dir", "data"))
+        self.output_dir = Path(self.config.get("output_dir", Path("results") / self.experiment_name))
+        self.date = self.config.get("date")
+        # directory of tuned Gurobi parameter files (utils.tuning.ParamCache), optional
+        self.tuned_params_dir = self.config.get("tuned_params")
+        # directory of recorded solve runtimes for the LP algorithm choice (utils.strategy), optional
+        self.solver_history_dir = self.config.get("solver_history")
+        self.all_cases = expand_cases(self.config)
+        self.cases = shard(self.all_cases, self.shard_index, self.shard_count)
+
     def _create_directories(self) -> None:
-        """Create required directories for each simulation configuration. (placeholder method)"""
+        """Create the result store and checkpoint directories of the experiment."""
+        self.results_dir = self.output_dir / "store"
+        self.results_dir.mkdir(parents=True, exist_ok=True)
+        self.checkpoint = Checkpoint(self.output_dir / "checkpoints")
 
     def prepare_data_single_simulation(self, question_name) -> None:
-        """Prepare input data for a single simulation (placeholder method)"""
-        # Prepare input data using DataProcessor for a given simulation configuration and store it as class attributes (e.g. self.data)
+        """
+        Load and prepare base inputs and price scenarios for one question, including
+        the samples of the experiment's scenario generators (with their own PV and load).
+        """
+        import utils.data as data
+
+        folder, task, _ = QUESTIONS[question_name]
+        appliance_params, bus_params, _, der_prod, usage_pref = data.load_inputs(self.data_dir / folder)
+        base = data.prepare_base_inputs(appliance_params, bus_params, der_prod, usage_pref, task=task)
+        scenarios, bases = data.make_scenarios(base), {}
+        for name, spec in (getattr(self, "config", {}).get("scenario_generators") or {}).items():
+            for key, (sample_base, scenario) in generated_scenarios(base, name, spec).items():
+                bases[key], scenarios[key] = sample_base, scenario
+        self.data[question_name] = dict(base=base, scenarios=scenarios, bases=bases,
+                                        appliance_params=appliance_params)
 
     def prepare_data_all_simulations(self) -> None:
-        """Prepare input data for multiple scenarios/sensitivity analysis/questions (placeholder method)"""
-        # Extend data_loader to handle multiple scenarios/questions
-        # Prepare data using data_loader for multiple scenarios/questions
-        
-    def run_single_simulation(self,Args) -> None:
+        """Prepare input data for every question of the experiment."""
+        for question in self.question_list:
+            if question not in self.data:
+                self.prepare_data_single_simulation(question)
+
+    def run_single_simulation(self, case):
+        """
+        Build and solve one case ({"question", "scenario", "params"}); returns the
+        solved LP_OptimizationProblem. For 2b, r_ch/r_dis default to the storage ratios.
         """
-        Run a single simulation for a given question and simulation path (placeholder method).
+        import utils.builders as builders
+        import utils.classes as classes
 
-        Args (examples):
-            question: The question name for the simulation
-            simulation_path: The path to the simulation data
+        question = case["question"]
+        if question not in self.data:
+            self.prepare_data_single_simulation(question)
+        inputs = self.data[question]
+        kwargs = dict(case["params"])
+        if question == "2b":
+            storage = inputs["appliance_params"]["storage"][0]
+            kwargs.setdefault("r_ch", storage["max_charging_power_ratio"])
+            kwargs.setdefault("r_dis", storage["max_discharging_power_ratio"])
+
+        builder = getattr(builders, QUESTIONS[question][2])
+        base = inputs["bases"].get(case["scenario"], inputs["base"])
+        input_data = builder(base, inputs["scenarios"][case["scenario"]], **kwargs)
+        param_cache = None
+        if self.tuned_params_dir:
+            from utils.tuning import ParamCache
+            param_cache = ParamCache(self.tuned_params_dir)
+        strategy = None
+        if self.solver_history_dir:
+            from utils.strategy import SolverStrategy
+            strategy = SolverStrategy(self.solver_history_dir)
+        problem = classes.LP_OptimizationProblem(input_data, params=self.solver_options, param_cache=param_cache,
+                                                 strategy=strategy)
+        problem.run()
+        return problem
 
-        """
-        # Initialize Optimization Model for the given question and simulation path
-        # Run the model
-        pass
     def run_all_simulations(self) -> None:
-        """Run all simulations for the configured scenarios (placeholder method)."""
-        pass
\ No newline at end of file
+        """
+        Run this shard's cases, skipping those already checkpointed, and append each
+        result to the experiment's result store before marking it done. A case that
+        is stored but not checkpointed (a crash in between) is only marked done, so
+        resuming never stores a run twice. Unsuccessful solves (infeasible, or stopped
+        without a solution) are neither stored nor checkpointed, so a resume retries
+        them; they are listed at the end.
+        """
+        from src.utils.result_store import ResultStore, record_from_problem
+
+        store = ResultStore(self.results_dir)
+        pending = [c for c in self.cases if not self.checkpoint.is_done(c["case_id"])]
+        print(f"{self.experiment_name}: shard {self.shard_index}/{self.shard_count}, "
+              f"{len(pending)} of {len(self.cases)} cases to run")
+        stored = store.run_ids() & {c["case_id"] for c in pending}
+        if stored:
+            runs = store.query("runs", columns=["run_id", "objective", "telemetry_status"],
+                               filters=[("run_id", "in", sorted(stored))])
+            runs = runs.drop_duplicates("run_id").set_index("run_id")
+        failed = []
+        for case in pending:
+            if case["case_id"] in stored:
+                run = runs.loc[case["case_id"]]
+                self.checkpoint.mark_done(case, {"objective": run["objective"],
+                                                 "status": run["telemetry_status"]})
+                continue
+            problem = self.run_single_simulation(case)
+            if getattr(problem.results, "objective_value", None) is None:
+                failed.append((case["case_id"], int(problem.model.Status)))
+                continue
+            record = record_from_problem(problem, self.data[case["question"]]["base"]["T"],
+                                         case["question"], case["scenario"], date=self.date,
+                                         metadata={"experiment": self.experiment_name, **case})
+            record["run_id"] = case["case_id"]
+            store.append(record)
+            self.checkpoint.mark_done(case, {"objective": record["objective"],
+                                             "status": record["telemetry"]["status"]})
+        if failed:
+            print(f"{len(failed)} cases not solved (rerun to retry): "
+                  + ", ".join(f"{cid} (status {status})" for cid, status in failed))
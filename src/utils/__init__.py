@@ -1 +1,9 @@
-from .utils import load_dataset, save_model_results, plot_data
\ No newline at end of file
+from .utils import load_dataset, save_model_results, plot_data
+
+
+# the result store needs pyarrow, so it is only imported on first access (PEP 562)
+def __getattr__(name):
+    if name in ("ResultStore", "record_from_problem"):
+        from . import result_store
+        return getattr(result_store, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,72 @@
+"""
+Import-time benchmark for the solver-only path.
+
+Each module is imported in a fresh interpreter (cold start), timing the import and
+listing which heavy optional packages were loaded as a side effect.
+
+Run from the repository root:
+    python -m src.utils.import_benchmark
+    python -m src.utils.import_benchmark utils.plots --repeat 5
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+SOLVER_PATH_MODULES = [
+    "utils.data",
+    "utils.classes",
+    "utils.builders",
+    "utils.helpers",
+    "utils.kpis",
+    "utils.sensitivity",
+    "utils.plots",
+    "src.data_ops",
+    "src.opt_model",
+    "src.runner",
+]
+
+HEAVY_MODULES = ["matplotlib", "seaborn", "plotly", "xarray", "yaml"]
+
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+import {module}
+dt = time.perf_counter() - t0
+print(json.dumps({{"seconds": dt, "loaded": [m for m in {heavy!r} if m in sys.modules]}}))
+"""
+
+
+def time_import(module, repeat=3, cwd=None):
+    """Best-of-`repeat` cold import time of `module` and the heavy modules it loaded."""
+    cwd = cwd or Path(__file__).resolve().parents[2]
+    best, loaded = float("inf"), []
+    for _ in range(repeat):
+        out = subprocess.run([sys.executable, "-c", _PROBE.format(module=module, heavy=HEAVY_MODULES)],
+                             cwd=cwd, capture_output=True, text=True)
+        if out.returncode != 0:
+            return {"module": module, "seconds": float("nan"),
+                    "loaded": [], "error": out.stderr.strip().splitlines()[-1]}
+        res = json.loads(out.stdout.strip().splitlines()[-1])
+        best = min(best, res["seconds"])
+        loaded = res["loaded"]
+    return {"module": module, "seconds": best, "loaded": loaded, "error": ""}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=SOLVER_PATH_MODULES)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args(argv)
+
+    print(f"{'module':<22}{'import [ms]':>12}  heavy modules loaded")
+    for module in args.modules:
+        res = time_import(module, repeat=args.repeat)
+        extra = res["error"] or (", ".join(res["loaded"]) or "-")
+        print(f"{module:<22}{1000 * res['seconds']:>12.1f}  {extra}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+"""
+Append-only result store on partitioned Parquet.
+
+Every solved household-day is one record, written to four tables under `root`:
+
+    runs    one row per run: objective, status, solver telemetry, metadata (JSON)
+    primal  one row per (run, consumer, t) with one column per variable family
+    duals   one row per (run, consumer, constraint row) with the dual price
+    kpis    one row per (run, consumer) with the KPI columns
+
+Tables are hive-partitioned by question / scenario / date, and each append writes
+new files only, so parallel workers can share a store. The runs table is written
+last, so a run listed there is complete (see run_ids). Queries read only the
+requested columns and the partitions selected by the filter (predicate pushdown).
+
+    store = ResultStore("results")
+    store.append(record_from_problem(problem, 24, question="1c", scenario="Spike"))
+    store.query("kpis", columns=["run_id", "cash_cost"], filters=[("scenario", "=", "Spike")])
+"""
+
+import json
+import time
+import uuid
+from datetime import date as _date
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+TABLES = ("runs", "primal", "duals", "kpis")
+PARTITION_COLUMNS = ("question", "scenario", "date")
+PARTITIONING = ds.partitioning(pa.schema([(c, pa.string()) for c in PARTITION_COLUMNS]), flavor="hive")
+
+
+def record_from_problem(problem, T, question, scenario, date=None, consumer="C1",
+                        kpis=None, metadata=None):
+    """
+    Build a store record from a solved LP_OptimizationProblem: primal schedules
+    (results_to_dataframe), duals in constraint order, and solver telemetry.
+    Unsuccessful solves keep the telemetry only (objective NaN).
+    """
+    from utils.helpers import results_to_dataframe
+
+    model = problem.model
+    results = problem.results
+    telemetry = {
+        "status": int(model.Status),
+        "runtime_s": float(model.Runtime),
+        "iterations": float(model.IterCount),
+        "num_vars": int(model.NumVars),
+        "num_constrs": int(model.NumConstrs),
+        "is_mip": bool(model.IsMIP),
+    }
+    record = {
+        "question": question,
+        "scenario": scenario,
+        "date": date,
+        "consumer": consumer,
+        "objective": getattr(results, "objective_value", np.nan),
+        "kpis": kpis,
+        "telemetry": telemetry,
+        "metadata": metadata,
+    }
+    if hasattr(results, "variables"):
+        # time-indexed variables go to the primal table, scalars (e.g. E_cap) to the telemetry columns
+        indexed = {v: x for v, x in results.variables.items() if "[" in v}
+        telemetry.update({f"var_{v}": x for v, x in results.variables.items() if "[" not in v})
+        record["primal"] = results_to_dataframe(type("Results", (), {"variables": indexed})(), T)
+        record["duals"] = list(results.duals.values())
+    return record
+
+
+class ResultStore:
+    """Partitioned Parquet store for solved runs (see module docstring)."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+
+    def _path(self, table):
+        if table not in TABLES:
+            raise ValueError(f"unknown table {table!r}, expected one of {TABLES}")
+        return self.root / table
+
+    # --- writing -------------------------------------------------------------
+
+    def append(self, records):
+        """
+        Append one record (dict) or a list of records; returns the run ids.
+
+        Record keys: question, scenario, date (default today), consumer, objective,
+        primal (DataFrame indexed by t, or {name: array}), duals (array-like),
+        kpis ({name: value}), telemetry ({name: scalar}), metadata (JSON-serialisable),
+        run_id (default: random). Many records per call give fewer, larger files.
+        """
+        if isinstance(records, dict):
+            records = [records]
+        runs, primal, duals, kpis = [], [], [], []
+        created = time.time()
+        for rec in records:
+            run_id = rec.get("run_id") or uuid.uuid4().hex
+            keys = {
+                "run_id": run_id,
+                "question": str(rec["question"]),
+                "scenario": str(rec["scenario"]),
+                "date": str(rec.get("date") or _date.today().isoformat()),
+                "consumer": str(rec.get("consumer", "C1")),
+            }
+            runs.append({**keys, "objective": rec.get("objective", np.nan), "created_at": created,
+                         **{f"telemetry_{k}": v for k, v in (rec.get("telemetry") or {}).items()},
+                         "metadata": json.dumps(rec.get("metadata") or {}, default=str)})
+
+            if rec.get("primal") is not None:
+                df = pd.DataFrame(rec["primal"]).reset_index(drop=True)
+                df.insert(0, "t", np.arange(len(df)))
+                for k, v in reversed(keys.items()):
+                    df.insert(0, k, v)
+                primal.append(df)
+            if rec.get("duals") is not None:
+                pi = np.asarray(rec["duals"], dtype=float)
+                duals.append(pd.DataFrame({**keys, "row": np.arange(len(pi)), "pi": pi}))
+            if rec.get("kpis") is not None:
+                kpis.append({**keys, **rec["kpis"]})
+
+        if primal:
+            self._write("primal", pd.concat(primal, ignore_index=True))
+        if duals:
+            self._write("duals", pd.concat(duals, ignore_index=True))
+        if kpis:
+            self._write("kpis", pd.DataFrame(kpis))
+        # last: a run in the runs table has all its rows written
+        self._write("runs", pd.DataFrame(runs))
+        return [r["run_id"] for r in runs]
+
+    def _write(self, table, df):
+        ds.write_dataset(pa.Table.from_pandas(df, preserve_index=False), self._path(table),
+                         format="parquet", partitioning=PARTITIONING,
+                         basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+                         existing_data_behavior="overwrite_or_ignore")
+
+    # --- reading -------------------------------------------------------------
+
+    def dataset(self, table, filters=None):
+        """
+        pyarrow Dataset of `table`, with the schema unified over the files selected by
+        `filters` (runs of different questions may carry different variable columns).
+        """
+        path = self._path(table)
+        if not path.exists():
+            raise FileNotFoundError(f"no {table!r} data in {self.root}")
+        dataset = ds.dataset(path, format="parquet", partitioning=PARTITIONING)
+        fragments = list(dataset.get_fragments(filter=self._expression(filters)))
+        schema = pa.unify_schemas([dataset.schema] + [f.physical_schema for f in fragments])
+        return ds.dataset([f.path for f in fragments], schema=schema, format="parquet",
+                          partitioning=PARTITIONING, partition_base_dir=str(path))
+
+    @staticmethod
+    def _expression(filters):
+        """filters: a pyarrow expression or DNF tuples, e.g. [("scenario", "in", ["Base", "Spike"])]."""
+        if filters is None or isinstance(filters, ds.Expression):
+            return filters
+        return pq.filters_to_expression(filters)
+
+    def query(self, table, columns=None, filters=None):
+        """Read the selected columns of the matching rows into a DataFrame."""
+        expr = self._expression(filters)
+        return self.dataset(table, expr).to_table(columns=columns, filter=expr).to_pandas()
+
+    def run_ids(self, filters=None):
+        """Ids of the complete runs (optionally filtered), e.g. to skip cases already stored."""
+        if not self._path("runs").exists():
+            return set()
+        return set(self.query("runs", columns=["run_id"], filters=filters)["run_id"])
+
+    def scan(self, table, columns=None, filters=None, batch_size=131072):
+        """Iterate over the matching rows as DataFrames of at most batch_size rows (out-of-core)."""
+        expr = self._expression(filters)
+        for batch in self.dataset(table, expr).to_batches(columns=columns, filter=expr, batch_size=batch_size):
+            if batch.num_rows:
+                yield batch.to_pandas()
@@ -29,10 +29,12 @@ def load_dataset(question_name):
  
     return result
 
-# example function to save model results in a specified directory
-def save_model_results():
-    """Placeholder for save_model_results function."""
-    pass
+# save model results (records from result_store.record_from_problem) in a specified directory
+def save_model_results(records, results_dir="../results"):
+    """Append result records to the partitioned Parquet store in results_dir; returns the run ids."""
+    from .result_store import ResultStore
+
+    return ResultStore(results_dir).append(records)
 
 # example function to plot data from a specified directory
 def plot_data():
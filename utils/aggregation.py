@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+_REDUCERS = {"sum": np.add, "min": np.minimum, "max": np.maximum}
+
+
+def period_starts(T, freq="D", start="2025-01-01", step="h"):
+    """
+    Start indices and labels of calendar periods ("D", "W", "M") for a series of
+    T steps of length `step` beginning at `start`.
+    """
+    index = pd.date_range(start, periods=T, freq=step)
+    codes = index.to_period(freq).asi8
+    starts = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    return starts, index[starts]
+
+
+def rollup(values, freq="D", how="sum", start="2025-01-01", step="h"):
+    """
+    Aggregate the last (time) axis of `values` into calendar periods with one
+    np.ufunc.reduceat call. how: "sum", "mean", "min" or "max".
+    Returns (aggregated array (..., n_periods), period labels).
+    """
+    values = np.asarray(values, dtype=float)
+    starts, labels = period_starts(values.shape[-1], freq, start, step)
+    if how == "mean":
+        sums = np.add.reduceat(values, starts, axis=-1)
+        counts = np.diff(np.r_[starts, values.shape[-1]])
+        return sums / counts, labels
+    return _REDUCERS[how].reduceat(values, starts, axis=-1), labels
+
+
+def percentile_bands(values, q=(5, 50, 95), axis=0):
+    """Percentiles across consumers/scenarios (default axis 0) -> array (len(q), ...)."""
+    return np.nanpercentile(np.asarray(values, dtype=float), q, axis=axis)
+
+
+def minmax_downsample(y, n_buckets):
+    """
+    Downsample a 1-D series to at most 2 * n_buckets points, keeping the minimum and
+    maximum of each bucket in time order so spikes of λ or SOC stay visible.
+    Returns (x indices, y values).
+    """
+    y = np.asarray(y, dtype=float)
+    T = len(y)
+    if T <= 2 * n_buckets:
+        return np.arange(T), y
+    size = int(np.ceil(T / n_buckets))
+    n = int(np.ceil(T / size))
+    padded = np.full(n * size, np.nan)
+    padded[:T] = y
+    blocks = padded.reshape(n, size)
+    offsets = np.arange(n)[:, None] * size
+    i_min = np.nanargmin(blocks, axis=1)[:, None]
+    i_max = np.nanargmax(blocks, axis=1)[:, None]
+    idx = np.sort(np.hstack([i_min, i_max]), axis=1) + offsets
+    idx = np.unique(idx.ravel())
+    return idx, y[idx]
@@ -0,0 +1,133 @@
+import numpy as np
+import scipy.sparse as sp
+
+import utils.classes as classes
+
+
+class SparseModelBuilder:
+    """
+    Vectorized alternative to the dense dict-of-lists InputData: variables are added as
+    time-indexed families (one column index array per family) and constraints as blocks
+    of rows given by COO triplets, so a block costs O(T) instead of O(T * V).
+
+    to_input_data() returns an InputData whose constraints_coeff is a scipy.sparse CSR
+    matrix (rows x VARIABLES), which LP_OptimizationProblem builds with addMConstr.
+    """
+
+    def __init__(self):
+        self.VARIABLES = []
+        self.cols = {}               # family name -> column indices
+        self.labels = {}             # component family name -> component ids
+        self.obj = []                # objective coefficient per column
+        self.variable_types = {}
+        self._rows, self._cols, self._vals = [], [], []
+        self.rhs = []
+        self.sense = []
+        self.n_rows = 0
+
+    def add_family(self, name, n, obj=0.0, vtype=None):
+        """Add variables name[0..n-1]; returns their column indices."""
+        cols = len(self.VARIABLES) + np.arange(n)
+        names = [f"{name}[{t}]" for t in range(n)]
+        self.VARIABLES += names
+        self.obj += list(np.broadcast_to(np.asarray(obj, dtype=float), (n,)))
+        if vtype is not None:
+            self.variable_types.update({v: vtype for v in names})
+        self.cols[name] = cols
+        return cols
+
+    def add_components(self, name, labels, T, obj=0.0, vtype=None):
+        """
+        Add variables name[label,t] for every component label and t < T.
+        obj: scalar, (T,) or (len(labels), T). Returns the column indices, shape (len(labels), T).
+        """
+        n = len(labels)
+        cols = len(self.VARIABLES) + np.arange(n * T).reshape(n, T)
+        names = [f"{name}[{label},{t}]" for label in labels for t in range(T)]
+        self.VARIABLES += names
+        self.obj += list(np.broadcast_to(np.asarray(obj, dtype=float), (n, T)).ravel())
+        if vtype is not None:
+            self.variable_types.update({v: vtype for v in names})
+        self.cols[name] = cols
+        self.labels[name] = list(labels)
+        return cols
+
+    def add_scalar(self, name, obj=0.0):
+        """Add one non-indexed variable (e.g. "E_cap"); returns its column index."""
+        col = len(self.VARIABLES)
+        self.VARIABLES.append(name)
+        self.obj.append(float(obj))
+        self.cols[name] = np.array([col])
+        return col
+
+    def set_obj(self, name, obj):
+        """Overwrite the objective coefficients of a family."""
+        for c, value in zip(self.cols[name], np.broadcast_to(np.asarray(obj, dtype=float), self.cols[name].shape)):
+            self.obj[c] = float(value)
+
+    def add_rows(self, n, terms, sense, rhs):
+        """
+        Append n rows. terms: list of (cols, coeffs) with one entry per row each; cols
+        may be an int (same column in every row) or an (n, k) array for k entries per
+        row (e.g. a sum over components). Entries with col < 0 or a zero coefficient
+        are dropped. sense/rhs: scalar or length-n. Returns the row indices.
+        """
+        rows = self.n_rows + np.arange(n)
+        self.add_to_rows(rows, terms)
+        self.rhs += list(np.broadcast_to(np.asarray(rhs, dtype=float), (n,)))
+        self.sense += list(np.broadcast_to(np.asarray(sense), (n,)))
+        self.n_rows += n
+        return rows
+
+    def add_to_rows(self, rows, terms):
+        """
+        Add terms (as in add_rows) to existing rows, e.g. a new component's consumption
+        in the bus balance rows of an assembled model.
+        """
+        rows = np.asarray(rows)
+        n = len(rows)
+        for cols, coeffs in terms:
+            cols = np.asarray(cols)
+            coeffs = np.asarray(coeffs, dtype=float)
+            width = cols.shape[1] if cols.ndim == 2 else (coeffs.shape[1] if coeffs.ndim == 2 else 1)
+            cols = np.broadcast_to(cols[:, None] if cols.ndim == 1 else cols, (n, width))
+            coeffs = np.broadcast_to(coeffs[:, None] if coeffs.ndim == 1 else coeffs, (n, width))
+            keep = (cols >= 0) & (coeffs != 0)
+            self._rows.append(np.broadcast_to(rows[:, None], (n, width))[keep])
+            self._cols.append(cols[keep])
+            self._vals.append(coeffs[keep])
+
+    def add_matrix_rows(self, A, cols, sense, rhs):
+        """
+        Append the rows of a sparse matrix A (n x k) whose k columns are the model
+        columns `cols`, e.g. a banded state-space block over the time axis.
+        Returns the row indices.
+        """
+        A = sp.coo_matrix(A)
+        cols = np.asarray(cols).ravel()
+        n = A.shape[0]
+        rows = self.n_rows + np.arange(n)
+        keep = A.data != 0
+        self._rows.append(rows[A.row[keep]])
+        self._cols.append(cols[A.col[keep]])
+        self._vals.append(A.data[keep])
+        self.rhs += list(np.broadcast_to(np.asarray(rhs, dtype=float), (n,)))
+        self.sense += list(np.broadcast_to(np.asarray(sense), (n,)))
+        self.n_rows += n
+        return rows
+
+    def matrix(self):
+        rows = np.concatenate(self._rows) if self._rows else np.zeros(0, dtype=int)
+        cols = np.concatenate(self._cols) if self._cols else np.zeros(0, dtype=int)
+        vals = np.concatenate(self._vals) if self._vals else np.zeros(0)
+        return sp.csr_matrix((vals, (rows, cols)), shape=(self.n_rows, len(self.VARIABLES)))
+
+    def to_input_data(self):
+        return classes.InputData(list(self.VARIABLES), dict(zip(self.VARIABLES, self.obj)),
+                                 self.matrix(), list(self.rhs), list(self.sense),
+                                 variable_types=dict(self.variable_types))
+
+
+def interleave(*arrays):
+    """interleave([a0, a1], [b0, b1]) -> [a0, b0, a1, b1] (row order of the dense builders)."""
+    return np.column_stack([np.broadcast_to(a, np.shape(arrays[0])) for a in arrays]).ravel()
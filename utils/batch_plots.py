@@ -0,0 +1,181 @@
+import multiprocessing as mp
+import re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+
+import utils.plots as plots
+from utils.lazy import LazyModule
+
+mpl = LazyModule("matplotlib")
+mpl_figure = LazyModule("matplotlib.figure")
+
+BAR_WIDTH = 0.25
+BAR_ALPHA = 0.85
+
+# (key, column, x-offset, label, color); bars of one offset are stacked in this order
+BAR_LAYOUT = [
+    ("pv_self", "p", -BAR_WIDTH, "PV to bus", "gold"),
+    ("pv_export", "s", -BAR_WIDTH, "PV exported", "forestgreen"),
+    ("pv_curtail", "c", -BAR_WIDTH, "PV curtailed", "lightgray"),
+    ("load", "l", 0.0, "Load", "royalblue"),
+    ("dev_up", "d+", 0.0, "Upward deviation", "cyan"),
+    ("dev_down", "d-", 0.0, "Downward deviation", "magenta"),
+    ("b_ch", "b_ch", 0.0, "Battery charge", "deepskyblue"),
+    ("imports", "e", BAR_WIDTH, "Grid imports", "firebrick"),
+    ("b_dis", "b_dis", BAR_WIDTH, "Battery discharge", "orange"),
+]
+
+
+class HourlyFlowRenderer:
+    """
+    Headless version of plot_hourly_flows_with_prices_1c that builds its artists once
+    and only updates bar heights/bottoms and line data per frame.
+
+    Uses a bare matplotlib Figure (no pyplot), so it renders with Agg regardless of the
+    active backend and never registers figures with pyplot. Missing columns (e.g. no
+    battery in 1a/1b results) are drawn as zero-height bars.
+    """
+
+    def __init__(self, T, ylim=(0, 6.5), figsize=(14, 6)):
+        self.T = T
+        hours = np.arange(T)
+        zeros = np.zeros(T)
+        with mpl.rc_context(plots.PLOT_STYLE):
+            self.fig = mpl_figure.Figure(figsize=figsize)
+            ax1 = self.fig.subplots()
+            self.bars = {}
+            for key, _, offset, label, color in BAR_LAYOUT:
+                self.bars[key] = ax1.bar(hours + offset, zeros, BAR_WIDTH,
+                                         label=label, color=color, alpha=BAR_ALPHA)
+            self.bars["pv_frame"] = ax1.bar(hours - BAR_WIDTH, zeros, BAR_WIDTH,
+                                            fill=False, edgecolor="black", linewidth=0.5,
+                                            label="Total PV generation")
+            self.l_ref_line, = ax1.plot(hours, zeros, color="darkorange", linestyle="-",
+                                        drawstyle="steps-mid", linewidth=2.5, label="Reference Load")
+            self.soc_line, = ax1.plot(hours, zeros, color="black", linestyle="--",
+                                      linewidth=2, label="Battery SOC (kWh)")
+
+            ax1.set_xlabel("Hour of day")
+            ax1.set_ylabel("Energy (kWh)")
+            ax1.set_ylim(ylim)
+            ax1.set_xlim(-0.5, T - 0.5)
+            ax1.set_xticks(range(T))
+            ax1.grid(True, which="both", axis="y", linestyle="--", alpha=0.6)
+
+            ax2 = ax1.twinx()
+            self.lambda_line, = ax2.plot(hours, zeros, marker="x", linestyle="--",
+                                         color="purple", linewidth=2, label="Internal price (−λ)")
+            self.price_line, = ax2.plot(hours, zeros, marker="o", linestyle=":",
+                                        color="dimgray", linewidth=2, label="Market price π")
+            ax2.set_ylabel("Price (DKK/kWh)")
+
+            lines1, labels1 = ax1.get_legend_handles_labels()
+            lines2, labels2 = ax2.get_legend_handles_labels()
+            ax1.legend(lines1 + lines2, labels1 + labels2,
+                       loc="upper center", bbox_to_anchor=(0.5, -0.18),
+                       ncol=5, frameon=False)
+            self.fig.tight_layout()
+        self.ax1, self.ax2 = ax1, ax2
+
+    @staticmethod
+    def _set_bars(container, heights, bottoms):
+        for rect, h, b in zip(container, heights, bottoms):
+            rect.set_height(h)
+            rect.set_y(b)
+
+    def update(self, df, title, duals=None, price=None, L_ref=None):
+        """Redraw the frame for one result DataFrame (columns as in results_to_dataframe)."""
+        zeros = np.zeros(self.T)
+        col = {c: (df[c].to_numpy(dtype=float) if c in df else zeros)
+               for _, c, _, _, _ in BAR_LAYOUT}
+        bottoms = {}
+        for key, c, offset, _, _ in BAR_LAYOUT:
+            bottom = bottoms.get(offset, zeros)
+            self._set_bars(self.bars[key], col[c], bottom)
+            bottoms[offset] = bottom + col[c]
+        self._set_bars(self.bars["pv_frame"], bottoms[-BAR_WIDTH], zeros)
+
+        for line, values in [(self.l_ref_line, L_ref),
+                             (self.soc_line, df["soc"] if "soc" in df else None),
+                             (self.lambda_line, None if duals is None else -np.asarray(duals)),
+                             (self.price_line, price)]:
+            line.set_visible(values is not None)
+            if values is not None:
+                line.set_ydata(np.asarray(values, dtype=float))
+        self.ax2.relim(visible_only=True)
+        self.ax2.autoscale_view()
+        self.ax1.set_title(f"Energy flows and prices – {title}")
+        return self.fig
+
+    def save(self, path, dpi=None):
+        self.fig.savefig(path, dpi=dpi)
+        return str(path)
+
+
+def _frame_path(frame, out_dir, fmt):
+    name = frame.get("filename") or re.sub(r"[^A-Za-z0-9_.-]+", "_", str(frame["title"]))
+    return Path(out_dir) / f"{name}.{fmt}"
+
+
+def _render_frames(frames, out_dir, fmt, dpi, ylim):
+    """Worker: render a chunk of frames, reusing one renderer per horizon length."""
+    renderers = {}
+    paths = []
+    for frame in frames:
+        T = len(frame["df"])
+        if T not in renderers:
+            renderers[T] = HourlyFlowRenderer(T, ylim=ylim)
+        renderer = renderers[T]
+        renderer.update(frame["df"], frame["title"], duals=frame.get("duals"),
+                        price=frame.get("price"), L_ref=frame.get("L_ref"))
+        paths.append(renderer.save(_frame_path(frame, out_dir, fmt), dpi=dpi))
+    return paths
+
+
+def render_flow_frames(frames, out_dir, fmt="png", n_jobs=1, chunksize=64, dpi=100, ylim=(0, 6.5)):
+    """
+    Render many hourly-flow figures straight to files (png/svg/pdf), e.g. one per
+    (scenario, consumer) result.
+
+    frames: list of dicts with "df" and "title", optionally "duals", "price", "L_ref"
+            and "filename" (defaults to the sanitized title).
+    Frames are split into chunks of `chunksize`; every chunk is rendered by one
+    process with a single reused figure. Returns the written paths in input order.
+    """
+    out_dir = Path(out_dir)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    chunks = [frames[i:i + chunksize] for i in range(0, len(frames), chunksize)]
+    if n_jobs == 1 or len(chunks) <= 1:
+        return [p for chunk in chunks for p in _render_frames(chunk, out_dir, fmt, dpi, ylim)]
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp.get_context("spawn"),
+                             initializer=_use_agg) as pool:
+        futures = [pool.submit(_render_frames, chunk, out_dir, fmt, dpi, ylim) for chunk in chunks]
+        return [p for f in futures for p in f.result()]
+
+
+def _use_agg():
+    mpl.use("Agg")
+
+
+def _export_one(func_name, kwargs, path):
+    fig = getattr(plots, func_name)(**kwargs, show=False, save_path=path)
+    plots.plt.close(fig)
+    return str(path)
+
+
+def export_plots(calls, n_jobs=1):
+    """
+    Batch-export any utils.plots function without displaying it.
+
+    calls: iterable of (function name, kwargs, output path), e.g.
+           ("plot_scenarios_subplots_1c", dict(scenario_results=dfs, ...), "out/1c.pdf")
+    Worker processes use the Agg backend. Returns the written paths.
+    """
+    calls = list(calls)
+    if n_jobs == 1:
+        return [_export_one(*call) for call in calls]
+    with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp.get_context("spawn"),
+                             initializer=_use_agg) as pool:
+        return list(pool.map(_export_one, *zip(*calls)))
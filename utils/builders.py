@@ -0,0 +1,924 @@
+import numpy as np
+import scipy.sparse as sp
+from gurobipy import GRB
+
+import utils.classes as classes
+from utils.assembly import SparseModelBuilder, interleave
+
+
+def step_lengths(base):
+    """
+    Step lengths in hours (T,), from base["dt"] (scalar or per-step, default 1 h).
+    Energy quantities in base (P_pv, L_ref, l_max_hour) are per step; battery power
+    limits in kW are turned into energy per step with these lengths.
+    """
+    return np.broadcast_to(np.asarray(base.get("dt", 1.0), dtype=float), (base["T"],))
+
+
+def _add_variables(input_data, names, vtype=None):
+    """Append zero-cost variables (with zero coefficients in all existing rows)."""
+    n_rows = len(input_data.constraints_rhs)
+    for v in names:
+        input_data.VARIABLES.append(v)
+        input_data.objective_coeff[v] = 0
+        input_data.constraints_coeff[v] = [0.0] * n_rows
+        if vtype is not None:
+            input_data.variable_types[v] = vtype
+
+
+def _add_row(input_data, coeffs, sense, rhs):
+    """Append one constraint given as {var: coeff}; all other variables get 0."""
+    for v in input_data.VARIABLES:
+        input_data.constraints_coeff[v].append(coeffs.get(v, 0.0))
+    input_data.constraints_rhs.append(rhs)
+    input_data.constraints_sense.append(sense)
+
+
+def build_input_data_1a(base, scenario):
+    T = base["T"]
+    price = scenario["price"]
+    imp   = scenario["imp"]
+    exp   = scenario["exp"]
+    P_pv  = base["P_pv"]
+    L_min = base["L_min"]
+    l_max = base["l_max_hour"]
+
+    VARIABLES = []
+    for t in range(T):
+        VARIABLES += [f"l[{t}]", f"p[{t}]", f"e[{t}]", f"s[{t}]", f"c[{t}]"]
+
+    objective_coeff = {v: 0 for v in VARIABLES}
+    for t in range(T):
+        objective_coeff[f"e[{t}]"] = price[t] + imp[t]
+        objective_coeff[f"s[{t}]"] = -(price[t] - exp[t])
+
+    constraints_coeff = {v: [] for v in VARIABLES}
+    constraints_rhs = []
+    constraints_sense = []
+
+    # (1) Daily minimum consumption
+    for v in VARIABLES:
+        constraints_coeff[v].append(1.0 if v.startswith("l[") else 0.0)
+    constraints_rhs.append(L_min)
+    constraints_sense.append(GRB.GREATER_EQUAL)
+
+    # (2) Hourly load balance: l_t = p_t + e_t
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"l[{t}]": coeff = 1.0
+            elif v == f"p[{t}]": coeff = -1.0
+            elif v == f"e[{t}]": coeff = -1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.EQUAL)
+
+    # (3) PV split: p_t + s_t + c_t = P^{PV}_t
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"p[{t}]": coeff = 1.0
+            elif v == f"s[{t}]": coeff = 1.0
+            elif v == f"c[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(P_pv[t])
+        constraints_sense.append(GRB.EQUAL)
+
+    # (4) Hourly load maximum: l_t <= l_max[t]
+    for t in range(T):
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"l[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(l_max[t])
+        constraints_sense.append(GRB.LESS_EQUAL)
+
+    return classes.InputData(VARIABLES, objective_coeff, constraints_coeff, constraints_rhs, constraints_sense)
+
+
+def build_input_data_1b(base, scenario, kappa=1.3, gamma_up=None, gamma_down=None):
+    """
+    Task 1b builder: flexible load with discomfort cost on deviations from L_ref.
+    gamma_up / gamma_down default to kappa (symmetric discomfort weights).
+    """
+    T = base["T"]
+    price = scenario["price"]
+    imp   = scenario["imp"]
+    exp   = scenario["exp"]
+    P_pv  = base["P_pv"]
+    l_max_hour = np.broadcast_to(base["l_max_hour"], (T,))
+    L_ref = base["L_ref"]
+    gamma_up = kappa if gamma_up is None else gamma_up
+    gamma_down = kappa if gamma_down is None else gamma_down
+
+    VARIABLES = []
+    for t in range(T):
+        VARIABLES += [f"l[{t}]", f"p[{t}]", f"e[{t}]", f"s[{t}]", f"c[{t}]", f"d+[{t}]", f"d-[{t}]"]
+
+    objective_coeff = {v: 0 for v in VARIABLES}
+    for t in range(T):
+        objective_coeff[f"e[{t}]"] = price[t] + imp[t]
+        objective_coeff[f"s[{t}]"] = -(price[t] - exp[t])
+        # Discomfort cost (gamma_t = price_t * gamma)
+        objective_coeff[f"d+[{t}]"] = price[t] * gamma_up
+        objective_coeff[f"d-[{t}]"] = price[t] * gamma_down
+
+    constraints_coeff = {v: [] for v in VARIABLES}
+    constraints_rhs = []
+    constraints_sense = []
+
+    # (1) Hourly load balance: l_t - p_t - e_t = 0
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"l[{t}]": coeff = 1.0
+            elif v == f"p[{t}]": coeff = -1.0
+            elif v == f"e[{t}]": coeff = -1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.EQUAL)
+
+    # (2) PV split: p_t + s_t + c_t = P^{PV}_t
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"p[{t}]": coeff = 1.0
+            elif v == f"s[{t}]": coeff = 1.0
+            elif v == f"c[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(P_pv[t])
+        constraints_sense.append(GRB.EQUAL)
+
+    # (3) Hourly max load: l_t <= l_max_hour
+    for t in range(T):
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"l[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(l_max_hour[t])
+        constraints_sense.append(GRB.LESS_EQUAL)
+
+    # (4) Load deviation: l_t - d+_t + d-_t = L_ref_t
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"l[{t}]": coeff = 1.0
+            elif v == f"d+[{t}]": coeff = -1.0
+            elif v == f"d-[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(L_ref[t])
+        constraints_sense.append(GRB.EQUAL)
+
+    return classes.InputData(VARIABLES, objective_coeff, constraints_coeff, constraints_rhs, constraints_sense)
+
+
+def build_input_data_1c(base, scenario, gamma_up=1.2, gamma_down=1.3):
+    """
+    Task 1c builder: Task 1b plus a battery (b_ch, b_dis, soc).
+    """
+    T = base["T"]
+    price = scenario["price"]
+    imp = scenario["imp"]
+    exp = scenario["exp"]
+    P_pv = base["P_pv"]
+    l_max_hour = np.broadcast_to(base["l_max_hour"], (T,))
+    L_ref = base["L_ref"]
+    battery = base["battery_params"]
+    dt = step_lengths(base)
+
+    # --- Variables ---
+    VARIABLES = []
+    for t in range(T):
+        VARIABLES += [
+            f"l[{t}]", f"p[{t}]", f"e[{t}]", f"s[{t}]", f"c[{t}]",
+            f"d+[{t}]", f"d-[{t}]",
+            f"b_ch[{t}]", f"b_dis[{t}]", f"soc[{t}]"
+        ]
+
+    # --- Objective Function ---
+    objective_coeff = {v: 0 for v in VARIABLES}
+    for t in range(T):
+        objective_coeff[f"e[{t}]"] = price[t] + imp[t]
+        objective_coeff[f"s[{t}]"] = -(price[t] - exp[t])
+        objective_coeff[f"d+[{t}]"] = price[t] * gamma_up
+        objective_coeff[f"d-[{t}]"] = price[t] * gamma_down
+        # Battery charge/discharge and SOC have no direct cost
+
+    # --- Constraints ---
+    constraints_coeff = {v: [] for v in VARIABLES}
+    constraints_rhs = []
+    constraints_sense = []
+
+    # (1) Hourly load balance: l_t = p_t + e_t + b_dis_t - b_ch_t
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"l[{t}]": coeff = 1.0
+            elif v == f"p[{t}]": coeff = -1.0
+            elif v == f"e[{t}]": coeff = -1.0
+            elif v == f"b_dis[{t}]": coeff = -1.0
+            elif v == f"b_ch[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.EQUAL)
+
+    # (2) PV split: p_t + s_t + c_t + b_ch_t = P^{PV}_t
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"p[{t}]": coeff = 1.0
+            elif v == f"s[{t}]": coeff = 1.0
+            elif v == f"c[{t}]": coeff = 1.0
+            elif v == f"b_ch[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(P_pv[t])
+        constraints_sense.append(GRB.EQUAL)
+
+    # (3) Hourly max load: l_t <= l_max_hour
+    for t in range(T):
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"l[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(l_max_hour[t])
+        constraints_sense.append(GRB.LESS_EQUAL)
+
+    # (4) Load deviation: l_t - d+_t + d-_t = L_ref_t
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"l[{t}]": coeff = 1.0
+            elif v == f"d+[{t}]": coeff = -1.0
+            elif v == f"d-[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(L_ref[t])
+        constraints_sense.append(GRB.EQUAL)
+
+    # (5) Battery charge/discharge limits
+    max_charge = battery["max_charge_power_kW"]
+    max_discharge = battery["max_discharge_power_kW"]
+    for t in range(T):
+        # b_ch_t <= max_charge
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"b_ch[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(max_charge * dt[t])
+        constraints_sense.append(GRB.LESS_EQUAL)
+        # b_dis_t <= max_discharge
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"b_dis[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(max_discharge * dt[t])
+        constraints_sense.append(GRB.LESS_EQUAL)
+
+    # (6) Battery SOC dynamics
+    eta_ch = battery["charge_efficiency"]
+    eta_dis = battery["discharge_efficiency"]
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"soc[{t}]": coeff = 1.0
+            elif v == f"soc[{t-1}]": coeff = -1.0 if t > 0 else 0.0
+            elif v == f"b_ch[{t}]": coeff = -eta_ch
+            elif v == f"b_dis[{t}]": coeff = 1.0 / eta_dis
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        if t == 0:
+            soc0 = battery["initial_soc_ratio"] * battery["capacity_kWh"]
+            constraints_rhs.append(soc0)
+        else:
+            constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.EQUAL)
+
+    # (7) SOC bounds
+    for t in range(T):
+        # soc_t <= capacity
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"soc[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(battery["capacity_kWh"])
+        constraints_sense.append(GRB.LESS_EQUAL)
+        # soc_t >= 0
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"soc[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.GREATER_EQUAL)
+
+    # (8) Final SOC constraint
+    final_soc = battery["final_soc_ratio"] * battery["capacity_kWh"]
+    for v in VARIABLES:
+        coeff = 1.0 if v == f"soc[{T-1}]" else 0.0
+        constraints_coeff[v].append(coeff)
+    constraints_rhs.append(final_soc)
+    constraints_sense.append(GRB.EQUAL)
+
+    return classes.InputData(VARIABLES, objective_coeff, constraints_coeff, constraints_rhs, constraints_sense)
+
+
+def build_input_data_2b(base, scenario, C_batt, r_ch, r_dis, s0=0.5, sT=0.5,
+                        gamma_up=0.8, gamma_down=0.8):
+    """
+    Extended input builder for Task 2(b) – joint investment and operational optimization.
+
+    Adds the investment decision variable E_cap (battery capacity)
+    and scales all relevant constraints accordingly.
+
+    Parameters
+    ----------
+    base : dict
+        Base data with keys: "T", "P_pv", "l_max_hour", "L_ref", "battery_params"
+    scenario : dict
+        Scenario data with keys: "price", "imp", "exp"
+    C_batt : float
+        Specific capital cost of the battery (DKK/kWh)
+    r_ch, r_dis : float
+        Max charge/discharge power ratios (kW per kWh of capacity)
+    s0, sT : float, optional
+        Initial and final SoC ratios (default 0.5 each)
+    gamma_up, gamma_down : float, optional
+        Discomfort cost multipliers for upward and downward deviations (default 0.8 each)
+        These multiply the price to create the discomfort penalty
+    """
+
+    # --- Extract data ---
+    T = base["T"]
+    price = scenario["price"]
+    imp = scenario["imp"]
+    exp = scenario["exp"]
+    P_pv = base["P_pv"]
+    l_max_hour = np.broadcast_to(base["l_max_hour"], (T,))
+    L_ref = base["L_ref"]
+    battery = base["battery_params"]
+    dt = step_lengths(base)
+
+    eta_ch = battery["charge_efficiency"]
+    eta_dis = battery["discharge_efficiency"]
+
+    # --- Variable list ---
+    VARIABLES = ["E_cap"]  # investment variable
+    for t in range(T):
+        VARIABLES += [
+            f"l[{t}]", f"p[{t}]", f"e[{t}]", f"s[{t}]", f"c[{t}]",
+            f"d+[{t}]", f"d-[{t}]",
+            f"b_ch[{t}]", f"b_dis[{t}]", f"soc[{t}]"
+        ]
+
+    # --- Objective coefficients ---
+    objective_coeff = {v: 0 for v in VARIABLES}
+    for t in range(T):
+        # 10 years * 365 days = 3650 cycles
+        objective_coeff[f"e[{t}]"] = 3650 * (price[t] + imp[t])
+        objective_coeff[f"s[{t}]"] = -3650 * (price[t] - exp[t])
+        objective_coeff[f"d+[{t}]"] = 3650 * price[t] * gamma_up
+        objective_coeff[f"d-[{t}]"] = 3650 * price[t] * gamma_down
+    # CAPEX term
+    objective_coeff["E_cap"] = C_batt
+
+    # --- Initialize constraints containers ---
+    constraints_coeff = {v: [] for v in VARIABLES}
+    constraints_rhs = []
+    constraints_sense = []
+
+    # (1) Main energy balance: l + b_ch = p + e + b_dis * η_dis
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"l[{t}]": coeff = 1.0
+            elif v == f"b_ch[{t}]": coeff = 1.0
+            elif v == f"p[{t}]": coeff = -1.0
+            elif v == f"e[{t}]": coeff = -1.0
+            elif v == f"b_dis[{t}]": coeff = -eta_dis
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.EQUAL)
+
+    # (2) PV split: p + s + c + b_ch = P_pv
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"p[{t}]": coeff = 1.0
+            elif v == f"s[{t}]": coeff = 1.0
+            elif v == f"c[{t}]": coeff = 1.0
+            elif v == f"b_ch[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(P_pv[t])
+        constraints_sense.append(GRB.EQUAL)
+
+    # (3) Max load limit
+    for t in range(T):
+        for v in VARIABLES:
+            coeff = 1.0 if v == f"l[{t}]" else 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(l_max_hour[t])
+        constraints_sense.append(GRB.LESS_EQUAL)
+
+    # (4) Load deviation: l - d+ + d- = L_ref
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"l[{t}]": coeff = 1.0
+            elif v == f"d+[{t}]": coeff = -1.0
+            elif v == f"d-[{t}]": coeff = 1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(L_ref[t])
+        constraints_sense.append(GRB.EQUAL)
+
+    # (5) Battery SoC dynamics
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"soc[{t}]": coeff = 1.0
+            elif v == f"soc[{t-1}]": coeff = -1.0 if t > 0 else 0.0
+            elif v == f"b_ch[{t}]": coeff = -eta_ch
+            elif v == f"b_dis[{t}]": coeff = 1.0 / eta_dis
+            elif v == "E_cap": coeff = -s0 if t == 0 else 0.0  # initial scaling
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.EQUAL)
+
+    # (6) Capacity limit: soc_t ≤ E_cap
+    for t in range(T):
+        for v in VARIABLES:
+            if v == f"soc[{t}]": coeff = 1.0
+            elif v == "E_cap": coeff = -1.0
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.LESS_EQUAL)
+
+    # (7) Power limits (scale with E_cap)
+    for t in range(T):
+        # charge
+        for v in VARIABLES:
+            if v == f"b_ch[{t}]": coeff = 1.0
+            elif v == "E_cap": coeff = -r_ch * dt[t]
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.LESS_EQUAL)
+        # discharge
+        for v in VARIABLES:
+            if v == f"b_dis[{t}]": coeff = 1.0
+            elif v == "E_cap": coeff = -r_dis * dt[t]
+            else: coeff = 0.0
+            constraints_coeff[v].append(coeff)
+        constraints_rhs.append(0.0)
+        constraints_sense.append(GRB.LESS_EQUAL)
+
+    # (8) End-of-day SoC: soc_T = sT * E_cap
+    for v in VARIABLES:
+        if v == f"soc[{T-1}]": coeff = 1.0
+        elif v == "E_cap": coeff = -sT
+        else: coeff = 0.0
+        constraints_coeff[v].append(coeff)
+    constraints_rhs.append(0.0)
+    constraints_sense.append(GRB.EQUAL)
+
+    return classes.InputData(VARIABLES, objective_coeff, constraints_coeff,
+                     constraints_rhs, constraints_sense)
+
+
+def add_appliance_constraints(input_data, T, load, initial_on=False, dt=1.0):
+    """
+    Enforce the appliance limits of appliance_params["load"][i] on l[t] of any
+    1a/1b/1c/2b input: min_load_ratio, min_on_time_h, min_off_time_h and
+    max_ramp_rate_up/down_ratio. Modifies and returns input_data.
+    dt: step length in hours; l[t] is the energy of a step, so limits scale with dt,
+    ramps (per hour) with dt^2 and min up/down times are rounded up to whole steps.
+
+    Commitment uses the 3-binary formulation with on-status u[t] and start-up /
+    shut-down indicators v[t], w[t], all binary:
+        u_t - u_{t-1} = v_t - w_t,   v_t + w_t <= 1
+        sum_{tau=t-UT+1..t} v_tau <= u_t          (min up time)
+        sum_{tau=t-DT+1..t} w_tau <= 1 - u_t      (min down time)
+    Commitment variables are only added when a min load or min up/down time is set.
+    """
+    l_max = load["max_load_kWh_per_hour"] * dt
+    l_min = load.get("min_load_ratio", 0.0) * l_max
+    ramp_up = load.get("max_ramp_rate_up_ratio", 1.0) * l_max * dt
+    ramp_down = load.get("max_ramp_rate_down_ratio", 1.0) * l_max * dt
+    UT = int(np.ceil((load.get("min_on_time_h", 0) or 0) / dt - 1e-9))
+    DT = int(np.ceil((load.get("min_off_time_h", 0) or 0) / dt - 1e-9))
+    commitment = l_min > 0 or UT > 1 or DT > 1
+
+    if commitment:
+        _add_variables(input_data, [f"u[{t}]" for t in range(T)], GRB.BINARY)
+        _add_variables(input_data, [f"v[{t}]" for t in range(T)] + [f"w[{t}]" for t in range(T)], GRB.BINARY)
+
+        for t in range(T):
+            # (A1) l_t <= l_max * u_t,  (A2) l_t >= l_min * u_t
+            _add_row(input_data, {f"l[{t}]": 1.0, f"u[{t}]": -l_max}, GRB.LESS_EQUAL, 0.0)
+            if l_min > 0:
+                _add_row(input_data, {f"l[{t}]": 1.0, f"u[{t}]": -l_min}, GRB.GREATER_EQUAL, 0.0)
+        for t in range(T):
+            # (A3) status transition
+            row = {f"u[{t}]": 1.0, f"v[{t}]": -1.0, f"w[{t}]": 1.0}
+            if t > 0:
+                row[f"u[{t-1}]"] = -1.0
+            _add_row(input_data, row, GRB.EQUAL, 0.0 if t > 0 else float(initial_on))
+            # no simultaneous start-up and shut-down (v = w = 1 would loosen both ramp rows)
+            _add_row(input_data, {f"v[{t}]": 1.0, f"w[{t}]": 1.0}, GRB.LESS_EQUAL, 1.0)
+        if UT > 1:
+            for t in range(T):
+                # (A4) min up time
+                row = {f"v[{tau}]": 1.0 for tau in range(max(0, t - UT + 1), t + 1)}
+                row[f"u[{t}]"] = -1.0
+                _add_row(input_data, row, GRB.LESS_EQUAL, 0.0)
+        if DT > 1:
+            for t in range(T):
+                # (A5) min down time
+                row = {f"w[{tau}]": 1.0 for tau in range(max(0, t - DT + 1), t + 1)}
+                row[f"u[{t}]"] = 1.0
+                _add_row(input_data, row, GRB.LESS_EQUAL, 1.0)
+
+    if ramp_up < l_max or ramp_down < l_max:
+        # start-up / shut-down may jump to / from the minimum load
+        su = max(ramp_up, l_min)
+        sd = max(ramp_down, l_min)
+        for t in range(1, T):
+            if commitment:
+                up = {f"l[{t}]": 1.0, f"l[{t-1}]": -1.0, f"u[{t-1}]": -ramp_up, f"v[{t}]": -su}
+                down = {f"l[{t-1}]": 1.0, f"l[{t}]": -1.0, f"u[{t}]": -ramp_down, f"w[{t}]": -sd}
+                _add_row(input_data, up, GRB.LESS_EQUAL, 0.0)
+                _add_row(input_data, down, GRB.LESS_EQUAL, 0.0)
+            else:
+                _add_row(input_data, {f"l[{t}]": 1.0, f"l[{t-1}]": -1.0}, GRB.LESS_EQUAL, ramp_up)
+                _add_row(input_data, {f"l[{t-1}]": 1.0, f"l[{t}]": -1.0}, GRB.LESS_EQUAL, ramp_down)
+
+    return input_data
+
+
+def appliance_violations(variables, T, load, dt=1.0, tol=1e-6):
+    """
+    Largest violation (0 when satisfied) of the load and ramp limits of
+    add_appliance_constraints in a solution {var: value}, e.g. results.variables of
+    the MILP: l above l_max, l below l_min while on, and ramps beyond ramp_up/down
+    (plus the start-up / shut-down allowance when the appliance switches).
+    """
+    l_max = load["max_load_kWh_per_hour"] * dt
+    l_min = load.get("min_load_ratio", 0.0) * l_max
+    ramp_up = load.get("max_ramp_rate_up_ratio", 1.0) * l_max * dt
+    ramp_down = load.get("max_ramp_rate_down_ratio", 1.0) * l_max * dt
+    su, sd = max(ramp_up, l_min), max(ramp_down, l_min)
+    l = np.array([variables[f"l[{t}]"] for t in range(T)])
+    if "u[0]" in variables:
+        on = np.array([variables[f"u[{t}]"] for t in range(T)]) > 0.5
+    else:
+        on = l > tol
+    dl = np.diff(l)
+    up_limit = np.where(on[:-1], ramp_up, 0.0) + np.where(on[1:] & ~on[:-1], su, 0.0)
+    down_limit = np.where(on[1:], ramp_down, 0.0) + np.where(on[:-1] & ~on[1:], sd, 0.0)
+    return dict(
+        l_max=float(np.max(l - l_max, initial=0.0)),
+        l_min=float(np.max(np.where(on, l_min - l, 0.0), initial=0.0)),
+        ramp_up=float(np.max(dl - up_limit, initial=0.0)),
+        ramp_down=float(np.max(-dl - down_limit, initial=0.0)),
+    )
+
+
+def appliance_mip_start(lp_variables, T, tol=1e-6):
+    """
+    MIP start for add_appliance_constraints from an LP schedule (results.variables of
+    the model without appliance constraints): the LP loads l[t] and on-status u[t].
+    Gurobi repairs the start if it violates min up/down times.
+    """
+    start = {}
+    for t in range(T):
+        l = lp_variables[f"l[{t}]"]
+        start[f"l[{t}]"] = l
+        start[f"u[{t}]"] = 1.0 if l > tol else 0.0
+    return start
+
+
+def assemble_1c(base, scenario, gamma_up=1.2, gamma_down=1.3, horizon_scale=1.0):
+    """
+    Sparse, vectorized assembly of the Task 1c model (same constraint order and
+    duals layout as build_input_data_1c) for long horizons. Returns the
+    SparseModelBuilder so further blocks (e.g. add_degradation_cost) can be added
+    before .to_input_data(). horizon_scale multiplies all operating costs.
+    """
+    T = base["T"]
+    price = np.asarray(scenario["price"], dtype=float)
+    imp = np.asarray(scenario["imp"], dtype=float)
+    exp = np.asarray(scenario["exp"], dtype=float)
+    battery = base["battery_params"]
+    eta_ch = battery["charge_efficiency"]
+    eta_dis = battery["discharge_efficiency"]
+    k = horizon_scale
+
+    mb = SparseModelBuilder()
+    l = mb.add_family("l", T)
+    p = mb.add_family("p", T)
+    e = mb.add_family("e", T, obj=k * (price + imp))
+    s = mb.add_family("s", T, obj=-k * (price - exp))
+    c = mb.add_family("c", T)
+    d_up = mb.add_family("d+", T, obj=k * price * gamma_up)
+    d_dn = mb.add_family("d-", T, obj=k * price * gamma_down)
+    b_ch = mb.add_family("b_ch", T)
+    b_dis = mb.add_family("b_dis", T)
+    soc = mb.add_family("soc", T)
+    prev_soc = np.r_[-1, soc[:-1]]
+
+    # (1) load balance, (2) PV split, (3) max load, (4) load deviation
+    mb.add_rows(T, [(l, 1.0), (p, -1.0), (e, -1.0), (b_dis, -1.0), (b_ch, 1.0)], GRB.EQUAL, 0.0)
+    mb.add_rows(T, [(p, 1.0), (s, 1.0), (c, 1.0), (b_ch, 1.0)], GRB.EQUAL, base["P_pv"])
+    mb.add_rows(T, [(l, 1.0)], GRB.LESS_EQUAL, base["l_max_hour"])
+    mb.add_rows(T, [(l, 1.0), (d_up, -1.0), (d_dn, 1.0)], GRB.EQUAL, base["L_ref"])
+    # (5) charge / discharge limits, interleaved per hour
+    dt = step_lengths(base)
+    mb.add_rows(2 * T, [(interleave(b_ch, b_dis), 1.0)], GRB.LESS_EQUAL,
+                interleave(battery["max_charge_power_kW"] * dt, battery["max_discharge_power_kW"] * dt))
+    # (6) SOC dynamics
+    soc0 = battery["initial_soc_ratio"] * battery["capacity_kWh"]
+    mb.add_rows(T, [(soc, 1.0), (prev_soc, -1.0), (b_ch, -eta_ch), (b_dis, 1.0 / eta_dis)],
+                GRB.EQUAL, np.r_[soc0, np.zeros(T - 1)])
+    # (7) SOC bounds, interleaved per hour
+    mb.add_rows(2 * T, [(interleave(soc, soc), 1.0)],
+                interleave(np.full(T, GRB.LESS_EQUAL), np.full(T, GRB.GREATER_EQUAL)),
+                interleave(np.full(T, battery["capacity_kWh"]), np.zeros(T)))
+    # (8) final SOC
+    mb.add_rows(1, [(soc[-1], 1.0)], GRB.EQUAL, battery["final_soc_ratio"] * battery["capacity_kWh"])
+    return mb
+
+
+def assemble_2b(base, scenario, C_batt, r_ch, r_dis, s0=0.5, sT=0.5,
+                gamma_up=0.8, gamma_down=0.8, horizon_scale=3650):
+    """
+    Sparse, vectorized assembly of the Task 2b investment model (same constraint order
+    as build_input_data_2b). horizon_scale replaces the fixed 3650-day multiplier.
+    """
+    T = base["T"]
+    price = np.asarray(scenario["price"], dtype=float)
+    imp = np.asarray(scenario["imp"], dtype=float)
+    exp = np.asarray(scenario["exp"], dtype=float)
+    battery = base["battery_params"]
+    eta_ch = battery["charge_efficiency"]
+    eta_dis = battery["discharge_efficiency"]
+    k = horizon_scale
+
+    mb = SparseModelBuilder()
+    E_cap = mb.add_scalar("E_cap", obj=C_batt)
+    l = mb.add_family("l", T)
+    p = mb.add_family("p", T)
+    e = mb.add_family("e", T, obj=k * (price + imp))
+    s = mb.add_family("s", T, obj=-k * (price - exp))
+    c = mb.add_family("c", T)
+    d_up = mb.add_family("d+", T, obj=k * price * gamma_up)
+    d_dn = mb.add_family("d-", T, obj=k * price * gamma_down)
+    b_ch = mb.add_family("b_ch", T)
+    b_dis = mb.add_family("b_dis", T)
+    soc = mb.add_family("soc", T)
+    prev_soc = np.r_[-1, soc[:-1]]
+
+    mb.add_rows(T, [(l, 1.0), (b_ch, 1.0), (p, -1.0), (e, -1.0), (b_dis, -eta_dis)], GRB.EQUAL, 0.0)
+    mb.add_rows(T, [(p, 1.0), (s, 1.0), (c, 1.0), (b_ch, 1.0)], GRB.EQUAL, base["P_pv"])
+    mb.add_rows(T, [(l, 1.0)], GRB.LESS_EQUAL, base["l_max_hour"])
+    mb.add_rows(T, [(l, 1.0), (d_up, -1.0), (d_dn, 1.0)], GRB.EQUAL, base["L_ref"])
+    mb.add_rows(T, [(soc, 1.0), (prev_soc, -1.0), (b_ch, -eta_ch), (b_dis, 1.0 / eta_dis),
+                    (E_cap, np.r_[-s0, np.zeros(T - 1)])], GRB.EQUAL, 0.0)
+    mb.add_rows(T, [(soc, 1.0), (E_cap, -1.0)], GRB.LESS_EQUAL, 0.0)
+    dt = step_lengths(base)
+    mb.add_rows(2 * T, [(interleave(b_ch, b_dis), 1.0), (E_cap, interleave(-r_ch * dt, -r_dis * dt))],
+                GRB.LESS_EQUAL, 0.0)
+    mb.add_rows(1, [(soc[-1], 1.0), (E_cap, -sT)], GRB.EQUAL, 0.0)
+    return mb
+
+
+def add_degradation_cost(mb, breakpoints, marginal_costs, basis="throughput", capacity=None):
+    """
+    Piecewise-linear battery degradation cost on a sparse model (assemble_1c/2b),
+    modelled with convex segments so the model stays an LP.
+
+    basis="throughput": cost on the energy cycled per step, b_ch[t] + b_dis[t].
+    basis="soc_level":  cost on the energy missing from a full battery at the end of
+                        each step, capacity - soc[t]. This penalizes time spent at low
+                        SOC, not the depth of individual cycles (which would need cycle
+                        counting that an LP cannot express).
+    breakpoints:    segment ends in kWh (increasing, first segment starts at 0); step
+                    values beyond the last breakpoint are infeasible, so the last
+                    segment should cover the largest possible step value.
+    marginal_costs: DKK/kWh per segment, non-decreasing (convexity), already scaled
+                    like the other operating costs of the model.
+    capacity:       battery capacity in kWh for basis="soc_level" (e.g.
+                    base["battery_params"]["capacity_kWh"]); required unless the model
+                    sizes it as E_cap.
+    Adds families deg0..deg{K-1}[t] with 0 <= deg_k[t] <= segment width.
+    """
+    breakpoints = np.asarray(breakpoints, dtype=float)
+    marginal_costs = np.asarray(marginal_costs, dtype=float)
+    if len(breakpoints) != len(marginal_costs):
+        raise ValueError("need one marginal cost per segment")
+    if np.any(np.diff(marginal_costs) < 0) or np.any(np.diff(breakpoints) <= 0):
+        raise ValueError("convex segments need increasing breakpoints and non-decreasing marginal costs")
+    if basis not in ("throughput", "soc_level"):
+        raise ValueError(f"unknown degradation basis {basis!r}")
+    if basis == "soc_level" and capacity is None and "E_cap" not in mb.cols:
+        raise ValueError('basis="soc_level" needs the battery capacity on a model without E_cap')
+
+    T = len(mb.cols["soc"])
+    widths = np.diff(np.r_[0.0, breakpoints])
+    segments = [mb.add_family(f"deg{k}", T, obj=marginal_costs[k]) for k in range(len(widths))]
+
+    if basis == "throughput":
+        # sum_k deg_k[t] = b_ch[t] + b_dis[t]
+        mb.add_rows(T, [(seg, 1.0) for seg in segments] + [(mb.cols["b_ch"], -1.0), (mb.cols["b_dis"], -1.0)],
+                    GRB.EQUAL, 0.0)
+    elif basis == "soc_level":
+        if capacity is None:
+            # sum_k deg_k[t] + soc[t] - E_cap >= 0
+            mb.add_rows(T, [(seg, 1.0) for seg in segments] + [(mb.cols["soc"], 1.0), (mb.cols["E_cap"][0], -1.0)],
+                        GRB.GREATER_EQUAL, 0.0)
+        else:
+            # sum_k deg_k[t] + soc[t] >= capacity
+            mb.add_rows(T, [(seg, 1.0) for seg in segments] + [(mb.cols["soc"], 1.0)],
+                        GRB.GREATER_EQUAL, capacity)
+
+    for seg, width in zip(segments, widths):
+        mb.add_rows(T, [(seg, 1.0)], GRB.LESS_EQUAL, width)
+    return mb
+
+
+def add_heat_pumps(mb, hp, dt=1.0, balance_rows=None, comfort_penalty=None, horizon_scale=1.0):
+    """
+    Heat pumps (inputs from data.prepare_heat_pump_inputs) on an assembled model:
+    electric energy hp[id,t] (kWh per step) and indoor temperature theta[id,t] (deg C),
+
+        C theta[t] = C theta[t-1] + COP[t] hp[t] - UA dt (theta[t-1] - theta_out[t]).
+
+    The dynamics of all heat pumps are one banded matrix over the flattened
+    (heat pump, t) axis (diagonal C, subdiagonal -(C - UA dt)), so fleets assemble
+    without per-hour loops. hp enters balance_rows (default: the first T rows, the bus
+    balance of assemble_1c / assemble_components) like a load. The comfort band is
+    hard, or soft with slacks theta+/theta- costing comfort_penalty DKK per K and hour.
+    The last temperature must reach final_temperature_C. Returns the columns of hp.
+    """
+    ids = hp["ids"]
+    n, T = len(ids), len(mb.cols["e"])
+    if n == 0:
+        return np.zeros((0, T), dtype=int)
+    dt = np.broadcast_to(np.asarray(dt, dtype=float), (T,))
+    C = hp["capacitance_kWh_per_K"][:, None]
+    UA = hp["heat_loss_kW_per_K"][:, None]
+    theta0 = hp["initial_temperature_C"]
+
+    theta = mb.add_components("theta", ids, T)
+    q = mb.add_components("hp", ids, T)
+
+    # (1) thermal dynamics: [D | -diag(COP)] [theta; hp] = UA dt theta_out (+ (C - UA dt) theta0 at t = 0)
+    carry = C - UA * dt                                   # (n, T): weight of theta[t-1] in theta[t]
+    sub = np.c_[-carry[:, 1:], np.zeros(n)].ravel()[:-1]  # zero across heat pump boundaries
+    D = sp.diags([np.repeat(C.ravel(), T), sub], [0, -1], shape=(n * T, n * T))
+    A = sp.hstack([D, sp.diags(-hp["cop"].ravel())])
+    rhs = UA * dt * hp["outdoor_temperature_C"]
+    rhs[:, 0] += carry[:, 0] * theta0
+    mb.add_matrix_rows(A, np.r_[theta.ravel(), q.ravel()], GRB.EQUAL, rhs.ravel())
+    # (2) electric power limit
+    mb.add_rows(n * T, [(q.ravel(), 1.0)], GRB.LESS_EQUAL, (hp["max_electric_power_kW"][:, None] * dt).ravel())
+    # (3) comfort band, interleaved per (heat pump, t)
+    if comfort_penalty is None:
+        mb.add_rows(2 * n * T, [(interleave(theta.ravel(), theta.ravel()), 1.0)],
+                    interleave(np.full(n * T, GRB.LESS_EQUAL), np.full(n * T, GRB.GREATER_EQUAL)),
+                    interleave(hp["max_temperature_C"].ravel(), hp["min_temperature_C"].ravel()))
+    else:
+        cost = horizon_scale * comfort_penalty * np.broadcast_to(dt, (n, T))
+        over = mb.add_components("theta+", ids, T, obj=cost)
+        under = mb.add_components("theta-", ids, T, obj=cost)
+        mb.add_rows(2 * n * T, [(interleave(theta.ravel(), theta.ravel()), 1.0),
+                                (interleave(over.ravel(), under.ravel()), interleave(-np.ones(n * T), np.ones(n * T)))],
+                    interleave(np.full(n * T, GRB.LESS_EQUAL), np.full(n * T, GRB.GREATER_EQUAL)),
+                    interleave(hp["max_temperature_C"].ravel(), hp["min_temperature_C"].ravel()))
+    # (4) final temperature
+    mb.add_rows(n, [(theta[:, -1], 1.0)], GRB.GREATER_EQUAL, hp["final_temperature_C"])
+    # consumption in the bus balance
+    mb.add_to_rows(np.arange(T) if balance_rows is None else balance_rows, [(q.T, 1.0)])
+    return q
+
+
+def assemble_components(comp, scenario, gamma_up=1.2, gamma_down=1.3, horizon_scale=1.0):
+    """
+    Sparse Task 1c model for a consumer with any number of PV strings, loads and
+    storages (inputs from data.prepare_component_inputs). Component variables are
+    indexed (component, t), e.g. "l[FFL_01,3]"; grid imports stay "e[t]".
+
+    With one PV, one load and one storage the rows match build_input_data_1c:
+        (1) T bus balance rows, (2) T PV split rows, (3)/(4) (load, t) rows,
+        (5)-(8) (storage, t) rows; several PV strings add per-string limits (9) at the end,
+    heat pumps in comp["heat_pump"] their blocks (add_heat_pumps) after that.
+    """
+    T = comp["T"]
+    price = np.asarray(scenario["price"], dtype=float)
+    imp = np.asarray(scenario["imp"], dtype=float)
+    exp = np.asarray(scenario["exp"], dtype=float)
+    pv, load, st = comp["pv"], comp["load"], comp["storage"]
+    k = horizon_scale
+
+    mb = SparseModelBuilder()
+    e = mb.add_family("e", T, obj=k * (price + imp))
+    p = mb.add_components("p", pv["ids"], T)
+    s = mb.add_components("s", pv["ids"], T, obj=-k * (price - exp))
+    c = mb.add_components("c", pv["ids"], T)
+    l = mb.add_components("l", load["ids"], T)
+    d_up = mb.add_components("d+", load["ids"], T, obj=k * price * gamma_up)
+    d_dn = mb.add_components("d-", load["ids"], T, obj=k * price * gamma_down)
+    b_ch = mb.add_components("b_ch", st["ids"], T)
+    b_dis = mb.add_components("b_dis", st["ids"], T)
+    soc = mb.add_components("soc", st["ids"], T)
+
+    n_pv, n_load, n_st = len(pv["ids"]), len(load["ids"]), len(st["ids"])
+    # (1) bus balance: sum l - sum p - e - sum b_dis + sum b_ch = 0
+    mb.add_rows(T, [(l.T, 1.0), (p.T, -1.0), (e, -1.0), (b_dis.T, -1.0), (b_ch.T, 1.0)], GRB.EQUAL, 0.0)
+    # (2) PV split: sum (p + s + c) + sum b_ch = sum P_pv
+    mb.add_rows(T, [(p.T, 1.0), (s.T, 1.0), (c.T, 1.0), (b_ch.T, 1.0)], GRB.EQUAL, pv["P_pv"].sum(axis=0))
+    # (3) max load, (4) load deviation, per (load, t)
+    mb.add_rows(n_load * T, [(l.ravel(), 1.0)], GRB.LESS_EQUAL, load["l_max_hour"].ravel())
+    mb.add_rows(n_load * T, [(l.ravel(), 1.0), (d_up.ravel(), -1.0), (d_dn.ravel(), 1.0)],
+                GRB.EQUAL, load["L_ref"].ravel())
+
+    def per_step(a):
+        return np.repeat(np.asarray(a, dtype=float), T)
+
+    dt = np.tile(step_lengths(comp), n_st)
+
+    capacity = st["capacity_kWh"]
+    # (5) charge / discharge limits, interleaved per (storage, t)
+    mb.add_rows(2 * n_st * T, [(interleave(b_ch.ravel(), b_dis.ravel()), 1.0)], GRB.LESS_EQUAL,
+                interleave(per_step(st["max_charge_power_kW"]) * dt, per_step(st["max_discharge_power_kW"]) * dt))
+    # (6) SOC dynamics
+    prev_soc = np.c_[np.full(n_st, -1), soc[:, :-1]]
+    first = np.zeros((n_st, T))
+    first[:, 0] = st["initial_soc_ratio"] * capacity
+    mb.add_rows(n_st * T, [(soc.ravel(), 1.0), (prev_soc.ravel(), -1.0),
+                           (b_ch.ravel(), -per_step(st["charge_efficiency"])),
+                           (b_dis.ravel(), 1.0 / per_step(st["discharge_efficiency"]))],
+                GRB.EQUAL, first.ravel())
+    # (7) SOC bounds, interleaved per (storage, t)
+    mb.add_rows(2 * n_st * T, [(interleave(soc.ravel(), soc.ravel()), 1.0)],
+                interleave(np.full(n_st * T, GRB.LESS_EQUAL), np.full(n_st * T, GRB.GREATER_EQUAL)),
+                interleave(per_step(capacity), np.zeros(n_st * T)))
+    # (8) final SOC, per storage
+    mb.add_rows(n_st, [(soc[:, -1], 1.0)], GRB.EQUAL, st["final_soc_ratio"] * capacity)
+    # (9) per-string PV limits: p + s + c <= P_pv
+    if n_pv > 1:
+        mb.add_rows(n_pv * T, [(p.ravel(), 1.0), (s.ravel(), 1.0), (c.ravel(), 1.0)],
+                    GRB.LESS_EQUAL, pv["P_pv"].ravel())
+    # (10) heat pumps, if any
+    if comp.get("heat_pump"):
+        add_heat_pumps(mb, comp["heat_pump"], step_lengths(comp), horizon_scale=horizon_scale)
+    return mb
+
+
+def assemble_2b_stochastic(base, ensemble, weights, C_batt, r_ch, r_dis, s0=0.5, sT=0.5,
+                           gamma_up=0.8, gamma_down=0.8, horizon_scale=3650):
+    """
+    Two-stage Task 2b model: one battery capacity E_cap shared by K operating days.
+
+    ensemble: (K, T) arrays "price", "imp", "exp" and optionally "P_pv", "L_ref"
+              (e.g. the reduced scenarios of utils.reduction.reduce_scenarios).
+    weights:  scenario probabilities (K,); day k's operating cost is weighted by
+              horizon_scale * weights[k] instead of the fixed 3650.
+    Operating variables are indexed (scenario, t), e.g. "e[k3,12]"; each constraint
+    group of build_input_data_2b is stacked over (scenario, t).
+    """
+    T = base["T"]
+    price = np.atleast_2d(np.asarray(ensemble["price"], dtype=float))
+    K = len(price)
+    imp = np.broadcast_to(np.asarray(ensemble["imp"], dtype=float), (K, T))
+    exp = np.broadcast_to(np.asarray(ensemble["exp"], dtype=float), (K, T))
+    P_pv = np.broadcast_to(np.asarray(ensemble.get("P_pv", base["P_pv"]), dtype=float), (K, T))
+    L_ref = np.broadcast_to(np.asarray(ensemble.get("L_ref", base["L_ref"]), dtype=float), (K, T))
+    weights = np.asarray(weights, dtype=float)
+    if weights.shape != (K,):
+        raise ValueError(f"need {K} scenario weights, got shape {weights.shape}")
+    battery = base["battery_params"]
+    eta_ch = battery["charge_efficiency"]
+    eta_dis = battery["discharge_efficiency"]
+    k = horizon_scale * weights[:, None]
+
+    mb = SparseModelBuilder()
+    labels = [f"k{i}" for i in range(K)]
+    E_cap = mb.add_scalar("E_cap", obj=C_batt)
+    l = mb.add_components("l", labels, T)
+    p = mb.add_components("p", labels, T)
+    e = mb.add_components("e", labels, T, obj=k * (price + imp))
+    s = mb.add_components("s", labels, T, obj=-k * (price - exp))
+    c = mb.add_components("c", labels, T)
+    d_up = mb.add_components("d+", labels, T, obj=k * price * gamma_up)
+    d_dn = mb.add_components("d-", labels, T, obj=k * price * gamma_down)
+    b_ch = mb.add_components("b_ch", labels, T)
+    b_dis = mb.add_components("b_dis", labels, T)
+    soc = mb.add_components("soc", labels, T)
+    prev_soc = np.c_[np.full(K, -1), soc[:, :-1]].ravel()
+    first = np.zeros((K, T))
+    first[:, 0] = -s0
+    n = K * T
+    l, p, e, s, c, d_up, d_dn, b_ch, b_dis, soc_flat = (a.ravel() for a in (l, p, e, s, c, d_up, d_dn, b_ch, b_dis, soc))
+
+    mb.add_rows(n, [(l, 1.0), (b_ch, 1.0), (p, -1.0), (e, -1.0), (b_dis, -eta_dis)], GRB.EQUAL, 0.0)
+    mb.add_rows(n, [(p, 1.0), (s, 1.0), (c, 1.0), (b_ch, 1.0)], GRB.EQUAL, P_pv.ravel())
+    mb.add_rows(n, [(l, 1.0)], GRB.LESS_EQUAL, np.broadcast_to(base["l_max_hour"], (K, T)).ravel())
+    mb.add_rows(n, [(l, 1.0), (d_up, -1.0), (d_dn, 1.0)], GRB.EQUAL, L_ref.ravel())
+    mb.add_rows(n, [(soc_flat, 1.0), (prev_soc, -1.0), (b_ch, -eta_ch), (b_dis, 1.0 / eta_dis),
+                    (E_cap, first.ravel())], GRB.EQUAL, 0.0)
+    mb.add_rows(n, [(soc_flat, 1.0), (E_cap, -1.0)], GRB.LESS_EQUAL, 0.0)
+    dt = np.tile(step_lengths(base), K)
+    mb.add_rows(2 * n, [(interleave(b_ch, b_dis), 1.0), (E_cap, interleave(-r_ch * dt, -r_dis * dt))],
+                GRB.LESS_EQUAL, 0.0)
+    mb.add_rows(K, [(soc[:, -1], 1.0), (E_cap, -sT)], GRB.EQUAL, 0.0)
+    return mb
@@ -1,25 +1,86 @@
+import os
+
+import numpy as np
 import gurobipy as gp
 from gurobipy import GRB
 
 class InputData:
-    def __init__(self, VARIABLES, objective_coeff, constraints_coeff, constraints_rhs, constraints_sense):
+    def __init__(self, VARIABLES, objective_coeff, constraints_coeff, constraints_rhs, constraints_sense,
+                 variable_types=None):
         self.VARIABLES = VARIABLES
         self.objective_coeff = objective_coeff
         self.constraints_coeff = constraints_coeff
         self.constraints_rhs = constraints_rhs
         self.constraints_sense = constraints_sense
+        # {var: GRB.BINARY / GRB.INTEGER}; variables not listed are continuous
+        self.variable_types = variable_types if variable_types is not None else {}
 
 class LP_OptimizationProblem:
 
-    def __init__(self, input_data: InputData): 
+    def __init__(self, input_data: InputData, params=None, param_cache=None, family=None,
+                 scale=False, strategy=None): 
         self.data = input_data 
         self.results = type("Expando", (), {})()  # simple dummy expando
+        # optional row/column/objective scaling (utils.scaling); results are reported unscaled
+        self.scaling = None
+        if scale:
+            from utils.scaling import scale_input_data
+            self.original_data = input_data
+            self.data, self.scaling = scale_input_data(input_data)
         self._build_model() 
+        # tuned parameters of this model family (utils.tuning.ParamCache, or $OPT_PARAM_CACHE)
+        if param_cache is None and os.environ.get("OPT_PARAM_CACHE"):
+            from utils.tuning import ParamCache
+            param_cache = ParamCache()
+        self.tuned = False
+        if param_cache is not None:
+            from utils.tuning import model_family
+            self.family = family or model_family(input_data)
+            self.tuned = param_cache.apply(self.model, self.family)
+        # Gurobi parameters, e.g. {"MIPGap": 1e-3, "TimeLimit": 30, "OutputFlag": 0}
+        self.params = dict(params or {})
+        for name, value in self.params.items():
+            self.model.setParam(name, value)
+        # LP algorithm choice (utils.strategy): a SolverStrategy (or $OPT_SOLVER_HISTORY) picks
+        # Method/Presolve/Crossover from recorded runtimes, a name from STRATEGIES fixes it
+        # an explicit strategy also applies to models with tuned parameters
+        self._strategy_explicit = strategy is not None
+        if strategy is None and os.environ.get("OPT_SOLVER_HISTORY"):
+            from utils.strategy import SolverStrategy
+            strategy = SolverStrategy()
+        if isinstance(strategy, str):
+            from utils.strategy import STRATEGIES
+            if strategy not in STRATEGIES:
+                raise ValueError(f"unknown strategy {strategy!r}, expected one of {sorted(STRATEGIES)}")
+        self.strategy = strategy
+        self.strategy_used = None
+        self._solves = 0
     
+    def _is_sparse(self):
+        # constraints_coeff is either {var: [coeff per row]} or a scipy.sparse matrix (rows x VARIABLES)
+        return hasattr(self.data.constraints_coeff, "tocsr")
+
     def _build_variables(self):
-        self.variables = {v: self.model.addVar(lb=0, name=v) for v in self.data.VARIABLES}
+        vtypes = self.data.variable_types
+        if self._is_sparse():
+            names = self.data.VARIABLES
+            self._x = self.model.addMVar(len(names), lb=0,
+                                         obj=np.array([self.data.objective_coeff[v] for v in names], dtype=float),
+                                         vtype=np.array([vtypes.get(v, GRB.CONTINUOUS) for v in names]),
+                                         name=names)
+            self.variables = dict(zip(names, self._x.tolist()))
+            return
+        self.variables = {v: self.model.addVar(lb=0, vtype=vtypes.get(v, GRB.CONTINUOUS), name=v)
+                          for v in self.data.VARIABLES}
     
     def _build_constraints(self):
+        if self._is_sparse():
+            constrs = self.model.addMConstr(self.data.constraints_coeff.tocsr(), self._x,
+                                            np.array(self.data.constraints_sense),
+                                            np.array(self.data.constraints_rhs, dtype=float),
+                                            name="constr")
+            self.constraints = constrs.tolist()
+            return
         self.constraints = []
         for i in range(len(self.data.constraints_rhs)):
             lhs = gp.quicksum(self.data.constraints_coeff[v][i] * self.variables[v] for v in self.data.VARIABLES)
@@ -30,6 +91,10 @@ class LP_OptimizationProblem:
             self.constraints.append(constr)
 
     def _build_objective_function(self):
+        if self._is_sparse():
+            # coefficients were set as Obj attributes in _build_variables
+            self.model.ModelSense = GRB.MINIMIZE
+            return
         objective = gp.quicksum(self.data.objective_coeff[v] * self.variables[v] for v in self.data.VARIABLES)
         self.model.setObjective(objective, GRB.MINIMIZE)
 
@@ -42,12 +107,116 @@ class LP_OptimizationProblem:
     
     def _save_results(self):
         self.results.objective_value = self.model.ObjVal
-        self.results.variables = {v: self.variables[v].X for v in self.data.VARIABLES}
-        self.results.duals = {f"constr[{i}]": self.constraints[i].Pi for i in range(len(self.constraints))}
+        names = self.data.VARIABLES
+        self.results.variables = dict(zip(names, self.model.getAttr("X", [self.variables[v] for v in names])))
+        if self.model.IsMIP:
+            # duals of the LP with all integer variables fixed at their optimal values
+            fixed = self.model.fixed()
+            fixed.Params.OutputFlag = 0
+            fixed.optimize()
+            source, constrs = fixed, fixed.getConstrs()
+            self.results.mip_gap = self.model.MIPGap
+        else:
+            source, constrs = self.model, self.constraints
+        pis = source.getAttr("Pi", constrs) if constrs else []
+        if self.scaling is not None:
+            sc = self.scaling
+            self.results.objective_value = sc.unscale_objective(self.results.objective_value)
+            self.results.variables = dict(zip(names, sc.unscale_primal(list(self.results.variables.values()))))
+            pis = sc.unscale_duals(pis) if len(pis) else pis
+        self.results.duals = {f"constr[{i}]": pi for i, pi in enumerate(pis)}
+
+    def export_model(self, path):
+        """
+        Write the model in a standard format chosen by the extension: .mps or .lp, plus
+        .gz/.bz2/.7z for compression (e.g. "model.mps.gz"). utils.tuning.read_input_data
+        reads it back.
+        """
+        self.model.update()
+        self.model.write(str(path))
+        return path
+
+    def set_mip_start(self, values):
+        """Warm-start a MIP from {var: value} (e.g. an LP schedule); unspecified vars are left free."""
+        names = list(values)
+        starts = np.array([float(values[v]) for v in names])
+        if self.scaling is not None:
+            # values are in original units, the model's columns are x' = x / s
+            col = dict(zip(self.data.VARIABLES, self.scaling.col))
+            starts = starts / np.array([col[v] for v in names])
+        self.model.setAttr("Start", [self.variables[v] for v in names], starts.tolist())
+
+    def sensitivity_report(self, constraint_blocks=None):
+        """
+        LP ranging of the last optimal solve, as numpy arrays.
+        Variables are grouped by family (the name before "[", e.g. "e", "soc", "E_cap"),
+        constraints by `constraint_blocks` ({name: indices}, see helpers.constraint_blocks);
+        without blocks all constraints form one family "constr".
+        Infinite range ends (GRB.INFINITY) are returned as +/- np.inf. With scale=True
+        all values are mapped back to the units of the original model.
+        """
+        def _arr(values):
+            a = np.array(values, dtype=float)
+            a[a >= GRB.INFINITY] = np.inf
+            a[a <= -GRB.INFINITY] = -np.inf
+            return a
+
+        names = self.data.VARIABLES
+        var_list = [self.variables[v] for v in names]
+        var_attrs = {attr: _arr(self.model.getAttr(attr, var_list))
+                     for attr in ["X", "Obj", "RC", "SAObjLow", "SAObjUp"]}
+        con_attrs = {attr: _arr(self.model.getAttr(attr, self.constraints))
+                     for attr in ["RHS", "Slack", "Pi", "SARHSLow", "SARHSUp"]}
+        if self.scaling is not None:
+            sc = self.scaling
+            var_attrs = {attr: sc.unscale_primal(vals) if attr == "X" else sc.unscale_costs(vals)
+                         for attr, vals in var_attrs.items()}
+            con_attrs = {attr: sc.unscale_duals(vals) if attr == "Pi" else sc.unscale_rows(vals)
+                         for attr, vals in con_attrs.items()}
+        families = {}
+        for i, v in enumerate(names):
+            families.setdefault(v.split("[")[0], []).append(i)
+        variables = {fam: {attr: vals[idx] for attr, vals in var_attrs.items()}
+                     for fam, idx in families.items()}
+
+        if constraint_blocks is None:
+            constraint_blocks = {"constr": np.arange(len(self.constraints))}
+        constraints = {name: {attr: vals[np.asarray(idx)] for attr, vals in con_attrs.items()}
+                       for name, idx in constraint_blocks.items()}
+
+        self.results.sensitivity = {"variables": variables, "constraints": constraints}
+        return self.results.sensitivity
+
+    def _apply_strategy(self):
+        """Set the LP algorithm for the next solve; returns (family, warm, name) or None."""
+        # MIPs and models with tuned parameter files keep their settings (unless asked explicitly)
+        if self.strategy is None or self.model.IsMIP or (self.tuned and not self._strategy_explicit):
+            return None
+        from utils.strategy import STRATEGIES
+        warm = self._solves > 0
+        if isinstance(self.strategy, str):
+            family, name = None, self.strategy
+        else:
+            from utils.tuning import model_family
+            family = getattr(self, "family", None) or model_family(self.data)
+            name = self.strategy.choose(family, self.model.NumNZs, warm)
+        for param, default in (("Method", -1), ("Presolve", -1), ("Crossover", -1)):
+            if param not in self.params:
+                self.model.setParam(param, STRATEGIES[name].get(param, default))
+        if any(param in self.params for param in ("Method", "Presolve", "Crossover")):
+            # explicit params replaced (part of) the strategy: the runtime is not the strategy's
+            name = "override"
+        self.strategy_used = name
+        return family, warm, name
 
     def run(self):
+        self.model.update()
+        choice = self._apply_strategy()
         self.model.optimize()
-        if self.model.status == GRB.OPTIMAL:
+        self._solves += 1
+        if choice is not None and choice[0] is not None:
+            self.strategy.record(*choice, self.model)
+        if self.model.status == GRB.OPTIMAL or (self.model.IsMIP and self.model.SolCount > 0):
             self._save_results()
         else:
             print(f"optimization of {self.model.ModelName} was not successful")
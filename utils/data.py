@@ -95,4 +95,191 @@ def prepare_base_inputs(appliance_params, bus_params, der_prod, usage_pref, task
         
         return dict(T=T, price=price, imp_tariff=imp_tariff, exp_tariff=exp_tariff,
                     P_pv=P_pv, l_max_hour=l_max_hour, L_ref=L_ref, 
-                    battery_params=battery_params)
\ No newline at end of file
+                    battery_params=battery_params)
+
+def _by_id(prefs, key, item_id):
+    """
+    Preference entry for item_id. A single entry is used for any id (as
+    prepare_base_inputs does); among several, a missing id raises ValueError.
+    """
+    prefs = prefs or [{}]
+    match = next((p for p in prefs if p.get(key) == item_id), None)
+    if match is not None:
+        return match
+    if len(prefs) > 1:
+        raise ValueError(f"no preferences with {key} = {item_id!r} among {[p.get(key) for p in prefs]}")
+    return prefs[0]
+
+
+def _consumer_appliances(appliance_params, consumer_params):
+    """appliance_params restricted to the consumer's list_appliances (all when it has none)."""
+    listed = (consumer_params or {}).get("list_appliances")
+    if not listed:
+        return appliance_params
+    # entries may hold several comma-separated ids ("FFL_01,BESS_01")
+    ids = {i.strip() for entry in listed for i in entry.split(",")}
+    keys = {"DER": "DER_id", "load": "load_id", "storage": "storage_id", "heat_pump": "heat_pump_id"}
+    out = dict(appliance_params)
+    for kind, key in keys.items():
+        items = appliance_params.get(kind) or []
+        items = [items] if isinstance(items, dict) else items
+        out[kind] = [item for item in items if item[key] in ids]
+    return out
+
+
+def prepare_component_inputs(appliance_params, bus_params, der_prod, usage_pref, consumer_params=None):
+    """
+    Base inputs for a consumer with any number of PV strings, loads and storages.
+    With consumer_params, only the components in its list_appliances are included.
+
+    Every component set is stored as arrays indexed (component, t) or (component,):
+        pv:      ids, P_pv (n_pv, T)
+        load:    ids, l_max_hour (n_load, T), L_ref (n_load, T)
+        storage: ids, capacity_kWh, max_charge_power_kW, max_discharge_power_kW,
+                 charge_efficiency, discharge_efficiency, initial_soc_ratio,
+                 final_soc_ratio (n_storage,)
+    der_prod may be one profile (shared by all PV strings) or a list of profiles
+    matched on "DER_id". Preferences are matched on load_id / storage_id.
+    """
+    appliance_params = _consumer_appliances(appliance_params, consumer_params)
+    T = len(bus_params["energy_price_DKK_per_kWh"])
+    price = np.array(bus_params["energy_price_DKK_per_kWh"])
+    imp_tariff = np.full(T, bus_params["import_tariff_DKK/kWh"])
+    exp_tariff = np.full(T, bus_params["export_tariff_DKK/kWh"])
+
+    profiles = der_prod if isinstance(der_prod, list) else [der_prod]
+    pvs = [d for d in appliance_params["DER"] or [] if d["DER_type"] == "PV"]
+    pv = dict(ids=[d["DER_id"] for d in pvs],
+              P_pv=np.array([d["max_power_kW"] * np.array(_by_id(profiles, "DER_id", d["DER_id"])["hourly_profile_ratio"])
+                             for d in pvs]).reshape(len(pvs), T))
+
+    loads = appliance_params["load"] or []
+    l_max = np.array([np.broadcast_to(np.asarray(l["max_load_kWh_per_hour"], dtype=float), (T,)) for l in loads]).reshape(len(loads), T)
+    ratios = []
+    for l in loads:
+        ratio = _by_id(usage_pref["load_preferences"], "load_id", l["load_id"]).get("hourly_profile_ratio")
+        if ratio is None:
+            raise ValueError(f"load {l['load_id']!r} has no hourly_profile_ratio in its preferences")
+        ratios.append(ratio)
+    ratios = np.array(ratios, dtype=float).reshape(len(loads), T)
+    load = dict(ids=[l["load_id"] for l in loads], l_max_hour=l_max, L_ref=ratios * l_max)
+
+    storages = appliance_params["storage"] or []
+    prefs = [_by_id(usage_pref["storage_preferences"], "storage_id", s["storage_id"]) for s in storages]
+    capacity = np.array([s["storage_capacity_kWh"] for s in storages], dtype=float)
+    storage = dict(ids=[s["storage_id"] for s in storages],
+                   capacity_kWh=capacity,
+                   max_charge_power_kW=capacity * np.array([s["max_charging_power_ratio"] for s in storages]),
+                   max_discharge_power_kW=capacity * np.array([s["max_discharging_power_ratio"] for s in storages]),
+                   charge_efficiency=np.array([s["charging_efficiency"] for s in storages], dtype=float),
+                   discharge_efficiency=np.array([s["discharging_efficiency"] for s in storages], dtype=float),
+                   initial_soc_ratio=np.array([p["initial_soc_ratio"] for p in prefs], dtype=float),
+                   final_soc_ratio=np.array([p["final_soc_ratio"] for p in prefs], dtype=float))
+
+    return dict(T=T, price=price, imp_tariff=imp_tariff, exp_tariff=exp_tariff,
+                pv=pv, load=load, storage=storage,
+                heat_pump=prepare_heat_pump_inputs(appliance_params, usage_pref, T))
+
+
+def _hourly(value, T):
+    return np.broadcast_to(np.asarray(value, dtype=float), (T,))
+
+
+def prepare_heat_pump_inputs(appliance_params, usage_pref, T):
+    """
+    Heat pumps heating a building's thermal mass (one-node RC model), as arrays indexed
+    (heat_pump, t) or (heat_pump,). appliance_params["heat_pump"] (one entry or a list):
+        heat_pump_id, max_electric_power_kW, thermal_capacitance_kWh_per_K,
+        heat_loss_kW_per_K, and either cop (scalar or hourly) or carnot_efficiency
+        (default 0.45) with supply_temperature_C (default 35)
+    usage_pref["heat_pump_preferences"], matched on heat_pump_id:
+        outdoor_temperature_C (hourly), initial_temperature_C, min_temperature_C and
+        max_temperature_C (comfort band, scalar or hourly), final_temperature_C
+        (default: the initial temperature)
+    Without heat pumps (null in the data) ids is empty.
+    """
+    pumps = appliance_params.get("heat_pump") or []
+    pumps = [pumps] if isinstance(pumps, dict) else pumps
+    prefs = [_by_id(usage_pref.get("heat_pump_preferences"), "heat_pump_id", h["heat_pump_id"]) for h in pumps]
+    n = len(pumps)
+
+    def stack(values):
+        return np.array([_hourly(v, T) for v in values]).reshape(n, T)
+
+    outdoor = stack([p["outdoor_temperature_C"] for p in prefs])
+    cop = []
+    for h, t_out in zip(pumps, outdoor):
+        if h.get("cop") is not None:
+            cop.append(_hourly(h["cop"], T))
+        else:
+            # Carnot COP of heating to the supply temperature, scaled by the heat pump's efficiency
+            supply = h.get("supply_temperature_C", 35.0)
+            carnot = (supply + 273.15) / np.maximum(supply - t_out, 5.0)
+            cop.append(np.maximum(h.get("carnot_efficiency", 0.45) * carnot, 1.0))
+    initial = np.array([p["initial_temperature_C"] for p in prefs], dtype=float)
+    return dict(ids=[h["heat_pump_id"] for h in pumps],
+                max_electric_power_kW=np.array([h["max_electric_power_kW"] for h in pumps], dtype=float),
+                capacitance_kWh_per_K=np.array([h["thermal_capacitance_kWh_per_K"] for h in pumps], dtype=float),
+                heat_loss_kW_per_K=np.array([h["heat_loss_kW_per_K"] for h in pumps], dtype=float),
+                cop=np.array(cop).reshape(n, T),
+                outdoor_temperature_C=outdoor,
+                initial_temperature_C=initial,
+                min_temperature_C=stack([p["min_temperature_C"] for p in prefs]),
+                max_temperature_C=stack([p["max_temperature_C"] for p in prefs]),
+                final_temperature_C=np.array([i if p.get("final_temperature_C") is None else p["final_temperature_C"]
+                                              for p, i in zip(prefs, initial)], dtype=float))
+
+
+# energy quantities of a base dict (per step); prices are per kWh and repeat/average instead
+_ENERGY_KEYS = ("P_pv", "L_ref", "l_max_hour")
+_PRICE_KEYS = ("price", "imp", "exp", "imp_tariff", "exp_tariff")
+
+
+def resample_base(base, steps_per_hour):
+    """
+    Hourly base inputs on a finer grid of steps_per_hour steps per hour (e.g. 4 for
+    15 minutes): energies per step are split evenly, prices repeat, base["dt"] is
+    the step length in hours and T the number of steps. L_min (daily energy) and
+    the battery power limits in kW are unchanged; builders scale power by dt.
+    """
+    n = int(steps_per_hour)
+    T = base["T"]
+    out = dict(base, T=T * n, dt=np.repeat(np.broadcast_to(np.asarray(base.get("dt", 1.0), dtype=float), (T,)) / n, n))
+    for key in _ENERGY_KEYS:
+        if key in base:
+            out[key] = np.repeat(np.broadcast_to(np.asarray(base[key], dtype=float), (T,)) / n, n)
+    for key in _PRICE_KEYS:
+        if key in base:
+            out[key] = np.repeat(np.asarray(base[key], dtype=float), n)
+    return out
+
+
+def resample_scenario(scenario, steps_per_hour):
+    """Scenario prices/tariffs (DKK/kWh) repeated onto the finer grid of resample_base."""
+    return {k: np.repeat(np.asarray(v, dtype=float), int(steps_per_hour)) for k, v in scenario.items()}
+
+
+def aggregate_steps(base, scenario, lengths):
+    """
+    Merge consecutive steps into blocks of the given lengths (in steps, summing to T):
+    energies are summed, prices averaged weighted by step length, dt summed.
+    Returns the (base, scenario) pair on the coarser, possibly non-uniform grid.
+    """
+    lengths = np.asarray(lengths, dtype=int)
+    if lengths.sum() != base["T"]:
+        raise ValueError(f"step lengths sum to {lengths.sum()}, expected T = {base['T']}")
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    dt = np.broadcast_to(np.asarray(base.get("dt", 1.0), dtype=float), (base["T"],))
+    dt_block = np.add.reduceat(dt, starts)
+
+    def mean_price(values):
+        return np.add.reduceat(np.asarray(values, dtype=float) * dt, starts) / dt_block
+
+    out = dict(base, T=len(lengths), dt=dt_block)
+    for key in _ENERGY_KEYS:
+        if key in base:
+            out[key] = np.add.reduceat(np.broadcast_to(np.asarray(base[key], dtype=float), (base["T"],)), starts)
+    for key in _PRICE_KEYS:
+        if key in base:
+            out[key] = mean_price(base[key])
+    return out, {k: mean_price(v) for k, v in scenario.items()}
@@ -1,19 +1,32 @@
 import json
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
 
 def results_to_dataframe(results, T):
     """Convert results.variables into a tidy DataFrame."""
     df = pd.DataFrame(index=range(T))
     for var, value in results.variables.items():
-        # var looks like "l[3]" or "e[10]"
+        # var looks like "l[3]" or "e[10]"; component variables "l[FFL_01,3]" are summed per hour
         name, idx = var.split("[")
-        t = int(idx.strip("]"))
-        df.loc[t, name] = value
+        t = int(idx.strip("]").split(",")[-1])
+        if "," in idx:
+            if name not in df:
+                df[name] = 0.0
+            df.loc[t, name] += value
+        else:
+            df.loc[t, name] = value
     return df.fillna(0.0)
 
+def component_results(results, mb):
+    """
+    Per-component schedules of a model assembled with SparseModelBuilder.add_components:
+    {family: DataFrame (T x component ids)}, e.g. out["soc"]["BESS_02"].
+    """
+    x = np.fromiter(results.variables.values(), dtype=float, count=len(results.variables))
+    return {name: pd.DataFrame(x[mb.cols[name]].T, columns=labels)
+            for name, labels in mb.labels.items()}
+
 def results_to_dataframe_2b(results, T):
     """
     Convert solver results into a DataFrame of time-series variables.
@@ -33,6 +46,22 @@ def results_to_dataframe_2b(results, T):
 
     return df.fillna(0)
 
+def clean_net_metering_arrays(e, s, p, l, tol=1e-6):
+    """
+    Vectorized net-metering cleanup on arrays of any shape, e.g. (T,), (consumers, T)
+    or (scenarios, T). Wherever import e and export s are both above tol, the common
+    part delta = min(e, s) is moved to self-consumption p and l is reset to p + e.
+    Returns new arrays (e, s, p, l).
+    """
+    e, s, p, l = (np.asarray(x, dtype=float) for x in (e, s, p, l))
+    mask = (e > tol) & (s > tol)
+    delta = np.where(mask, np.minimum(e, s), 0.0)
+    e_new = e - delta
+    s_new = s - delta
+    p_new = p + delta
+    l_new = np.where(mask, p_new + e_new, l)
+    return e_new, s_new, p_new, l_new
+
 def clean_net_metering_solution(df):
     """
     Post-process LP results for Net Metering scenario:
@@ -40,25 +69,21 @@ def clean_net_metering_solution(df):
     then use imports only for remaining load.
     """
     df_clean = df.copy()
-
-    for t in df_clean.index:
-        e = df_clean.loc[t, "e"]
-        s = df_clean.loc[t, "s"]
-        p = df_clean.loc[t, "p"]
-        l = df_clean.loc[t, "l"]
-
-        # If simultaneous import and export
-        if e > 1e-6 and s > 1e-6:
-            delta = min(e, s)
-            # Replace simultaneous flows:
-            df_clean.loc[t, "e"] = e - delta
-            df_clean.loc[t, "s"] = s - delta
-            df_clean.loc[t, "p"] = p + delta
-            # Keep load balance consistent: l = p + e (should still hold)
-            df_clean.loc[t, "l"] = df_clean.loc[t, "p"] + df_clean.loc[t, "e"]
-
+    e, s, p, l = clean_net_metering_arrays(df["e"], df["s"], df["p"], df["l"])
+    df_clean["e"], df_clean["s"], df_clean["p"], df_clean["l"] = e, s, p, l
     return df_clean
 
+def add_complementarity_penalty(input_data, eps=1e-6):
+    """
+    In-model alternative to clean_net_metering_solution: add a tiny cost eps on every
+    import e[t] and export s[t] so simultaneous import/export is never optimal
+    (e.g. under net metering) and no post-processing is needed. Modifies input_data.
+    """
+    for v in input_data.VARIABLES:
+        if v.startswith("e[") or v.startswith("s["):
+            input_data.objective_coeff[v] += eps
+    return input_data
+
 def collect_duals_from_problem(problem, T):
     """
     Collect relevant dual series (λ, ρ, κ, etc.) from the solved LP.
@@ -146,4 +171,71 @@ def decompose_daily_costs(df, price, imp, exp, gamma_up=1.0, gamma_down=1.0):
         "cash_cost": float(cash_cost),
         "discomfort_cost": float(discomfort_cost),
         "total_objective": float(total_objective),
-    }
\ No newline at end of file
+    }
+
+def constraint_blocks(task, T):
+    """
+    Constraint index arrays per family for the builders in utils.builders
+    (task "a", "b" or "c"), using the dual names of collect_duals_by_index.
+    """
+    t = np.arange(T)
+    if task == "a":
+        return {"mu": np.array([0]), "lambda": 1 + t, "rho": T + 1 + t, "nu": 2*T + 1 + t}
+    blocks = {"lambda": t, "rho": T + t, "nu": 2*T + t, "delta": 3*T + t}
+    if task == "c":
+        blocks.update({
+            "alpha": 4*T + 2*t,            # b_ch ≤ Pch_max (interleaved with beta)
+            "beta": 4*T + 2*t + 1,         # b_dis ≤ Pdis_max
+            "kappa": 6*T + t,              # SOC dynamics
+            "omega_up": 7*T + 2*t,         # SOC ≤ cap (interleaved with omega_low)
+            "omega_low": 7*T + 2*t + 1,    # SOC ≥ 0
+            "sigma": np.array([9*T]),      # final SOC
+        })
+    return blocks
+
+def price_tolerance_bands(problem, scenario):
+    """
+    Per-hour ranges of price, import and export tariff over which the current
+    optimal basis (hence the schedule) of a solved 1a/1b/1c model stays optimal.
+
+    Import/export tariffs each move one cost coefficient (e_t resp. s_t), so their
+    bands are the exact objective ranging intervals. The energy price moves e_t, s_t
+    and d±_t at once (d± scaled by gamma = coeff / price), so its band uses the
+    100% rule: a conservative interval in which the basis is guaranteed optimal.
+    """
+    sens = problem.sensitivity_report()["variables"]
+    price = np.asarray(scenario["price"], dtype=float)
+    imp = np.asarray(scenario["imp"], dtype=float)
+    exp = np.asarray(scenario["exp"], dtype=float)
+
+    # d(coeff)/d(price) per family
+    slopes = {"e": np.ones_like(price), "s": -np.ones_like(price)}
+    for fam in ["d+", "d-"]:
+        if fam in sens:
+            slopes[fam] = np.divide(sens[fam]["Obj"], price,
+                                    out=np.zeros_like(price), where=price != 0)
+
+    # 100% rule: sum_k |a_k| * dp / allowance_k <= 1 in each direction
+    load_up = np.zeros_like(price)
+    load_dn = np.zeros_like(price)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        for fam, a in slopes.items():
+            room_up = sens[fam]["SAObjUp"] - sens[fam]["Obj"]
+            room_dn = sens[fam]["Obj"] - sens[fam]["SAObjLow"]
+            load_up += np.where(a > 0, a / room_up, np.where(a < 0, -a / room_dn, 0.0))
+            load_dn += np.where(a > 0, a / room_dn, np.where(a < 0, -a / room_up, 0.0))
+        dp_up = np.where(load_up > 0, 1.0 / load_up, np.inf)
+        dp_dn = np.where(load_dn > 0, 1.0 / load_dn, np.inf)
+
+    e, s = sens["e"], sens["s"]
+    return pd.DataFrame({
+        "price": price,
+        "price_low": price - dp_dn,
+        "price_up": price + dp_up,
+        "imp": imp,
+        "imp_low": imp + e["SAObjLow"] - e["Obj"],
+        "imp_up": imp + e["SAObjUp"] - e["Obj"],
+        "exp": exp,
+        "exp_low": exp + s["SAObjLow"] - s["Obj"],
+        "exp_up": exp + s["SAObjUp"] - s["Obj"],
+    }, index=pd.RangeIndex(len(price), name="hour"))
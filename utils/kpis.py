@@ -0,0 +1,120 @@
+import numpy as np
+import pandas as pd
+
+# default variable groups, in the order used by the 1c builder
+GROUPS = ["l", "p", "e", "s", "c", "d+", "d-", "b_ch", "b_dis", "soc"]
+
+
+def _per_case(a):
+    """Broadcast (T,), (S, T) or (S, C, T) inputs against result tensors (S, C, T)."""
+    a = np.asarray(a, dtype=float)
+    return a[:, None, :] if a.ndim == 2 else a
+
+
+def dataframes_to_tensor(dfs, groups=GROUPS):
+    """
+    Stack per-scenario result DataFrames (from results_to_dataframe) into a
+    (S, 1, G, T) tensor; groups missing from a DataFrame are zero.
+    """
+    T = max(len(df) for df in dfs)
+    X = np.zeros((len(dfs), 1, len(groups), T))
+    for i, df in enumerate(dfs):
+        for g, name in enumerate(groups):
+            if name in df:
+                X[i, 0, g, :len(df)] = df[name].to_numpy()
+    return X
+
+
+def degradation_cost(step_values, breakpoints, marginal_costs):
+    """
+    Convex piecewise-linear degradation cost (as in add_degradation_cost) summed over
+    the last (time) axis. step_values: per-step throughput b_ch + b_dis (or
+    capacity - soc), any leading shape. As in the model, each segment is capped at
+    its width, so values beyond the last breakpoint add no further cost.
+    """
+    x = np.asarray(step_values, dtype=float)[..., None]
+    breakpoints = np.asarray(breakpoints, dtype=float)
+    lower = np.r_[0.0, breakpoints[:-1]]
+    widths = breakpoints - lower
+    fill = np.clip(x - lower, 0.0, widths)
+    return (fill * np.asarray(marginal_costs, dtype=float)).sum(axis=(-1, -2))
+
+
+def compute_kpis(X, price, imp, exp, groups=GROUPS, lambdas=None,
+                 gamma_up=1.0, gamma_down=1.0, capacity=None, degradation=None,
+                 scenario_names=None, consumer_names=None):
+    """
+    KPIs for a result tensor X of shape (scenario, consumer, group, T) in one vectorized pass.
+
+    price, imp, exp: (T,), (S, T) or (S, C, T)
+    lambdas:         optional load-balance duals, (S, C, T)
+    gamma_up/down:   discomfort multipliers (scalars or broadcastable to (S, C))
+    capacity:        battery capacity in kWh (scalar or (S, C)) for equivalent full cycles
+    degradation:     optional (breakpoints, marginal_costs) of the throughput-based cycle
+                     cost; adds degradation_cost and includes it in total_objective
+
+    Returns a tidy DataFrame with one row per (scenario, consumer).
+    Cost definitions follow decompose_daily_costs.
+    """
+    X = np.asarray(X, dtype=float)
+    S, C, _, T = X.shape
+    zeros = np.zeros((S, C, T))
+    pos = {name: g for g, name in enumerate(groups)}
+
+    def var(name):
+        return X[:, :, pos[name], :] if name in pos else zeros
+
+    price, imp, exp = _per_case(price), _per_case(imp), _per_case(exp)
+    e, s, p, c = var("e"), var("s"), var("p"), var("c")
+    d_up, d_dn = var("d+"), var("d-")
+    b_ch, b_dis = var("b_ch"), var("b_dis")
+
+    cash_cost = ((price + imp) * e - (price - exp) * s).sum(axis=-1)
+    discomfort_cost = (price * d_up).sum(axis=-1) * gamma_up + (price * d_dn).sum(axis=-1) * gamma_down
+
+    # PV split: p + s + c (+ b_ch) = P_pv
+    pv_gen = (p + s + c + b_ch).sum(axis=-1)
+    curtailed = c.sum(axis=-1)
+    self_consumed = pv_gen - s.sum(axis=-1) - curtailed
+
+    charged = b_ch.sum(axis=-1)
+    discharged = b_dis.sum(axis=-1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        cols = {
+            "cash_cost": cash_cost,
+            "discomfort_cost": discomfort_cost,
+            "total_objective": cash_cost + discomfort_cost,
+            "total_import": e.sum(axis=-1),
+            "total_export": s.sum(axis=-1),
+            "total_load": var("l").sum(axis=-1),
+            "pv_generation": pv_gen,
+            "self_consumption": self_consumed,
+            "self_consumption_ratio": np.where(pv_gen > 0, self_consumed / pv_gen, np.nan),
+            "curtailment": curtailed,
+            "curtailment_ratio": np.where(pv_gen > 0, curtailed / pv_gen, np.nan),
+            "total_deviation": (d_up + d_dn).sum(axis=-1),
+            "battery_charge": charged,
+            "battery_discharge": discharged,
+            "battery_throughput": charged + discharged,
+            "battery_cycles": (discharged / capacity if capacity is not None
+                               else np.full((S, C), np.nan)),
+        }
+    if degradation is not None:
+        cols["degradation_cost"] = degradation_cost(b_ch + b_dis, *degradation)
+        cols["total_objective"] = cols["total_objective"] + cols["degradation_cost"]
+    if lambdas is not None:
+        lam = np.asarray(lambdas, dtype=float)
+        cols.update({
+            "lambda_mean": lam.mean(axis=-1),
+            "lambda_min": lam.min(axis=-1),
+            "lambda_max": lam.max(axis=-1),
+            "lambda_std": lam.std(axis=-1),
+        })
+
+    index = pd.MultiIndex.from_product(
+        [scenario_names if scenario_names is not None else range(S),
+         consumer_names if consumer_names is not None else range(C)],
+        names=["scenario", "consumer"])
+    return pd.DataFrame({k: np.broadcast_to(v, (S, C)).ravel() for k, v in cols.items()},
+                        index=index)
@@ -1,8 +1,53 @@
+import functools
+
+import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 
+import utils.aggregation as aggregation
+from utils.lazy import LazyModule
+
+# pyplot is imported on first use so the solver path never loads matplotlib
+plt = LazyModule("matplotlib.pyplot")
+
+# Font sizes of the single-scenario plots; applied per call via rc_context
+# instead of mutating the global rcParams.
+PLOT_STYLE = {
+    "font.size": 14,
+    "axes.titlesize": 16,
+    "axes.labelsize": 14,
+    "xtick.labelsize": 12,
+    "ytick.labelsize": 12,
+    "legend.fontsize": 12,
+}
+
+
+def _styled(func):
+    """Run a plot function inside plt.rc_context(PLOT_STYLE)."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with plt.rc_context(PLOT_STYLE):
+            return func(*args, **kwargs)
+    return wrapper
+
+
+def _finish(fig, show=True, save_path=None, dpi=None):
+    """
+    Common ending of all plot functions: optionally save the figure (format from the
+    file suffix, e.g. .png/.svg/.pdf), then either show it (interactive use, returns
+    None) or hand the Figure back to the caller (batch use, show=False).
+    """
+    if save_path is not None:
+        fig.savefig(save_path, dpi=dpi)
+    if show:
+        plt.show()
+        return None
+    return fig
+
+
+@_styled
 def plot_hourly_flows_with_prices(df, scenario_name, duals=None,
-                                  price=None, alpha=None, beta=None, ylim=(0,3)):
+                                  price=None, alpha=None, beta=None, ylim=(0,3),
+                                  show=True, save_path=None):
     rename = {
         "l": "Load",
         "p": "PV self-consumed",
@@ -23,15 +68,6 @@ def plot_hourly_flows_with_prices(df, scenario_name, duals=None,
     width = 0.25
     bar_alpha = 0.85
 
-    plt.rcParams.update({
-        "font.size": 14,
-        "axes.titlesize": 16,
-        "axes.labelsize": 14,
-        "xtick.labelsize": 12,
-        "ytick.labelsize": 12,
-        "legend.fontsize": 12,
-    })
-
     fig, ax1 = plt.subplots(figsize=(14,6))
 
     # --- Group 1: PV generation (stacked) ---
@@ -97,10 +133,11 @@ def plot_hourly_flows_with_prices(df, scenario_name, duals=None,
                    ncol=5, frameon=False)
 
     plt.tight_layout()
-    plt.show()
+    return _finish(fig, show, save_path)
 
 
-def plot_scenarios_subplots_1a(scenario_results, titles, price_list, alpha_list, beta_list, duals_list):
+def plot_scenarios_subplots_1a(scenario_results, titles, price_list, alpha_list, beta_list, duals_list,
+                               show=True, save_path=None):
     """
     scenario_results: list of DataFrames (from results_to_dataframe)
     titles:           list of scenario names
@@ -198,12 +235,13 @@ def plot_scenarios_subplots_1a(scenario_results, titles, price_list, alpha_list,
                ncol=5, frameon=False)
 
     plt.tight_layout(rect=[0, 0.05, 1, 1])  # leave space for legend
-    plt.show()
+    return _finish(fig, show, save_path)
 
 
+@_styled
 def plot_hourly_flows_with_prices_1b(df, scenario_name, duals=None,
                                   price=None, alpha=None, beta=None, L_ref=None, # NEW: Add L_ref
-                                  ylim=(0,3)):
+                                  ylim=(0,3), show=True, save_path=None):
     rename = {
         "l": "Load",
         "p": "PV self-consumed",
@@ -226,15 +264,6 @@ def plot_hourly_flows_with_prices_1b(df, scenario_name, duals=None,
     width = 0.25
     bar_alpha = 0.85
 
-    plt.rcParams.update({
-        "font.size": 14,
-        "axes.titlesize": 16,
-        "axes.labelsize": 14,
-        "xtick.labelsize": 12,
-        "ytick.labelsize": 12,
-        "legend.fontsize": 12,
-    })
-
     fig, ax1 = plt.subplots(figsize=(14,6))
 
     # --- Group 1: PV generation (stacked) ---
@@ -314,9 +343,9 @@ def plot_hourly_flows_with_prices_1b(df, scenario_name, duals=None,
                    ncol=5, frameon=False)
 
     plt.tight_layout()
-    plt.show()
+    return _finish(fig, show, save_path)
 
-def plot_sensitivity_analysis_1b(sensitivity_df):
+def plot_sensitivity_analysis_1b(sensitivity_df, show=True, save_path=None):
     """Plots the results of the kappa sensitivity analysis."""
     
     fig, ax1 = plt.subplots(figsize=(12, 7))
@@ -346,12 +375,12 @@ def plot_sensitivity_analysis_1b(sensitivity_df):
     ax2.legend(lines1 + lines2, labels1 + labels2, loc="best")
     
     plt.tight_layout(rect=[0, 0, 1, 0.96])
-    plt.show()
+    return _finish(fig, show, save_path)
 
 
 def plot_scenarios_subplots_1b(
     scenario_results, titles, price_list, alpha_list, beta_list,
-    duals_list, L_ref_list=None, ylim=(0,6.5)
+    duals_list, L_ref_list=None, ylim=(0,6.5), show=True, save_path=None
 ):
     """
     Create vertically stacked subplots for all scenarios (no battery).
@@ -461,12 +490,13 @@ def plot_scenarios_subplots_1b(
                loc="lower center", bbox_to_anchor=(0.5, -0.0125),
                ncol=5, frameon=False)
     plt.tight_layout(rect=[0, 0.05, 1, 1])
-    plt.show()
+    return _finish(fig, show, save_path)
 
+@_styled
 def plot_hourly_flows_with_prices_1c(df, scenario_name, duals=None,
                                   price=None, alpha=None, beta=None, L_ref=None, # NEW: Add L_ref
                                   ylim=(0,6.5),
-                                  show_battery=True):
+                                  show_battery=True, show=True, save_path=None):
     rename = {
         "l": "Load",
         "p": "PV to bus",
@@ -492,15 +522,6 @@ def plot_hourly_flows_with_prices_1c(df, scenario_name, duals=None,
     width = 0.25
     bar_alpha = 0.85
 
-    plt.rcParams.update({
-        "font.size": 14,
-        "axes.titlesize": 16,
-        "axes.labelsize": 14,
-        "xtick.labelsize": 12,
-        "ytick.labelsize": 12,
-        "legend.fontsize": 12,
-    })
-
     fig, ax1 = plt.subplots(figsize=(14,6))
 
     # --- Group 1: PV generation (stacked) ---
@@ -599,12 +620,12 @@ def plot_hourly_flows_with_prices_1c(df, scenario_name, duals=None,
                    ncol=5, frameon=False)
 
     plt.tight_layout()
-    plt.show()
+    return _finish(fig, show, save_path)
 
 
 def plot_scenarios_subplots_1c(
     scenario_results, titles, price_list, alpha_list, beta_list,
-    duals_list, L_ref_list=None, ylim=(0,6.5)
+    duals_list, L_ref_list=None, ylim=(0,6.5), show=True, save_path=None
 ):
     """
     Create vertically stacked subplots for all scenarios, including battery behavior.
@@ -729,4 +750,90 @@ def plot_scenarios_subplots_1c(
                loc="lower center", bbox_to_anchor=(0.5, -0.0125),
                ncol=5, frameon=False)
     plt.tight_layout(rect=[0, 0.05, 1, 1])
-    plt.show()
\ No newline at end of file
+    return _finish(fig, show, save_path)
+
+
+def plot_long_horizon(df, duals=None, freq="D", start="2025-01-01", n_buckets=1000,
+                      show=True, save_path=None):
+    """
+    Year-long (or longer) variant of the hourly flow plot: flows are rolled up to
+    `freq` periods ("D", "W", "M") and drawn as stacked stairs, λ / SOC are min/max
+    downsampled to at most 2 * n_buckets points.
+    """
+    T = len(df)
+    names = ["p", "s", "c", "l", "e"]
+    flows = np.vstack([df[n].to_numpy(dtype=float) if n in df else np.zeros(T) for n in names])
+    agg, labels = aggregation.rollup(flows, freq=freq, start=start)
+    p, s, c, l, e = agg
+    x = np.arange(len(labels))
+    edges = np.r_[x, len(x)] - 0.5
+
+    has_soc = "soc" in df
+    fig, axes = plt.subplots(nrows=2 if has_soc else 1, ncols=1,
+                             figsize=(14, 8 if has_soc else 5), squeeze=False)
+    ax1 = axes[0, 0]
+    # one stairs artist per series instead of one bar per period keeps rendering cheap
+    ax1.stairs(p, edges, fill=True, label="PV self-consumed", color="gold", alpha=0.85)
+    ax1.stairs(p + s, edges, baseline=p, fill=True, label="PV exported", color="forestgreen", alpha=0.85)
+    ax1.stairs(p + s + c, edges, baseline=p + s, fill=True, label="PV curtailed", color="lightgray", alpha=0.85)
+    ax1.stairs(l, edges, label="Load", color="royalblue", linewidth=1.5)
+    ax1.stairs(e, edges, label="Grid imports", color="firebrick", linewidth=1.5)
+    ax1.set_ylabel("Energy per period (kWh)")
+    ax1.set_xlim(-0.5, len(x) - 0.5)
+    step = max(1, len(x) // 12)
+    ax1.set_xticks(x[::step])
+    ax1.set_xticklabels([str(label.date()) for label in labels[::step]], rotation=30, ha="right")
+    ax1.grid(True, which="both", axis="y", linestyle="--", alpha=0.6)
+    handles, legend_labels = ax1.get_legend_handles_labels()
+
+    if duals is not None:
+        # map hourly positions onto the period axis for the secondary λ line
+        ax2 = ax1.twinx()
+        idx, lam = aggregation.minmax_downsample(-np.asarray(duals, dtype=float), n_buckets)
+        starts = aggregation.period_starts(T, freq=freq, start=start)[0]
+        pos = np.searchsorted(starts, idx, side="right") - 1
+        frac = (idx - starts[pos]) / np.diff(np.r_[starts, T])[pos]
+        ax2.plot(pos - 0.5 + frac, lam, color="purple", linewidth=1, label="Internal price (−λ)")
+        ax2.set_ylabel("Price (DKK/kWh)")
+        h2, l2 = ax2.get_legend_handles_labels()
+        handles, legend_labels = handles + h2, legend_labels + l2
+
+    ax1.legend(handles, legend_labels, loc="upper center", bbox_to_anchor=(0.5, -0.25),
+               ncol=6, frameon=False)
+
+    if has_soc:
+        ax3 = axes[1, 0]
+        idx, soc = aggregation.minmax_downsample(df["soc"].to_numpy(dtype=float), n_buckets)
+        ax3.plot(idx, soc, color="black", linewidth=1, label="Battery SOC (kWh)")
+        ax3.set_xlim(0, T - 1)
+        ax3.set_xlabel("Hour")
+        ax3.set_ylabel("SOC (kWh)")
+        ax3.grid(True, linestyle="--", alpha=0.6)
+
+    plt.tight_layout()
+    return _finish(fig, show, save_path)
+
+
+def plot_fleet_bands(values, label, freq="D", how="sum", start="2025-01-01", q=(5, 25, 50, 75, 95),
+                     show=True, save_path=None):
+    """
+    Percentile bands across consumers for a (consumers, T) array (e.g. imports or λ),
+    rolled up to `freq` periods per consumer before taking percentiles.
+    """
+    agg, labels = aggregation.rollup(values, freq=freq, how=how, start=start)
+    bands = aggregation.percentile_bands(agg, q=q, axis=0)
+    x = labels.to_pydatetime()
+
+    fig, ax = plt.subplots(figsize=(14, 5))
+    n = len(q)
+    for k in range(n // 2):
+        ax.fill_between(x, bands[k], bands[n - 1 - k], color="royalblue",
+                        alpha=0.15 + 0.15 * k, linewidth=0, label=f"P{q[k]}–P{q[n - 1 - k]}")
+    if n % 2 == 1:
+        ax.plot(x, bands[n // 2], color="navy", linewidth=1.5, label=f"P{q[n // 2]}")
+    ax.set_ylabel(label)
+    ax.grid(True, linestyle="--", alpha=0.6)
+    ax.legend(loc="upper right", frameon=False)
+    fig.autofmt_xdate()
+    plt.tight_layout()
+    return _finish(fig, show, save_path)
@@ -0,0 +1,111 @@
+import numpy as np
+
+FEATURE_KEYS = ("price", "P_pv", "L_ref")
+
+
+def scenario_features(ensemble, keys=FEATURE_KEYS, standardize=True):
+    """
+    (S, F) feature matrix from the (S, T) arrays of an ensemble (e.g. a
+    ScenarioGenerator chunk). With standardize, every key is divided by its overall
+    standard deviation so price, PV and load weigh in on a comparable scale.
+    """
+    blocks = []
+    for key in keys:
+        if key not in ensemble:
+            continue
+        x = np.asarray(ensemble[key], dtype=float)
+        scale = x.std() if standardize else 1.0
+        blocks.append(x / scale if scale > 0 else x)
+    return np.hstack(blocks)
+
+
+def pairwise_distances(X, Y=None):
+    """Euclidean distances (len(X), len(Y)) via |x|^2 + |y|^2 - 2 x.y."""
+    Y = X if Y is None else Y
+    sq = (X ** 2).sum(axis=1)[:, None] + (Y ** 2).sum(axis=1)[None, :] - 2.0 * X @ Y.T
+    return np.sqrt(np.maximum(sq, 0.0))
+
+
+def _weights_and_distance(D, probs, selected):
+    """Redistribute every scenario's probability to its nearest selected one."""
+    nearest = np.argmin(D[:, selected], axis=1)
+    weights = np.bincount(nearest, weights=probs, minlength=len(selected))
+    distance = float(probs @ D[np.arange(len(D)), np.asarray(selected)[nearest]])
+    return weights, distance
+
+
+def fast_forward_selection(D, k, probs):
+    """
+    Fast forward selection (Heitsch & Römisch): greedily add the scenario that most
+    reduces the probability-weighted distance to the selected set. O(k S^2).
+    """
+    S = len(D)
+    current = np.full(S, np.inf)
+    selected = []
+    candidate = np.ones(S, dtype=bool)
+    for _ in range(k):
+        # cost[u] = sum_i p_i min(current_i, D[i, u])
+        cost = probs @ np.minimum(current[:, None], D)
+        cost[~candidate] = np.inf
+        u = int(np.argmin(cost))
+        selected.append(u)
+        candidate[u] = False
+        current = np.minimum(current, D[:, u])
+    return selected
+
+
+def k_medoids(D, k, probs, init=None, max_iter=100):
+    """
+    Weighted k-medoids by alternating assignment and medoid update, started from
+    `init` (default: fast forward selection). Never increases the distance of `init`.
+    """
+    medoids = np.array(fast_forward_selection(D, k, probs) if init is None else init)
+    for _ in range(max_iter):
+        labels = np.argmin(D[:, medoids], axis=1)
+        new = medoids.copy()
+        for j in range(k):
+            members = np.flatnonzero(labels == j)
+            if len(members):
+                new[j] = members[np.argmin(probs[members] @ D[np.ix_(members, members)])]
+        if np.array_equal(new, medoids):
+            break
+        medoids = new
+    return list(medoids)
+
+
+def reduce_scenarios(ensemble, k, probs=None, method="forward", keys=FEATURE_KEYS):
+    """
+    Reduce S scenarios to k weighted representatives.
+
+    ensemble: dict of (S, T) arrays (price, P_pv, L_ref, ...) or an (S, F) feature array.
+    probs:    scenario probabilities (default uniform).
+    method:   "forward" (fast forward selection) or "kmedoids".
+
+    Returns dict(indices, weights, distance, relative_distance, reduced) where
+    distance is the Kantorovich (transport) distance between the full and the reduced
+    distribution in feature space, the error bound of the reduction, relative_distance
+    that distance over the one of a single representative, and reduced the ensemble
+    restricted to the selected scenarios (ready for builders.assemble_2b_stochastic).
+    Memory is O(S^2); reduce large ensembles chunk-wise or pre-select with "forward".
+    """
+    X = scenario_features(ensemble, keys) if isinstance(ensemble, dict) else np.asarray(ensemble, dtype=float)
+    S = len(X)
+    if not 1 <= k <= S:
+        raise ValueError(f"k must be between 1 and {S}")
+    probs = np.full(S, 1.0 / S) if probs is None else np.asarray(probs, dtype=float) / np.sum(probs)
+    D = pairwise_distances(X)
+
+    if method == "forward":
+        selected = fast_forward_selection(D, k, probs)
+    elif method == "kmedoids":
+        selected = k_medoids(D, k, probs)
+    else:
+        raise ValueError(f"unknown reduction method {method!r}")
+
+    weights, distance = _weights_and_distance(D, probs, selected)
+    _, one = _weights_and_distance(D, probs, fast_forward_selection(D, 1, probs))
+    reduced = None
+    if isinstance(ensemble, dict):
+        reduced = {key: np.asarray(v)[selected] for key, v in ensemble.items() if np.ndim(v) >= 1 and len(v) == S}
+    return dict(indices=np.array(selected), weights=weights, distance=distance,
+                relative_distance=distance / one if one > 0 else 0.0, reduced=reduced)
@@ -0,0 +1,189 @@
+import functools
+import itertools
+
+import numpy as np
+from gurobipy import GRB
+
+import utils.builders as builders
+import utils.classes as classes
+
+
+def _reusable_problem(input_data):
+    # the model and its variables in VARIABLES order, whose objective is rewritten per theta
+    problem = classes.LP_OptimizationProblem(input_data, params={"OutputFlag": 0})
+    return problem, [problem.variables[v] for v in input_data.VARIABLES]
+
+
+class PriceResponseTable:
+    """
+    Precomputed household response to prices of the form
+        price(t) = sum_j theta_j * price_basis[j, t]
+    on a grid of theta (e.g. a price level times a few shapes), for instant lookups.
+
+    Prices only enter the objective of the 1b/1c/2b models, so the feasible set is
+    the same for every grid point and the optimal schedule is piecewise constant in
+    theta (constant while the optimal basis stays the same), with duals linear in
+    theta inside each basis region. Hence lookup():
+      - all 2^d cell corners share one schedule -> it is optimal in the whole cell (the
+        objective is linear in theta); the duals are exact if the corners also share
+        the basis, interpolated otherwise;
+      - mixed bases -> multilinear interpolation of the corner schedules, which is
+        feasible (convex combination) and near-optimal;
+      - theta outside the grid -> a real solve of the reused model.
+    Distinct schedules are stored once and indexed from the grid.
+    """
+
+    def __init__(self, axes, price_basis, variables, schedules, schedule_id, basis_id, duals,
+                 objective, c0, dc, dual_rows, problem_factory=None):
+        self.axes = [np.asarray(a, dtype=float) for a in axes]
+        self.price_basis = np.asarray(price_basis, dtype=float)
+        self.variables = list(variables)
+        self.schedules = schedules          # (n_unique, V)
+        self.schedule_id = schedule_id      # grid shape -> row of schedules
+        self.basis_id = basis_id            # grid shape -> optimal basis region
+        self.duals = duals                  # grid shape + (n_duals,)
+        self.objective = objective          # grid shape
+        self._c0, self._dc = c0, dc         # objective coefficients c0 + theta @ dc
+        self._dual_rows = dual_rows
+        self._problem_factory = problem_factory
+        self._fallback = None
+
+    # --- offline -------------------------------------------------------------
+
+    @classmethod
+    def build(cls, base, scenario, price_basis, axes, builder=builders.build_input_data_1c,
+              builder_kwargs=None, dual_rows=None):
+        """
+        Solve the household model on the full grid `axes` (one array of theta values per
+        row of price_basis), re-using one model and only rewriting objective coefficients.
+        dual_rows: constraint rows whose duals are stored (default: the T load-balance rows,
+        which follow the daily minimum-load row in the 1a model).
+        """
+        builder_kwargs = builder_kwargs or {}
+        price_basis = np.atleast_2d(np.asarray(price_basis, dtype=float))
+        T = base["T"]
+        if dual_rows is None:
+            offset = 1 if builder is builders.build_input_data_1a else 0
+            dual_rows = np.arange(offset, T + offset)
+        dual_rows = np.asarray(dual_rows)
+
+        def objective_of(price):
+            data = builder(base, dict(scenario, price=price), **builder_kwargs)
+            return data, np.array([data.objective_coeff[v] for v in data.VARIABLES], dtype=float)
+
+        # the objective is affine in the price: c(theta) = c0 + sum_j theta_j * dc_j
+        input_data, c0 = objective_of(np.zeros(T))
+        dc = np.array([objective_of(b)[1] - c0 for b in price_basis])
+
+        factory = functools.partial(_reusable_problem, input_data)
+        problem, var_list = factory()
+        model = problem.model
+        constrs = [problem.constraints[i] for i in dual_rows]
+
+        shape = tuple(len(a) for a in axes)
+        schedules, schedule_index, bases = [], {}, {}
+        schedule_id = np.full(shape, -1, dtype=np.int32)
+        basis_id = np.full(shape, -1, dtype=np.int32)
+        duals = np.full(shape + (len(dual_rows),), np.nan, dtype=np.float32)
+        objective = np.full(shape, np.nan)
+        for idx in itertools.product(*(range(n) for n in shape)):
+            theta = np.array([axes[j][i] for j, i in enumerate(idx)])
+            model.setAttr("Obj", var_list, (c0 + theta @ dc).tolist())
+            model.optimize()
+            if model.Status != GRB.OPTIMAL:
+                continue
+            x = np.round(np.array(model.getAttr("X", var_list)), 9)
+            sched_key = x.tobytes()
+            if sched_key not in schedule_index:
+                schedule_index[sched_key] = len(schedules)
+                schedules.append(x)
+            basis_key = (bytes(np.array(model.getAttr("VBasis", var_list), dtype=np.int8)),
+                         bytes(np.array(model.getAttr("CBasis", problem.constraints), dtype=np.int8)))
+            schedule_id[idx] = schedule_index[sched_key]
+            basis_id[idx] = bases.setdefault(basis_key, len(bases))
+            duals[idx] = model.getAttr("Pi", constrs)
+            objective[idx] = model.ObjVal
+
+        table = cls(axes, price_basis, input_data.VARIABLES, np.array(schedules), schedule_id,
+                    basis_id, duals, objective, c0, dc, dual_rows, problem_factory=factory)
+        table._fallback = (problem, var_list)
+        return table
+
+    # --- online --------------------------------------------------------------
+
+    def lookup(self, theta):
+        """
+        Schedule for price parameters theta (d,): dict(x (V,), duals, objective, source)
+        with source "table" (exact), "interpolated" or "solve" (outside the grid).
+        """
+        theta = np.asarray(theta, dtype=float)
+        lo, w = [], []
+        for a, t in zip(self.axes, theta):
+            if not a[0] <= t <= a[-1]:
+                return self.solve(theta)
+            i = min(np.searchsorted(a, t, side="right") - 1, len(a) - 2) if len(a) > 1 else 0
+            lo.append(i)
+            w.append(0.0 if len(a) == 1 else (t - a[i]) / (a[i + 1] - a[i]))
+
+        corners, weights = [], []
+        for offs in itertools.product(*((0, 1) if len(a) > 1 else (0,) for a in self.axes)):
+            corners.append(tuple(i + o for i, o in zip(lo, offs)))
+            weights.append(np.prod([wj if o else 1.0 - wj for wj, o in zip(w, offs)]))
+        weights = np.array(weights)
+        ids = np.array([self.schedule_id[c] for c in corners])
+        if np.any(ids < 0):
+            return self.solve(theta)
+        duals = np.tensordot(weights, np.array([self.duals[c] for c in corners], dtype=float), axes=1)
+        if np.all(ids == ids[0]):
+            x = self.schedules[ids[0]]
+            source = "table"
+        else:
+            x = weights @ self.schedules[ids]
+            source = "interpolated"
+        return dict(x=x, duals=duals, objective=float(self._costs(theta) @ x), source=source)
+
+    def _costs(self, theta):
+        return self._c0 + np.asarray(theta, dtype=float) @ self._dc
+
+    def solve(self, theta):
+        """Fallback: true solve for theta (the model is built once and re-used)."""
+        if self._fallback is None:
+            if self._problem_factory is None:
+                raise ValueError("theta outside the table; load it with input_data to allow solves")
+            self._fallback = self._problem_factory()
+        problem, var_list = self._fallback
+        problem.model.setAttr("Obj", var_list, self._costs(theta).tolist())
+        problem.model.optimize()
+        if problem.model.Status != GRB.OPTIMAL:
+            return dict(x=None, duals=None, objective=np.nan, source="solve")
+        constrs = [problem.constraints[i] for i in self._dual_rows]
+        return dict(x=np.array(problem.model.getAttr("X", var_list)),
+                    duals=np.array(problem.model.getAttr("Pi", constrs)),
+                    objective=problem.model.ObjVal, source="solve")
+
+    def as_dict(self, x):
+        """{variable: value} of a looked-up schedule (the layout of results.variables)."""
+        return dict(zip(self.variables, x))
+
+    # --- persistence ---------------------------------------------------------
+
+    def save(self, path):
+        """Store the table as a compressed .npz (the fallback model is rebuilt on load)."""
+        arrays = {f"axis{j}": a for j, a in enumerate(self.axes)}
+        np.savez_compressed(path, price_basis=self.price_basis, variables=np.array(self.variables),
+                            schedules=self.schedules, schedule_id=self.schedule_id,
+                            basis_id=self.basis_id, duals=self.duals, objective=self.objective,
+                            c0=self._c0, dc=self._dc, dual_rows=self._dual_rows, **arrays)
+
+    @classmethod
+    def load(cls, path, input_data=None):
+        """
+        Load a saved table. Pass the InputData of the same model (any price) to enable
+        the fallback solve outside the grid.
+        """
+        f = np.load(path)
+        axes = [f[f"axis{j}"] for j in range(len(f["price_basis"]))]
+        factory = None if input_data is None else functools.partial(_reusable_problem, input_data)
+        return cls(axes, f["price_basis"], f["variables"].tolist(), f["schedules"], f["schedule_id"],
+                   f["basis_id"], f["duals"], f["objective"], f["c0"], f["dc"], f["dual_rows"],
+                   problem_factory=factory)
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+import utils.classes as classes
+
+
+def to_csr(input_data):
+    """Constraint matrix of an InputData (dense dict-of-lists or sparse) as scipy CSR."""
+    coeff = input_data.constraints_coeff
+    if hasattr(coeff, "tocsr"):
+        return coeff.tocsr()
+    return sp.csr_matrix(np.column_stack([coeff[v] for v in input_data.VARIABLES]))
+
+
+def _range(values):
+    a = np.abs(np.asarray(values, dtype=float))
+    a = a[(a > 0) & np.isfinite(a)]
+    if a.size == 0:
+        return np.nan, np.nan
+    return a.min(), a.max()
+
+
+def coefficient_stats(input_data):
+    """
+    Coefficient ranges of a model (as Gurobi prints them): min/max absolute nonzero of
+    the matrix, objective and right-hand side, with the max/min ratio of each.
+    Ratios above ~1e6 in the matrix typically cost simplex iterations and accuracy.
+    """
+    A = to_csr(input_data)
+    rows = {
+        "matrix": _range(A.data),
+        "objective": _range([input_data.objective_coeff[v] for v in input_data.VARIABLES]),
+        "rhs": _range(input_data.constraints_rhs),
+    }
+    df = pd.DataFrame(rows, index=["min", "max"]).T
+    df["ratio"] = df["max"] / df["min"]
+    return df
+
+
+def _pow2(x):
+    # powers of two scale without rounding error
+    return np.exp2(np.round(np.log2(x)))
+
+
+class Scaling:
+    """
+    Row factors r, column factors s and an objective factor k of a scaled model
+        A' = diag(r) A diag(s),  b' = r * b,  c' = k * s * c,  x = s * x'
+    with helpers to map results of the scaled model back to the original units.
+    """
+
+    def __init__(self, row, col, obj):
+        self.row = row
+        self.col = col
+        self.obj = obj
+
+    def unscale_primal(self, x_scaled):
+        return self.col * np.asarray(x_scaled, dtype=float)
+
+    def unscale_duals(self, pi_scaled):
+        return self.row * np.asarray(pi_scaled, dtype=float) / self.obj
+
+    def unscale_objective(self, value):
+        return value / self.obj
+
+    def unscale_costs(self, c_scaled):
+        # objective coefficients, reduced costs and their ranges: c = c' / (k s)
+        return np.asarray(c_scaled, dtype=float) / (self.obj * self.col)
+
+    def unscale_rows(self, b_scaled):
+        # right-hand sides, slacks and their ranges: b = b' / r
+        return np.asarray(b_scaled, dtype=float) / self.row
+
+
+def scale_input_data(input_data, iterations=8, scale_objective=True):
+    """
+    Geometric-mean equilibration of rows and columns (factors rounded to powers of 2),
+    plus an objective factor bringing the largest cost near 1. Integer columns are
+    not scaled.
+    Returns (scaled sparse InputData, Scaling). Variables keep their names and lb = 0.
+    When equilibration does not narrow the matrix range (max/min), the input is
+    returned unchanged with the identity Scaling.
+    """
+    A = to_csr(input_data).astype(float)
+    A.eliminate_zeros()
+    m, n = A.shape
+    absA = abs(A)
+    r = np.ones(m)
+    s = np.ones(n)
+    # integer columns keep factor 1 so integrality is preserved
+    names = input_data.VARIABLES
+    continuous = np.array([v not in input_data.variable_types for v in names])
+    for _ in range(iterations):
+        B = sp.diags(r) @ absA @ sp.diags(s)
+        rmax = B.max(axis=1).toarray().ravel()
+        rmin = _nonzero_min(B.tocsr(), m)
+        with np.errstate(divide="ignore"):
+            r *= np.where(rmax > 0, 1.0 / np.sqrt(rmax * rmin), 1.0)
+        B = sp.diags(r) @ absA @ sp.diags(s)
+        Bc = B.tocsc()
+        cmax = Bc.max(axis=0).toarray().ravel()
+        cmin = _nonzero_min(Bc.T.tocsr(), n)
+        with np.errstate(divide="ignore"):
+            s *= np.where((cmax > 0) & continuous, 1.0 / np.sqrt(cmax * cmin), 1.0)
+    r, s = _pow2(r), _pow2(s)
+    lo, hi = _range(A.data)
+    lo_scaled, hi_scaled = _range((sp.diags(r) @ A @ sp.diags(s)).tocsr().data)
+    if not hi_scaled / lo_scaled < hi / lo:
+        return input_data, Scaling(np.ones(m), np.ones(n), 1.0)
+
+    c = np.array([input_data.objective_coeff[v] for v in names], dtype=float) * s
+    cmax = np.abs(c).max() if np.any(c) else 1.0
+    k = _pow2(1.0 / cmax) if scale_objective else 1.0
+
+    scaled = classes.InputData(
+        list(names),
+        dict(zip(names, (k * c).tolist())),
+        (sp.diags(r) @ A @ sp.diags(s)).tocsr(),
+        (r * np.asarray(input_data.constraints_rhs, dtype=float)).tolist(),
+        list(input_data.constraints_sense),
+        variable_types=dict(input_data.variable_types),
+    )
+    return scaled, Scaling(r, s, k)
+
+
+def _nonzero_min(M, n):
+    """Smallest nonzero per row of a CSR matrix with nonnegative entries (1 for empty rows)."""
+    out = np.ones(n)
+    counts = np.diff(M.indptr)
+    nonempty = counts > 0
+    out[nonempty] = np.minimum.reduceat(M.data, M.indptr[:-1][nonempty])
+    return out
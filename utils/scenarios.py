@@ -0,0 +1,128 @@
+import numpy as np
+from scipy.signal import lfilter
+
+# tariff regimes a sample can be drawn under (cf. make_scenarios)
+TARIFF_REGIMES = ["base", "net metering", "no export"]
+
+
+def ar1_noise(rng, shape, phi, eps=None):
+    """
+    Stationary AR(1) paths with unit variance along the last axis:
+    z_t = phi z_{t-1} + sqrt(1 - phi^2) eps_t, z_0 = eps_0 (one lfilter call for all rows).
+    """
+    eps = rng.standard_normal(shape) if eps is None else eps
+    if phi == 0 or shape[-1] == 1:
+        return eps
+    z0 = eps[..., :1]
+    rest, _ = lfilter([np.sqrt(1 - phi ** 2)], [1.0, -phi], eps[..., 1:], axis=-1, zi=phi * z0)
+    return np.concatenate([z0, rest], axis=-1)
+
+
+def block_bootstrap(rng, history, n, block_size):
+    """
+    Moving-block bootstrap of daily profiles: history (D, T) of observed days; every
+    block of `block_size` hours is copied from a random day, keeping the time of day.
+    """
+    history = np.asarray(history, dtype=float)
+    D, T = history.shape
+    n_blocks = int(np.ceil(T / block_size))
+    days = np.repeat(rng.integers(D, size=(n, n_blocks)), block_size, axis=1)[:, :T]
+    return history[days, np.arange(T)]
+
+
+class ScenarioGenerator:
+    """
+    Seeded, vectorized generator of stochastic price / PV / reference-load ensembles
+    around the base data (prepare_base_inputs, task "c").
+
+    Each sample multiplies the base profiles by mean-one log-normal factors driven by
+    AR(1) noise that is correlated across price, PV and load (`corr`, 3x3), or takes
+    prices from a block bootstrap of `price_history` (D, T). Optional evening spikes
+    and tariff regimes reproduce the hand-coded variants of make_scenarios at random.
+
+    Samples come out as dicts of (n, T) arrays in chunks (see chunks), so ensembles
+    much larger than memory can be streamed; chunk i only depends on (seed, i, chunk_size).
+    """
+
+    def __init__(self, base, seed=0, price_model="ar1", price_sigma=0.2, price_phi=0.7,
+                 pv_sigma=0.3, pv_phi=0.8, load_sigma=0.1, load_phi=0.5, corr=None,
+                 price_history=None, block_size=6, spike_prob=0.0, spike_hours=(18, 22),
+                 spike_factor=2.0, regime_probs=None):
+        if price_model not in ("ar1", "bootstrap"):
+            raise ValueError(f"unknown price model {price_model!r}")
+        if price_model == "bootstrap" and price_history is None:
+            raise ValueError("the bootstrap price model needs a price_history (days x T)")
+        self.base = base
+        self.T = base["T"]
+        self.seed = seed
+        self.price_model = price_model
+        self.sigma = np.array([price_sigma, pv_sigma, load_sigma], dtype=float)
+        self.phi = (price_phi, pv_phi, load_phi)
+        # default: sunny hours tend to be cheap
+        corr = np.array([[1.0, -0.3, 0.2], [-0.3, 1.0, 0.0], [0.2, 0.0, 1.0]]) if corr is None else np.asarray(corr)
+        self._chol = np.linalg.cholesky(corr)
+        self.price_history = price_history
+        self.block_size = block_size
+        self.spike_prob = spike_prob
+        self.spike_hours = slice(*spike_hours)
+        self.spike_factor = spike_factor
+        probs = {"base": 1.0} if regime_probs is None else regime_probs
+        unknown = set(probs) - set(TARIFF_REGIMES)
+        if unknown:
+            raise ValueError(f"unknown tariff regimes {sorted(unknown)}")
+        weights = np.array([probs.get(r, 0.0) for r in TARIFF_REGIMES], dtype=float)
+        self.regime_probs = weights / weights.sum()
+
+    def _rng(self, chunk):
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=(chunk,)))
+
+    def sample(self, n, chunk=0):
+        """
+        n samples as {"price", "imp", "exp", "P_pv", "L_ref": (n, T), "regime": (n,)};
+        regime indexes TARIFF_REGIMES.
+        """
+        rng = self._rng(chunk)
+        T = self.T
+        base = self.base
+
+        # correlated innovations (3, n, T), then AR(1) per quantity
+        eps = np.einsum("ij,jnt->int", self._chol, rng.standard_normal((3, n, T)))
+        z = np.stack([ar1_noise(rng, (n, T), phi, eps[i]) for i, phi in enumerate(self.phi)])
+        factor = np.exp(self.sigma[:, None, None] * z - 0.5 * self.sigma[:, None, None] ** 2)
+
+        if self.price_model == "bootstrap":
+            price = block_bootstrap(rng, self.price_history, n, self.block_size)
+        else:
+            price = base["price"] * factor[0]
+        if self.spike_prob > 0:
+            spikes = rng.random(n) < self.spike_prob
+            price[spikes, self.spike_hours] *= self.spike_factor
+
+        P_pv = base["P_pv"] * factor[1]
+        L_ref = np.minimum(base["L_ref"] * factor[2], base["l_max_hour"])
+
+        regime = rng.choice(len(TARIFF_REGIMES), size=n, p=self.regime_probs)
+        imp = np.broadcast_to(base["imp_tariff"], (n, T)).copy()
+        exp = np.broadcast_to(base["exp_tariff"], (n, T)).copy()
+        net = regime == TARIFF_REGIMES.index("net metering")
+        imp[net] = 0.0
+        exp[net] = 0.0
+        no_export = regime == TARIFF_REGIMES.index("no export")
+        exp[no_export] = price[no_export] + 0.01
+
+        return dict(price=price, imp=imp, exp=exp, P_pv=P_pv, L_ref=L_ref, regime=regime)
+
+    def chunks(self, n, chunk_size=1000):
+        """Lazily yield the ensemble of n samples in chunks of at most chunk_size."""
+        for i, start in enumerate(range(0, n, chunk_size)):
+            yield self.sample(min(chunk_size, n - start), chunk=i)
+
+
+def iter_scenarios(base, chunk):
+    """
+    Per-sample (base, scenario) pairs of a chunk in the shape the builders take:
+    base with the sampled P_pv / L_ref, scenario = dict(price, imp, exp).
+    """
+    for i in range(len(chunk["price"])):
+        yield (dict(base, P_pv=chunk["P_pv"][i], L_ref=chunk["L_ref"][i]),
+               dict(price=chunk["price"][i], imp=chunk["imp"][i], exp=chunk["exp"][i]))
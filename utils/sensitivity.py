@@ -0,0 +1,114 @@
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+
+import utils.builders as builders
+import utils.classes as classes
+
+SWEEP_METRICS = ["Objective", "Total Deviation", "Total Imports",
+                 "Total Exports", "Total PV Self-Consumed"]
+
+
+def _index_of(variables, name):
+    """Positions of all time-indexed variables `name[t]` in the VARIABLES list."""
+    return np.array([i for i, v in enumerate(variables) if v.startswith(f"{name}[")], dtype=int)
+
+
+def _solve_gamma_lines(builder, base, scenario, builder_kwargs,
+                       gamma_up_values, gamma_down_values, warm_start):
+    """
+    Worker: build ONE model and re-solve it for every (gamma_up, gamma_down) pair of
+    the given rows, only rewriting the d+/d- objective coefficients between solves.
+    Rows are walked in serpentine order so consecutive solves are grid neighbours.
+    """
+    input_data = builder(base, scenario, gamma_up=1.0, gamma_down=1.0, **builder_kwargs)
+    problem = classes.LP_OptimizationProblem(input_data)
+    problem.model.setParam("OutputFlag", 0)
+
+    names = input_data.VARIABLES
+    var_list = [problem.variables[v] for v in names]
+    d_up_names = [names[i] for i in _index_of(names, "d+")]
+    d_dn_names = [names[i] for i in _index_of(names, "d-")]
+    # unit discomfort weights (builder evaluated at gamma = 1)
+    w_up = np.array([input_data.objective_coeff[v] for v in d_up_names], dtype=float)
+    w_dn = np.array([input_data.objective_coeff[v] for v in d_dn_names], dtype=float)
+    d_up_vars = [problem.variables[v] for v in d_up_names]
+    d_dn_vars = [problem.variables[v] for v in d_dn_names]
+
+    idx = {k: _index_of(names, k) for k in ["d+", "d-", "e", "s", "p"]}
+
+    out = np.full((len(gamma_up_values), len(gamma_down_values), len(SWEEP_METRICS)), np.nan)
+    for i, g_up in enumerate(gamma_up_values):
+        problem.model.setAttr("Obj", d_up_vars, (g_up * w_up).tolist())
+        order = range(len(gamma_down_values))
+        if i % 2 == 1:
+            order = reversed(order)
+        for j in order:
+            problem.model.setAttr("Obj", d_dn_vars, (gamma_down_values[j] * w_dn).tolist())
+            if not warm_start:
+                problem.model.reset()
+            problem.model.optimize()
+            if problem.model.status != GRB.OPTIMAL:
+                continue
+            x = np.array(problem.model.getAttr("X", var_list))
+            out[i, j] = [
+                problem.model.ObjVal,
+                x[idx["d+"]].sum() + x[idx["d-"]].sum(),
+                x[idx["e"]].sum(),
+                x[idx["s"]].sum(),
+                x[idx["p"]].sum(),
+            ]
+    return out
+
+
+def gamma_sweep(base, scenario, gamma_up_values, gamma_down_values,
+                builder=builders.build_input_data_1c, builder_kwargs=None,
+                n_jobs=1, warm_start=True):
+    """
+    Sweep a gamma_up x gamma_down grid of discomfort weights.
+
+    The model is built once per worker; grid points only update the d+/d- objective
+    coefficients (gamma * unit weight from the builder) and re-solve, so Gurobi can
+    warm-start from the previous basis along each gamma_down line. Rows of the grid
+    are split across `n_jobs` processes.
+
+    builder: any builder accepting gamma_up/gamma_down keywords (1b, 1c, 2b).
+    Returns dict(gamma_up, gamma_down, metrics, values) where values has shape
+    (len(gamma_up), len(gamma_down), len(metrics)); infeasible points are NaN.
+    """
+    gamma_up_values = np.asarray(gamma_up_values, dtype=float)
+    gamma_down_values = np.asarray(gamma_down_values, dtype=float)
+    builder_kwargs = builder_kwargs or {}
+    swept = sorted({"gamma_up", "gamma_down"} & set(builder_kwargs))
+    if swept:
+        raise ValueError(f"{swept} are swept by gamma_sweep and cannot be passed in builder_kwargs")
+
+    n_jobs = max(1, min(n_jobs or mp.cpu_count(), len(gamma_up_values)))
+    if n_jobs == 1:
+        values = _solve_gamma_lines(builder, base, scenario, builder_kwargs,
+                                    gamma_up_values, gamma_down_values, warm_start)
+    else:
+        chunks = np.array_split(gamma_up_values, n_jobs)
+        # spawn: every worker gets a fresh Gurobi environment
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp.get_context("spawn")) as pool:
+            futures = [pool.submit(_solve_gamma_lines, builder, base, scenario, builder_kwargs,
+                                   chunk, gamma_down_values, warm_start) for chunk in chunks]
+            values = np.concatenate([f.result() for f in futures], axis=0)
+
+    return {
+        "gamma_up": gamma_up_values,
+        "gamma_down": gamma_down_values,
+        "metrics": list(SWEEP_METRICS),
+        "values": values,
+    }
+
+
+def sweep_to_dataframe(sweep):
+    """Flatten a gamma_sweep result into a DataFrame indexed by (gamma_up, gamma_down)."""
+    index = pd.MultiIndex.from_product([sweep["gamma_up"], sweep["gamma_down"]],
+                                       names=["gamma_up", "gamma_down"])
+    values = sweep["values"].reshape(-1, len(sweep["metrics"]))
+    return pd.DataFrame(values, index=index, columns=sweep["metrics"])
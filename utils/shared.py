@@ -0,0 +1,189 @@
+"""
+Shared-memory data plane for parallel scenario loops.
+
+The base inputs and (S, T) ensembles are published once, as
+multiprocessing.shared_memory segments or memory-mapped .npy files, and workers
+attach read-only NumPy views of them; tasks only carry scenario indices.
+
+    with SharedArrays({"base": base, "ensemble": gen.sample(10000)}) as shared:
+        with ProcessPoolExecutor(64, initializer=init_worker, initargs=(shared.handle,)) as pool:
+            ...  # workers read worker_data()["ensemble"]["price"][i]
+
+or simply map_scenarios(solve_one, base, ensemble, n_jobs=64).
+"""
+
+import multiprocessing as mp
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+
+
+def _flatten(data, prefix=()):
+    for key, value in data.items():
+        path = prefix + (key,)
+        if isinstance(value, dict):
+            yield from _flatten(value, path)
+        else:
+            yield path, value
+
+
+def _shareable(value):
+    return isinstance(value, np.ndarray) and value.dtype != object and value.size > 0
+
+
+class SharedArrays:
+    """
+    Publish a (nested) dict once. NumPy arrays go to shared memory (backend="shm") or
+    to .npy files in `directory` (backend="npy", default: a temporary directory);
+    scalars, lists and strings travel inside the handle. `handle` is a small picklable
+    description for attach(); close() (or leaving the with block) releases the data.
+    Workers must be children of the publishing process, which owns the segments.
+    """
+
+    def __init__(self, data, backend="shm", directory=None):
+        if backend not in ("shm", "npy"):
+            raise ValueError(f"unknown backend {backend!r}, expected 'shm' or 'npy'")
+        self.backend = backend
+        self._segments = []
+        self._tmpdir = None
+        if backend == "npy" and directory is None:
+            directory = self._tmpdir = tempfile.mkdtemp(prefix="shared_")
+        self.directory = Path(directory) if directory is not None else None
+
+        entries = []
+        for i, (path, value) in enumerate(_flatten(data)):
+            if not _shareable(value):
+                entries.append((path, "value", value))
+                continue
+            value = np.ascontiguousarray(value)
+            if backend == "shm":
+                shm = shared_memory.SharedMemory(create=True, size=value.nbytes)
+                np.ndarray(value.shape, value.dtype, buffer=shm.buf)[...] = value
+                self._segments.append(shm)
+                location = shm.name
+            else:
+                location = str(self.directory / f"{i}.npy")
+                np.save(location, value)
+            entries.append((path, "array", (location, value.shape, value.dtype.str)))
+        self.handle = {"backend": backend, "entries": entries}
+
+    @property
+    def nbytes(self):
+        total = 0
+        for _, kind, payload in self.handle["entries"]:
+            if kind == "array":
+                _, shape, dtype = payload
+                total += int(np.prod(shape)) * np.dtype(dtype).itemsize
+        return total
+
+    def close(self):
+        # forget this process's own attachment; views already handed out stay valid
+        key = next((payload[0] for _, kind, payload in self.handle["entries"] if kind == "array"), None)
+        _ATTACHED.pop(key, None)
+        for shm in self._segments:
+            shm.close()
+            shm.unlink()
+        self._segments = []
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+            self._tmpdir = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# per-process attachments, keyed by the first array location of a handle
+_ATTACHED = {}
+
+
+class _Segment(shared_memory.SharedMemory):
+    # views may outlive this object; the mapping is then released with the last view
+    def __del__(self):
+        try:
+            self.close()
+        except BufferError:
+            pass
+
+
+def attach(handle):
+    """
+    The published dict with read-only views instead of arrays. Attaching is done
+    once per process and handle; later calls return the same views.
+    """
+    key = next((payload[0] for _, kind, payload in handle["entries"] if kind == "array"), None)
+    if key in _ATTACHED:
+        return _ATTACHED[key][0]
+    out, segments = {}, []
+    for path, kind, payload in handle["entries"]:
+        if kind == "value":
+            value = payload
+        elif handle["backend"] == "shm":
+            location, shape, dtype = payload
+            shm = _Segment(name=location)
+            segments.append(shm)
+            # the view holds the buffer, so it stays valid after close()
+            value = np.frombuffer(shm.buf, dtype=np.dtype(dtype), count=int(np.prod(shape))).reshape(shape)
+            value.flags.writeable = False
+        else:
+            value = np.load(payload[0], mmap_mode="r")
+        node = out
+        for key_ in path[:-1]:
+            node = node.setdefault(key_, {})
+        node[path[-1]] = value
+    if key is not None:
+        _ATTACHED[key] = (out, segments)
+    return out
+
+
+_WORKER = {}
+
+
+def init_worker(handle):
+    """ProcessPoolExecutor initializer: attach the published data in this worker."""
+    _WORKER["data"] = attach(handle)
+
+
+def worker_data():
+    """The data attached by init_worker."""
+    return _WORKER["data"]
+
+
+def scenario_at(base, ensemble, i):
+    """
+    (base, scenario) of ensemble member i in the shape the builders take, as views:
+    base with the member's P_pv / L_ref when the ensemble has them (see
+    scenarios.iter_scenarios), scenario = dict(price, imp, exp).
+    """
+    overrides = {k: ensemble[k][i] for k in ("P_pv", "L_ref") if k in ensemble}
+    return (dict(base, **overrides) if overrides else base,
+            {k: ensemble[k][i] for k in ("price", "imp", "exp")})
+
+
+def _run_chunk(func, indices):
+    data = _WORKER["data"]
+    return [func(*scenario_at(data["base"], data["ensemble"], i)) for i in indices]
+
+
+def map_scenarios(func, base, ensemble, indices=None, n_jobs=1, chunksize=16, backend="shm"):
+    """
+    [func(base_i, scenario_i) for i in indices] over an ensemble of (S, T) arrays
+    (e.g. ScenarioGenerator.sample). With n_jobs > 1 base and ensemble are published
+    once and tasks carry only chunks of indices; func must be a module-level function.
+    """
+    S = len(ensemble["price"])
+    indices = list(range(S)) if indices is None else list(indices)
+    if n_jobs == 1:
+        return [func(*scenario_at(base, ensemble, i)) for i in indices]
+    chunks = [indices[k:k + chunksize] for k in range(0, len(indices), chunksize)]
+    with SharedArrays({"base": base, "ensemble": ensemble}, backend=backend) as shared:
+        with ProcessPoolExecutor(max_workers=n_jobs, mp_context=mp.get_context("spawn"),
+                                 initializer=init_worker, initargs=(shared.handle,)) as pool:
+            futures = [pool.submit(_run_chunk, func, chunk) for chunk in chunks]
+            return [r for f in futures for r in f.result()]
@@ -0,0 +1,136 @@
+import csv
+import os
+import time
+from pathlib import Path
+
+import numpy as np
+
+# default history directory for workers; an explicit SolverStrategy(directory) takes precedence
+STRATEGY_ENV = "OPT_SOLVER_HISTORY"
+
+# LP algorithm settings (Gurobi Method / Presolve / Crossover); {} are Gurobi's defaults
+STRATEGIES = {
+    "default": {},
+    "primal": {"Method": 0},
+    "dual": {"Method": 1},
+    "barrier": {"Method": 2},
+    "barrier_nocross": {"Method": 2, "Crossover": 0},
+    "concurrent": {"Method": 3},
+    "dual_nopresolve": {"Method": 1, "Presolve": 0},
+}
+
+_FIELDS = ["family", "warm", "strategy", "runtime", "iterations", "status", "rows", "cols", "nonzeros", "time"]
+
+
+class SolverStrategy:
+    """
+    Picks Gurobi's LP algorithm per model family (utils.tuning.model_family) from the
+    recorded runtimes of earlier solves, kept in <directory>/history.csv.
+
+    Candidates depend on the solve:
+      - re-solves of a modified model (warm): simplex variants, which restart from the
+        previous basis;
+      - cold solves: default, dual simplex, barrier and concurrent;
+      - primal_only=True adds barrier without crossover (no basis, so no ranging or
+        VBasis/CBasis; duals are the interior-point ones).
+    Each candidate is tried `min_trials` times (when explore=True), after which the one
+    with the lowest median runtime wins. Without history a size rule is used: dual
+    simplex for small or warm models, concurrent (or barrier without crossover) for
+    large cold ones. override(name, family) pins a choice; explicit params given to
+    LP_OptimizationProblem always win, and such solves are recorded as "override",
+    which is never chosen.
+    """
+
+    def __init__(self, directory=None, primal_only=False, explore=True, min_trials=1, large_nonzeros=200_000):
+        directory = directory or os.environ.get(STRATEGY_ENV)
+        if directory is None:
+            raise ValueError(f"no history directory given and {STRATEGY_ENV} is not set")
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.primal_only = primal_only
+        self.explore = explore
+        self.min_trials = min_trials
+        self.large_nonzeros = large_nonzeros
+        self._overrides = {}
+        self._history = self._load()
+
+    @classmethod
+    def from_env(cls):
+        """The history named by OPT_SOLVER_HISTORY, or None when it is not set."""
+        return cls() if os.environ.get(STRATEGY_ENV) else None
+
+    @property
+    def path(self):
+        return self.directory / "history.csv"
+
+    def _load(self):
+        if not self.path.exists():
+            return []
+        with open(self.path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def override(self, name, family=None):
+        """Always use strategy `name` (for one family, or all with family=None); name=None clears."""
+        if name is not None and name not in STRATEGIES:
+            raise ValueError(f"unknown strategy {name!r}, expected one of {sorted(STRATEGIES)}")
+        if name is None:
+            self._overrides.pop(family, None)
+        else:
+            self._overrides[family] = name
+
+    def candidates(self, warm):
+        if warm:
+            return ["dual", "primal", "default"]
+        names = ["default", "dual", "barrier", "concurrent"]
+        return names + ["barrier_nocross"] if self.primal_only else names
+
+    def _rule(self, nonzeros, warm):
+        if warm or nonzeros < self.large_nonzeros:
+            return "dual"
+        return "barrier_nocross" if self.primal_only else "concurrent"
+
+    def runtimes(self, family, warm):
+        """{strategy: [runtimes]} of optimal solves recorded for a family."""
+        out = {}
+        for row in self._history:
+            if row["family"] == family and row["warm"] == str(bool(warm)) and row["status"] == "2":
+                out.setdefault(row["strategy"], []).append(float(row["runtime"]))
+        return out
+
+    def choose(self, family, nonzeros, warm=False):
+        """Strategy name for the next solve of a model of this family."""
+        for key in (family, None):
+            if key in self._overrides:
+                return self._overrides[key]
+        history = self.runtimes(family, warm)
+        candidates = self.candidates(warm)
+        if not history:
+            return self._rule(nonzeros, warm)
+        if self.explore:
+            for name in candidates:
+                if len(history.get(name, [])) < self.min_trials:
+                    return name
+        tried = {name: np.median(history[name]) for name in candidates if name in history}
+        return min(tried, key=tried.get) if tried else self._rule(nonzeros, warm)
+
+    def record(self, family, warm, name, model):
+        """Append the outcome of a finished solve of a gurobipy model."""
+        row = {"family": family, "warm": str(bool(warm)), "strategy": name,
+               "runtime": model.Runtime, "iterations": model.IterCount + model.BarIterCount,
+               "status": model.Status, "rows": model.NumConstrs, "cols": model.NumVars,
+               "nonzeros": model.NumNZs, "time": time.time()}
+        new = not self.path.exists()
+        with open(self.path, "a", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=_FIELDS)
+            if new:
+                writer.writeheader()
+            writer.writerow(row)
+        self._history.append({k: str(v) for k, v in row.items()})
+
+    def summary(self):
+        """Median runtime and count per (family, warm, strategy) as a DataFrame."""
+        import pandas as pd
+
+        df = pd.DataFrame(self._history, columns=_FIELDS)
+        df["runtime"] = df["runtime"].astype(float)
+        return df.groupby(["family", "warm", "strategy"])["runtime"].agg(["median", "count"]).reset_index()
@@ -0,0 +1,239 @@
+"""
+Streaming re-optimization of Task 1c households on live forecast revisions.
+
+Each household keeps one live Gurobi model for the whole day. An event advances it
+to the current step (decisions before it are fixed, the SOC of the current step is
+reset to the measured value) and/or revises prices and PV from some step on; only
+objective coefficients, right-hand sides and bounds of the model change, so the
+re-solve warm-starts from the previous basis (dual simplex) instead of rebuilding.
+
+Events are dicts (one JSON object per line in a feed file):
+
+    {"household": "h1", "t": 10, "soc": 3.2}                 # advance to step 10, measured SOC
+    {"household": "h1", "t": 10, "price": [1.9, 2.4, ...]}   # revision for steps 10, 11, ...
+    {"t": 12, "start": 14, "P_pv": [0.8, 0.6]}               # all households, steps 14, 15
+    {"type": "end"}                                          # end of a file feed
+"""
+
+import asyncio
+import inspect
+import json
+import time
+
+import numpy as np
+from gurobipy import GRB
+
+import utils.builders as builders
+import utils.classes as classes
+
+_FORECASTS = ("price", "imp", "exp", "P_pv")
+
+
+class LiveHousehold:
+    """
+    One household's Task 1c model, kept alive and re-solved over the remaining horizon.
+    Raises RuntimeError when the initial (full-day) solve is not optimal.
+    """
+
+    def __init__(self, base, scenario, gamma_up=1.2, gamma_down=1.3, params=None):
+        T = base["T"]
+        self.T = T
+        self.gamma_up, self.gamma_down = gamma_up, gamma_down
+        self.forecast = {k: np.array(scenario[k], dtype=float) for k in ("price", "imp", "exp")}
+        self.forecast["P_pv"] = np.array(base["P_pv"], dtype=float)
+        mb = builders.assemble_1c(base, scenario, gamma_up, gamma_down)
+        self.problem = classes.LP_OptimizationProblem(
+            mb.to_input_data(), params={"OutputFlag": 0, "Method": 1, **(params or {})})
+        self.vars = {name: [self.problem.variables[mb.VARIABLES[i]] for i in cols]
+                     for name, cols in mb.cols.items()}
+        # row blocks of assemble_1c: load balance, PV split (T..2T), ..., SOC dynamics (6T..7T)
+        constrs = self.problem.constraints
+        self._pv_rows = constrs[T:2 * T]
+        self._soc_rows = constrs[6 * T:7 * T]
+        self.now = 0
+        self.schedule = None
+        self.objective = None
+        self.status = None
+        # a measured SOC not yet reflected in self.schedule
+        self._measured = False
+        if not self.solve():
+            # advance() and the emitted updates need a schedule to fall back on
+            raise RuntimeError(f"initial solve of the household model is not optimal (status {self.status})")
+
+    def revise(self, start, **forecasts):
+        """
+        New forecasts (price, imp, exp, P_pv) for steps start, start + 1, ...;
+        values for steps already executed are ignored.
+        """
+        lo = max(start, self.now)
+        touched = set()
+        for key, values in forecasts.items():
+            if key not in _FORECASTS:
+                raise ValueError(f"unknown forecast {key!r}, expected some of {_FORECASTS}")
+            values = np.asarray(values, dtype=float)[lo - start:]
+            hi = min(lo + len(values), self.T)
+            if hi <= lo:
+                continue
+            self.forecast[key][lo:hi] = values[:hi - lo]
+            touched.add(key)
+        if not touched:
+            return
+        model = self.problem.model
+        steps = slice(lo, self.T)
+        f = self.forecast
+        if touched & {"price", "imp", "exp"}:
+            price = f["price"][steps]
+            model.setAttr("Obj", self.vars["e"][steps], (price + f["imp"][steps]).tolist())
+            model.setAttr("Obj", self.vars["s"][steps], (-(price - f["exp"][steps])).tolist())
+            model.setAttr("Obj", self.vars["d+"][steps], (price * self.gamma_up).tolist())
+            model.setAttr("Obj", self.vars["d-"][steps], (price * self.gamma_down).tolist())
+        if "P_pv" in touched:
+            model.setAttr("RHS", self._pv_rows[steps], f["P_pv"][steps].tolist())
+
+    def advance(self, t, soc=None):
+        """
+        Move to step t: the scheduled decisions of steps now..t-1 become fixed, and the
+        SOC entering step t is the measured `soc` (default: as scheduled). After a
+        measurement the remaining horizon is re-solved before further steps are fixed,
+        so the fixed decisions and SOC agree with the measured state.
+        """
+        t = min(int(t), self.T)
+        if t <= self.now:
+            if soc is not None and self.now < self.T:
+                self._soc_rows[self.now].RHS = soc
+                self._measured = True
+            return
+        if self._measured:
+            self.solve()
+        model = self.problem.model
+        past = slice(self.now, t)
+        for name, variables in self.vars.items():
+            values = self.schedule[name][past].tolist()
+            model.setAttr("LB", variables[past], values)
+            model.setAttr("UB", variables[past], values)
+        if t < self.T:
+            # decouple the remaining horizon: soc[t] = soc_measured + eta_ch b_ch[t] - b_dis[t] / eta_dis
+            row = self._soc_rows[t]
+            model.chgCoeff(row, self.vars["soc"][t - 1], 0.0)
+            row.RHS = self.schedule["soc"][t - 1] if soc is None else soc
+            self._measured = soc is not None
+        self.now = t
+
+    def solve(self):
+        """Re-optimize the remaining horizon; keeps the last schedule if the solve fails."""
+        model = self.problem.model
+        model.optimize()
+        self.status = model.Status
+        if model.Status == GRB.OPTIMAL:
+            self.schedule = {name: np.array(model.getAttr("X", v)) for name, v in self.vars.items()}
+            self.objective = model.ObjVal
+            self._measured = False
+        return self.status == GRB.OPTIMAL
+
+
+class StreamingOptimizer:
+    """
+    Consume an async feed of events and emit updated schedules.
+
+    Events that arrive while households are being re-solved are coalesced, so each
+    household is re-solved once per burst with its latest forecasts; latency_budget
+    (seconds) caps every solve (Gurobi TimeLimit) and a household whose solve does not
+    finish in time is emitted with its previous schedule and stale=True.
+    emit(update) is a plain or async callable receiving dicts with household, t,
+    schedule (remaining steps), objective, stale and latency (seconds from the
+    arrival of the oldest event it answers).
+    """
+
+    def __init__(self, households, latency_budget=0.05):
+        self.households = households
+        self.latency_budget = latency_budget
+        for household in households.values():
+            household.problem.model.Params.TimeLimit = latency_budget
+        self.latencies = []
+
+    def apply(self, event):
+        """Apply one event; returns the ids of the households it changed."""
+        ids = [event["household"]] if event.get("household") is not None else list(self.households)
+        t = event.get("t")
+        start = event.get("start", t if t is not None else 0)
+        forecasts = {k: event[k] for k in _FORECASTS if k in event}
+        for hid in ids:
+            household = self.households[hid]
+            if t is not None:
+                household.advance(t, event.get("soc"))
+            if forecasts:
+                household.revise(start, **forecasts)
+        return ids
+
+    async def run(self, feed, emit):
+        """Process events until the feed is exhausted."""
+        queue = asyncio.Queue()
+
+        async def read():
+            try:
+                async for event in feed:
+                    await queue.put((time.perf_counter(), event))
+            finally:
+                # always end the loop below; a feed error is re-raised by `await reader`
+                await queue.put(None)
+
+        reader = asyncio.create_task(read())
+        done = False
+        while not done:
+            items = [await queue.get()]
+            while not queue.empty():
+                items.append(queue.get_nowait())
+            dirty = {}
+            for item in items:
+                if item is None:
+                    done = True
+                    continue
+                received, event = item
+                for hid in self.apply(event):
+                    dirty.setdefault(hid, received)
+            for hid, received in dirty.items():
+                household = self.households[hid]
+                ok = await asyncio.to_thread(household.solve)
+                latency = time.perf_counter() - received
+                self.latencies.append(latency)
+                update = dict(household=hid, t=household.now, objective=household.objective, stale=not ok,
+                              latency=latency,
+                              schedule={k: v[household.now:] for k, v in household.schedule.items()})
+                result = emit(update)
+                if inspect.isawaitable(result):
+                    await result
+        await reader
+
+
+async def queue_feed(queue):
+    """Feed from a local asyncio.Queue (a stand-in for a message bus); None ends it."""
+    while True:
+        event = await queue.get()
+        if event is None:
+            return
+        yield event
+
+
+async def tail_feed(path, poll_interval=0.05):
+    """
+    Feed from a JSON-lines file that is appended to while it is read (tail -f);
+    ends at an {"type": "end"} event.
+    """
+    with open(path, "rb") as f:
+        while True:
+            line = f.readline()
+            if not line:
+                await asyncio.sleep(poll_interval)
+                continue
+            if not line.endswith(b"\n"):
+                # partially written line: wait for the rest
+                f.seek(-len(line), 1)
+                await asyncio.sleep(poll_interval)
+                continue
+            line = line.strip()
+            if not line:
+                continue
+            event = json.loads(line)
+            if event.get("type") == "end":
+                return
+            yield event
@@ -0,0 +1,254 @@
+import hashlib
+import multiprocessing as mp
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+from gurobipy import GRB
+
+import utils.builders as builders
+import utils.classes as classes
+
+# tariff parameters of a policy (DKK/kWh, DKK per kW of daily peak import, kW)
+DEFAULT_POLICY = {
+    "imp_offpeak": 0.5,       # import tariff outside the peak block
+    "imp_peak": 0.5,          # import tariff in the peak block
+    "exp": 0.4,               # export tariff (deducted from the export price)
+    "capacity_charge": 0.0,   # charge on the household's daily peak import
+    "export_cap": np.inf,     # export limit per hour
+}
+
+
+def tariff_arrays(policy, T, peak_hours=(17, 21)):
+    """Hourly import/export tariffs (T,) of a time-of-use policy."""
+    policy = {**DEFAULT_POLICY, **policy}
+    imp = np.full(T, float(policy["imp_offpeak"]))
+    imp[slice(*peak_hours)] = policy["imp_peak"]
+    return imp, np.full(T, float(policy["exp"]))
+
+
+def policy_key(policy):
+    """Hashable, rounded key of a policy, so near-identical search points share a cache entry."""
+    policy = {**DEFAULT_POLICY, **policy}
+    return tuple((k, round(float(policy[k]), 6)) for k in sorted(policy))
+
+
+class _Household:
+    """
+    One household's Task 1c model with tariff hooks, built once and re-solved for
+    every policy by rewriting objective coefficients and export-cap RHS only:
+    e_peak >= e[t] carries the capacity charge, s[t] <= export_cap.
+    """
+
+    def __init__(self, base, scenario, max_import_kW=np.inf):
+        T = base["T"]
+        self.T = T
+        self.price = np.asarray(scenario["price"], dtype=float)
+        mb = builders.assemble_1c(base, scenario)
+        e, s = mb.cols["e"], mb.cols["s"]
+        e_peak = mb.add_scalar("e_peak")
+        mb.add_rows(T, [(e, 1.0), (e_peak, -1.0)], GRB.LESS_EQUAL, 0.0)
+        self._cap_rows = mb.add_rows(T, [(s, 1.0)], GRB.LESS_EQUAL, GRB.INFINITY)
+        if np.isfinite(max_import_kW):
+            mb.add_rows(T, [(e, 1.0)], GRB.LESS_EQUAL, max_import_kW)
+        self.problem = classes.LP_OptimizationProblem(mb.to_input_data(), params={"OutputFlag": 0})
+        names = mb.VARIABLES
+        self._e = [self.problem.variables[names[i]] for i in e]
+        self._s = [self.problem.variables[names[i]] for i in s]
+        self._d = [self.problem.variables[names[i]] for i in np.r_[mb.cols["d+"], mb.cols["d-"]]]
+        self._peak = self.problem.variables["e_peak"]
+        self._caps = [self.problem.constraints[i] for i in self._cap_rows]
+
+    def solve(self, policy, peak_hours):
+        policy = {**DEFAULT_POLICY, **policy}
+        imp, exp = tariff_arrays(policy, self.T, peak_hours)
+        model = self.problem.model
+        model.setAttr("Obj", self._e, (self.price + imp).tolist())
+        model.setAttr("Obj", self._s, (-(self.price - exp)).tolist())
+        self._peak.Obj = policy["capacity_charge"]
+        cap = policy["export_cap"] if np.isfinite(policy["export_cap"]) else GRB.INFINITY
+        model.setAttr("RHS", self._caps, [cap] * self.T)
+        model.optimize()
+        if model.Status != GRB.OPTIMAL:
+            return None
+        e = np.array(model.getAttr("X", self._e))
+        s = np.array(model.getAttr("X", self._s))
+        peak = e.max()
+        return dict(
+            objective=model.ObjVal,
+            bill=float(((self.price + imp) * e - (self.price - exp) * s).sum() + policy["capacity_charge"] * peak),
+            grid_revenue=float((imp * e + exp * s).sum() + policy["capacity_charge"] * peak),
+            peak_import=float(peak),
+            imports=e,
+            exports=s,
+        )
+
+
+# per-process state of a spawned worker; serial evaluators keep their own (state=...)
+_WORKER = {}
+
+
+def _init_worker(households, max_import_kW, state=None):
+    # households: {index: (base, scenario)} of the households this process solves
+    state = _WORKER if state is None else state
+    state["fleet"] = households
+    state["max_import_kW"] = max_import_kW
+    state["models"] = {}
+
+
+def _solve_chunk(indices, policy, peak_hours, state=None):
+    """Worker: solve the given unique households under `policy`, reusing their models."""
+    state = _WORKER if state is None else state
+    out = []
+    for i in indices:
+        if i not in state["models"]:
+            base, scenario = state["fleet"][i]
+            state["models"][i] = _Household(base, scenario, state["max_import_kW"])
+        out.append(state["models"][i].solve(policy, peak_hours))
+    return out
+
+
+def _household_hash(base, scenario):
+    h = hashlib.sha1()
+    for d in (base, scenario):
+        for k in sorted(d):
+            if isinstance(d[k], (np.ndarray, list, int, float)):
+                h.update(k.encode())
+                h.update(np.asarray(d[k], dtype=float).tobytes())
+            elif isinstance(d[k], dict):
+                h.update(repr(sorted(d[k].items())).encode())
+    return h.hexdigest()
+
+
+class FleetEvaluator:
+    """
+    Evaluate tariff policies against a fleet of household optimizations.
+
+    fleet: list of (base, scenario) pairs (e.g. scenarios.iter_scenarios). Identical
+    households are solved once and counted with their multiplicity. The households are
+    split into n_jobs chunks, each pinned to its own single-process executor, so a
+    worker keeps its households' models and only rewrites tariff coefficients between
+    policies; every evaluated policy is cached. Use as a context manager to keep the
+    workers alive across a search:
+
+        with FleetEvaluator(fleet, n_jobs=8) as ev:
+            best = nelder_mead(ev, {"imp_peak": 1.0, "capacity_charge": 0.5}, peak_objective(5000.0))
+    """
+
+    def __init__(self, fleet, n_jobs=1, max_import_kW=np.inf, peak_hours=(17, 21)):
+        groups = {}
+        for base, scenario in fleet:
+            groups.setdefault(_household_hash(base, scenario), []).append((base, scenario))
+        self.households = [members[0] for members in groups.values()]
+        self.counts = np.array([len(members) for members in groups.values()], dtype=float)
+        self.n_jobs = n_jobs
+        self.max_import_kW = max_import_kW
+        self.peak_hours = peak_hours
+        self.cache = {}
+        self._pools = []
+        self._local = {}
+        n = len(self.households)
+        self._chunks = [list(c) for c in np.array_split(np.arange(n), min(n_jobs, n)) if len(c)]
+
+    def __enter__(self):
+        if self.n_jobs > 1:
+            # one process per chunk: a chunk is always solved where its models live
+            self._pools = [ProcessPoolExecutor(max_workers=1, mp_context=mp.get_context("spawn"),
+                                               initializer=_init_worker,
+                                               initargs=({i: self.households[i] for i in c}, self.max_import_kW))
+                           for c in self._chunks]
+        else:
+            _init_worker(dict(enumerate(self.households)), self.max_import_kW, self._local)
+        return self
+
+    def __exit__(self, *exc):
+        for pool in self._pools:
+            pool.shutdown()
+        self._pools = []
+        self._local.clear()
+
+    def evaluate(self, policy):
+        """
+        Fleet metrics of a policy: total household cost (objective) and bill, grid
+        revenue, sum of household peaks, coincident fleet peak, infeasible households.
+        """
+        key = policy_key(policy)
+        if key in self.cache:
+            return self.cache[key]
+        if not self._pools and not self._local:
+            _init_worker(dict(enumerate(self.households)), self.max_import_kW, self._local)
+        if self._pools:
+            futures = [pool.submit(_solve_chunk, c, dict(key), self.peak_hours)
+                       for pool, c in zip(self._pools, self._chunks)]
+            results = [r for f in futures for r in f.result()]
+        else:
+            results = [r for c in self._chunks for r in _solve_chunk(c, dict(key), self.peak_hours, self._local)]
+
+        ok = np.array([r is not None for r in results])
+        w = self.counts[ok]
+        solved = [r for r in results if r is not None]
+
+        def total(name):
+            return float(np.dot(w, [r[name] for r in solved])) if solved else np.nan
+
+        fleet_imports = (w[:, None] * np.array([r["imports"] for r in solved])).sum(axis=0) if solved else np.nan
+        metrics = dict(dict(key),
+                       household_cost=total("objective"),
+                       household_bill=total("bill"),
+                       grid_revenue=total("grid_revenue"),
+                       sum_of_peaks=total("peak_import"),
+                       coincident_peak=float(np.max(fleet_imports)) if solved else np.nan,
+                       infeasible=float(self.counts[~ok].sum()))
+        self.cache[key] = metrics
+        return metrics
+
+    def history(self):
+        """All evaluated policies and their metrics as a DataFrame."""
+        return pd.DataFrame(list(self.cache.values()))
+
+
+def peak_objective(revenue_target, revenue_weight=1.0):
+    """
+    Default search objective: coincident fleet peak plus a penalty on missing the
+    grid revenue target (in kW-equivalent via revenue_weight per DKK).
+    """
+    def objective(metrics):
+        return metrics["coincident_peak"] + revenue_weight * abs(metrics["grid_revenue"] - revenue_target)
+    return objective
+
+
+def grid_search(evaluator, grid, objective, fixed=None):
+    """
+    Evaluate the full product of `grid` ({param: values}) on top of `fixed`;
+    returns the evaluated points with their objective, best first.
+    """
+    keys = list(grid)
+    rows = []
+    for values in pd.MultiIndex.from_product([grid[k] for k in keys]):
+        policy = {**(fixed or {}), **dict(zip(keys, np.atleast_1d(values)))}
+        metrics = evaluator.evaluate(policy)
+        rows.append({**metrics, "objective": objective(metrics)})
+    return pd.DataFrame(rows).sort_values("objective").reset_index(drop=True)
+
+
+def nelder_mead(evaluator, x0, objective, bounds=None, fixed=None, max_evals=100, xatol=1e-3, fatol=1e-3):
+    """
+    Derivative-free Nelder–Mead search over the parameters in x0 ({param: start}),
+    with optional bounds ({param: (low, high)}). Returns (best policy, best metrics,
+    scipy OptimizeResult); every evaluation is cached by the evaluator.
+    """
+    from scipy.optimize import minimize
+
+    keys = list(x0)
+
+    def policy_of(x):
+        return {**(fixed or {}), **dict(zip(keys, x))}
+
+    def f(x):
+        return objective(evaluator.evaluate(policy_of(x)))
+
+    res = minimize(f, np.array([x0[k] for k in keys], dtype=float), method="Nelder-Mead",
+                   bounds=[(bounds or {}).get(k, (None, None)) for k in keys],
+                   options=dict(maxfev=max_evals, xatol=xatol, fatol=fatol))
+    best = policy_of(res.x)
+    return best, evaluator.evaluate(best), res
@@ -0,0 +1,90 @@
+import numpy as np
+import pandas as pd
+
+import utils.builders as builders
+import utils.classes as classes
+import utils.data as data
+
+# families of assemble_1c that are energies per step (split evenly when a step is refined)
+_ENERGY_FAMILIES = ("l", "p", "e", "s", "c", "d+", "d-", "b_ch", "b_dis")
+
+
+def _solve(base, scenario, params, **kwargs):
+    mb = builders.assemble_1c(base, scenario, **kwargs)
+    problem = classes.LP_OptimizationProblem(mb.to_input_data(), params=params)
+    problem.run()
+    if getattr(problem.results, "objective_value", None) is None:
+        raise RuntimeError("coarse-to-fine: model on the step grid is not optimal")
+    x = np.fromiter(problem.results.variables.values(), dtype=float, count=len(mb.VARIABLES))
+    return {name: x[cols] for name, cols in mb.cols.items()}, problem.results.objective_value
+
+
+def _varies(values, lengths):
+    # does a fine series change within any of the coarse blocks?
+    starts = np.r_[0, np.cumsum(lengths)[:-1]]
+    values = np.asarray(values, dtype=float)
+    return np.maximum.reduceat(values, starts) - np.minimum.reduceat(values, starts) > 1e-9
+
+
+def refinement_mask(base_fine, scenario_fine, coarse_base, schedule, factor, margin=1, tol=1e-6):
+    """
+    Coarse steps to refine: where the fine price, PV or reference load changes
+    inside the step, or where the coarse schedule sits on a bound (load at l_max,
+    charging/discharging at the power limit, SOC empty or full); each marked step
+    also marks `margin` neighbours on either side.
+    """
+    T = coarse_base["T"]
+    lengths = np.full(T, factor)
+    mask = np.zeros(T, dtype=bool)
+    for values in (scenario_fine["price"], base_fine["P_pv"], base_fine["L_ref"]):
+        mask |= _varies(values, lengths)
+
+    battery = coarse_base["battery_params"]
+    dt = builders.step_lengths(coarse_base)
+    mask |= schedule["l"] >= np.broadcast_to(coarse_base["l_max_hour"], (T,)) - tol
+    mask |= schedule["b_ch"] >= battery["max_charge_power_kW"] * dt - tol
+    mask |= schedule["b_dis"] >= battery["max_discharge_power_kW"] * dt - tol
+    mask |= (schedule["soc"] <= tol) | (schedule["soc"] >= battery["capacity_kWh"] - tol)
+
+    for shift in range(1, margin + 1):
+        mask[shift:] |= mask[:-shift]
+        mask[:-shift] |= mask[shift:]
+    return mask
+
+
+def solve_coarse_to_fine(base_fine, scenario_fine, factor, margin=1, tol=1e-6, params=None, **kwargs):
+    """
+    Task 1c on a fine grid (e.g. 15 minutes, see data.resample_base) via a coarse solve:
+      1. solve on blocks of `factor` fine steps,
+      2. refine the blocks where inputs vary or constraints bind (refinement_mask),
+      3. re-solve on the mixed grid (refined blocks at fine resolution, the rest coarse),
+      4. map the mixed schedule back to the fine grid: energies of coarse blocks are
+         split evenly, SOC is interpolated linearly within a block.
+    Prices are constant within kept blocks, so only binding/varying stretches need the
+    fine resolution and the result matches the full fine solve there. kwargs go to
+    builders.assemble_1c.
+    Returns (fine DataFrame, objective, refined mask (coarse steps), dict of step counts).
+    """
+    T_fine = base_fine["T"]
+    if T_fine % factor:
+        raise ValueError(f"T = {T_fine} is not a multiple of the coarsening factor {factor}")
+    params = {"OutputFlag": 0} if params is None else params
+
+    coarse_base, coarse_scenario = data.aggregate_steps(base_fine, scenario_fine, np.full(T_fine // factor, factor))
+    schedule, _ = _solve(coarse_base, coarse_scenario, params, **kwargs)
+    refined = refinement_mask(base_fine, scenario_fine, coarse_base, schedule, factor, margin, tol)
+
+    # mixed grid: each refined block becomes `factor` steps of length 1
+    lengths = np.concatenate([np.ones(factor, dtype=int) if r else [factor] for r in refined])
+    mixed_base, mixed_scenario = data.aggregate_steps(base_fine, scenario_fine, lengths)
+    schedule, objective = _solve(mixed_base, mixed_scenario, params, **kwargs)
+
+    battery = base_fine["battery_params"]
+    soc_start = np.r_[battery["initial_soc_ratio"] * battery["capacity_kWh"], schedule["soc"][:-1]]
+    df = pd.DataFrame(index=range(T_fine))
+    for name in _ENERGY_FAMILIES:
+        df[name] = np.repeat(schedule[name] / lengths, lengths)
+    step = np.concatenate([np.arange(1, n + 1) / n for n in lengths])
+    df["soc"] = np.repeat(soc_start, lengths) + step * np.repeat(schedule["soc"] - soc_start, lengths)
+    counts = {"fine": T_fine, "coarse": len(refined), "mixed": len(lengths)}
+    return df, objective, refined, counts
@@ -0,0 +1,146 @@
+import hashlib
+import os
+from pathlib import Path
+
+from gurobipy import GRB
+
+import utils.classes as classes
+
+# default cache directory for workers; an explicit ParamCache(directory) takes precedence
+PARAM_CACHE_ENV = "OPT_PARAM_CACHE"
+
+_SENSES = {"<": GRB.LESS_EQUAL, ">": GRB.GREATER_EQUAL, "=": GRB.EQUAL}
+
+
+def model_family(input_data, name=None):
+    """
+    Cache key of a model shape: "<name>_T<horizon>", where name defaults to a short
+    hash of the variable families (l, e, soc, E_cap, ...) and the horizon is the
+    largest time index + 1. Models with the same key share tuned parameters.
+    """
+    families = sorted({v.split("[")[0] for v in input_data.VARIABLES})
+    T = max((int(v.rstrip("]").split("[")[1].split(",")[-1]) for v in input_data.VARIABLES if "[" in v),
+            default=-1) + 1
+    if name is None:
+        name = hashlib.sha1("|".join(families).encode()).hexdigest()[:10]
+    return f"{name}_T{T}"
+
+
+def read_input_data(path):
+    """
+    Read an exported model file (.mps/.lp, optionally .gz/.bz2/.7z compressed) back
+    into a sparse InputData, so it solves through LP_OptimizationProblem as usual.
+    Positive lower and finite upper bounds become extra rows after the model's own;
+    models that InputData cannot express (negative lower bounds, an objective
+    constant, maximization) raise ValueError.
+    """
+    import gurobipy as gp
+    import numpy as np
+    import scipy.sparse as sp
+
+    model = gp.read(str(path))
+    model.Params.OutputFlag = 0
+    variables = model.getVars()
+    constrs = model.getConstrs()
+    names = model.getAttr("VarName", variables)
+    vtypes = model.getAttr("VType", variables)
+    if model.ModelSense != GRB.MINIMIZE:
+        raise ValueError(f"{path}: maximization models are not supported")
+    if model.ObjCon != 0:
+        raise ValueError(f"{path}: objective constant {model.ObjCon} is not supported")
+    lb = np.array(model.getAttr("LB", variables))
+    ub = np.array(model.getAttr("UB", variables))
+    if np.any(lb < 0):
+        raise ValueError(f"{path}: negative lower bounds are not supported (variables are >= 0)")
+    # binaries already carry their [0, 1] bounds
+    ub[np.array(vtypes) == GRB.BINARY] = np.inf
+    lower, upper = np.flatnonzero(lb > 0), np.flatnonzero(ub < GRB.INFINITY)
+    A = model.getA().tocsr()
+    bound_rows = sp.csr_matrix((np.ones(len(lower) + len(upper)),
+                                (np.arange(len(lower) + len(upper)), np.r_[lower, upper])),
+                               shape=(len(lower) + len(upper), len(names)))
+    return classes.InputData(
+        names,
+        dict(zip(names, model.getAttr("Obj", variables))),
+        sp.vstack([A, bound_rows]).tocsr(),
+        list(model.getAttr("RHS", constrs)) + lb[lower].tolist() + ub[upper].tolist(),
+        [_SENSES[s] for s in model.getAttr("Sense", constrs)]
+        + [GRB.GREATER_EQUAL] * len(lower) + [GRB.LESS_EQUAL] * len(upper),
+        variable_types={v: t for v, t in zip(names, vtypes) if t != GRB.CONTINUOUS},
+    )
+
+
+class ParamCache:
+    """
+    Directory of tuned Gurobi parameter files (<family key>.prm), one per model
+    family and horizon. LP_OptimizationProblem(..., param_cache=...) applies the
+    matching file before its explicit params; workers pick the cache up from the
+    OPT_PARAM_CACHE environment variable.
+    """
+
+    def __init__(self, directory=None):
+        directory = directory or os.environ.get(PARAM_CACHE_ENV)
+        if directory is None:
+            raise ValueError(f"no parameter cache directory given and {PARAM_CACHE_ENV} is not set")
+        self.directory = Path(directory)
+
+    @classmethod
+    def from_env(cls):
+        """The cache named by OPT_PARAM_CACHE, or None when it is not set."""
+        return cls() if os.environ.get(PARAM_CACHE_ENV) else None
+
+    def path(self, key):
+        return self.directory / f"{key}.prm"
+
+    def apply(self, model, key):
+        """Load the tuned parameters for `key` into a gurobipy model; returns whether any existed."""
+        path = self.path(key)
+        if not path.exists() or not _prm_settings(path):
+            return False
+        model.read(str(path))
+        return True
+
+    def tune(self, problem, key, time_limit=60, trials=3):
+        """
+        Run the Gurobi tuning tool on a built LP_OptimizationProblem and store the best
+        parameter set under `key`. Returns the path, or None when tuning found nothing
+        better than the defaults.
+        """
+        model = problem.model
+        model.Params.TuneTimeLimit = time_limit
+        model.Params.TuneTrials = trials
+        model.tune()
+        if model.TuneResultCount == 0:
+            return None
+        model.getTuneResult(0)
+        path = self.path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Gurobi also reports the baseline as a result; it writes no non-default parameters
+        tmp = path.with_name(f"{key}.tmp.prm")
+        model.write(str(tmp))
+        if not _prm_settings(tmp):
+            tmp.unlink()
+            return None
+        tmp.replace(path)
+        return path
+
+    def keys(self):
+        return sorted(p.stem for p in self.directory.glob("*.prm"))
+
+
+def _prm_settings(path):
+    """Parameter lines of a .prm file (comments and blank lines dropped)."""
+    lines = Path(path).read_text().splitlines()
+    return [line for line in lines if line.strip() and not line.lstrip().startswith("#")]
+
+
+def export_presolved(problem, path):
+    """
+    Write the presolved model of a problem (same formats as export_model) for offline
+    analysis or other solvers. Gurobi cannot map a presolved file back to the original
+    variables, so repeat solves reuse tuned parameters rather than this file.
+    Returns the (rows, cols) of the presolved model.
+    """
+    presolved = problem.model.presolve()
+    presolved.write(str(path))
+    return presolved.NumConstrs, presolved.NumVars